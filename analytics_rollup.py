@@ -0,0 +1,149 @@
+"""Hourly analytics rollups maintained in the same transaction as interaction writes"""
+import sqlite3
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+from interaction_logger import InteractionRecord
+
+# Confidence buckets reported by /health/accuracy
+HIGH_CONFIDENCE = 0.8
+MEDIUM_CONFIDENCE = 0.6
+
+HOUR_FORMAT = "%Y-%m-%d %H:00:00"
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def hour_key(timestamp: datetime) -> str:
+    return timestamp.strftime(HOUR_FORMAT)
+
+
+def day_key(timestamp: datetime) -> str:
+    return timestamp.strftime(DAY_FORMAT)
+
+
+def create_rollup_schema(conn: sqlite3.Connection):
+    """Create rollup tables, backfilling them from user_interactions on first creation"""
+    cursor = conn.cursor()
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'interaction_rollup_hourly'"
+    ).fetchone()
+
+    # Per hour and source/language: counts, confidence sum and confidence buckets
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interaction_rollup_hourly (
+            hour TEXT NOT NULL,
+            source TEXT NOT NULL,
+            language TEXT NOT NULL,
+            interactions INTEGER NOT NULL,
+            confidence_sum REAL NOT NULL,
+            high_confidence INTEGER NOT NULL,
+            medium_confidence INTEGER NOT NULL,
+            PRIMARY KEY (hour, source, language)
+        ) WITHOUT ROWID
+    ''')
+
+    # Distinct users can't be summed across hours, so keep one row per user per day
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_activity_daily (
+            day TEXT NOT NULL,
+            source TEXT NOT NULL,
+            language TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            PRIMARY KEY (day, source, language, user_id)
+        ) WITHOUT ROWID
+    ''')
+
+    if not exists:
+        backfill_rollups(conn)
+
+
+def backfill_rollups(conn: sqlite3.Connection):
+    """Build the rollups from existing interaction rows (one-off, on schema creation)"""
+    conn.execute(f'''
+        INSERT INTO interaction_rollup_hourly
+        SELECT strftime('%Y-%m-%d %H:00:00', timestamp), IFNULL(source, ''), IFNULL(language, ''),
+               COUNT(*), IFNULL(SUM(confidence), 0),
+               COUNT(CASE WHEN confidence > {HIGH_CONFIDENCE} THEN 1 END),
+               COUNT(CASE WHEN confidence > {MEDIUM_CONFIDENCE} THEN 1 END)
+        FROM user_interactions
+        WHERE timestamp IS NOT NULL
+        GROUP BY 1, 2, 3
+    ''')
+    conn.execute('''
+        INSERT OR IGNORE INTO user_activity_daily
+        SELECT DISTINCT date(timestamp), IFNULL(source, ''), IFNULL(language, ''), user_id
+        FROM user_interactions
+        WHERE timestamp IS NOT NULL AND user_id IS NOT NULL
+    ''')
+
+
+def update_rollups(conn: sqlite3.Connection, records: List[InteractionRecord]):
+    """Fold a batch into the rollups: aggregate in memory, then one upsert per group"""
+    groups: Dict[tuple, List] = defaultdict(lambda: [0, 0.0, 0, 0])
+    users = set()
+    for record in records:
+        hour = hour_key(record.timestamp)
+        group = groups[(hour, record.source, record.language)]
+        group[0] += 1
+        group[1] += record.confidence
+        group[2] += record.confidence > HIGH_CONFIDENCE
+        group[3] += record.confidence > MEDIUM_CONFIDENCE
+        users.add((day_key(record.timestamp), record.source, record.language, record.user_id))
+
+    conn.executemany('''
+        INSERT INTO interaction_rollup_hourly
+        (hour, source, language, interactions, confidence_sum, high_confidence, medium_confidence)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (hour, source, language) DO UPDATE SET
+            interactions = interactions + excluded.interactions,
+            confidence_sum = confidence_sum + excluded.confidence_sum,
+            high_confidence = high_confidence + excluded.high_confidence,
+            medium_confidence = medium_confidence + excluded.medium_confidence
+    ''', [(*key, *values) for key, values in groups.items()])
+    conn.executemany('INSERT OR IGNORE INTO user_activity_daily VALUES (?, ?, ?, ?)', users)
+
+
+def interaction_summary(conn: sqlite3.Connection, since: datetime) -> List[Dict]:
+    """Per language/source totals since `since`, read from the rollups only"""
+    rows = conn.execute('''
+        SELECT r.total_interactions, r.avg_confidence, IFNULL(u.unique_users, 0) AS unique_users,
+               r.language, r.source
+        FROM (
+            SELECT SUM(interactions) AS total_interactions,
+                   SUM(confidence_sum) / SUM(interactions) AS avg_confidence,
+                   language, source
+            FROM interaction_rollup_hourly
+            WHERE hour >= ?
+            GROUP BY language, source
+        ) r
+        LEFT JOIN (
+            SELECT COUNT(DISTINCT user_id) AS unique_users, language, source
+            FROM user_activity_daily
+            WHERE day >= ?
+            GROUP BY language, source
+        ) u ON u.language = r.language AND u.source = r.source
+    ''', (hour_key(since), day_key(since))).fetchall()
+    return [dict(row) for row in rows]
+
+
+def accuracy_summary(conn: sqlite3.Connection, since: datetime) -> List[Dict]:
+    """Average confidence and bucket percentages per source/language since `since`"""
+    rows = conn.execute('''
+        SELECT SUM(confidence_sum) / SUM(interactions),
+               SUM(high_confidence) * 100.0 / SUM(interactions),
+               SUM(medium_confidence) * 100.0 / SUM(interactions),
+               source, language
+        FROM interaction_rollup_hourly
+        WHERE hour >= ?
+        GROUP BY source, language
+    ''', (hour_key(since),)).fetchall()
+    return [
+        {
+            "source": row[3],
+            "language": row[4],
+            "avg_confidence": round(row[0], 3),
+            "high_confidence_percentage": round(row[1], 1),
+            "medium_confidence_percentage": round(row[2], 1)
+        } for row in rows
+    ]
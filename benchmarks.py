@@ -0,0 +1,218 @@
+"""Micro-benchmarks for the chatbot's hot paths.
+
+Usage:
+    python benchmarks.py matcher [--sizes 4,100,1000,10000] [--queries 200]
+    python benchmarks.py hinglish [--queries 10000]
+    python benchmarks.py router [--sizes 4,100,1000] [--queries 2000]
+    python benchmarks.py outbreak [--regions 1000,10000,100000]
+    python benchmarks.py coldstart [--module healthcare_chatbot_sih] [--runs 5] [--top 15]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def synthetic_kb(n_diseases: int, phrases_per_disease: int = 8, seed: int = 7) -> Tuple[List[str], List[str]]:
+    """Random symptom phrases over a vocabulary that grows with the KB"""
+    rng = np.random.default_rng(seed)
+    vocab_size = max(50, n_diseases * 6)
+    phrases, labels = [], []
+    for disease in range(n_diseases):
+        for _ in range(phrases_per_disease):
+            words = rng.integers(0, vocab_size, size=rng.integers(1, 4))
+            phrases.append(" ".join(f"sym{word}" for word in words))
+            labels.append(f"disease{disease}")
+    return phrases, labels
+
+
+def synthetic_queries(phrases: List[str], n: int, seed: int = 11) -> List[str]:
+    """Queries built from two or three KB phrases, like "fever headache nausea\""""
+    rng = np.random.default_rng(seed)
+    return [" ".join(phrases[i] for i in rng.integers(0, len(phrases), size=rng.integers(2, 4))) for _ in range(n)]
+
+
+def per_query_ms(fn, queries: List[str]) -> float:
+    started = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - started) * 1000 / len(queries)
+
+
+def bench_matcher(sizes: List[int], n_queries: int):
+    """Per-query latency of brute-force cosine vs the exact and inverted indexes"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    from symptom_index import ExactIndex, InvertedIndex
+
+    print(f"{'diseases':>9} {'phrases':>8} {'mode':>16} {'ms/query':>9} {'recall@1':>9}")
+    for size in sizes:
+        phrases, _ = synthetic_kb(size)
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+        matrix = vectorizer.fit_transform(phrases)
+        queries = synthetic_queries(phrases, n_queries)
+        vectors = [vectorizer.transform([query]) for query in queries]
+        lookup = dict(zip(queries, vectors))
+
+        # Ties are common in small KBs, so a hit is any result scoring as well as the true best
+        baseline = [float(np.max(cosine_similarity(v, matrix)[0])) for v in vectors]
+        ms = per_query_ms(lambda q: np.argmax(cosine_similarity(lookup[q], matrix)[0]), queries)
+        print(f"{size:>9} {len(phrases):>8} {'brute-force':>16} {ms:>9.3f} {1.0:>9.3f}")
+
+        candidates = [("exact", ExactIndex(matrix))]
+        for recall in (1.0, 0.8, 0.5):
+            candidates.append((f"inverted@{recall}", InvertedIndex(matrix, recall)))
+
+        for name, index in candidates:
+            ms = per_query_ms(lambda q: index.search(lookup[q], 1), queries)
+            hits = sum(index.search(v, 1)[1][0][0] >= best - 1e-9 for v, best in zip(vectors, baseline))
+            print(f"{size:>9} {len(phrases):>8} {name:>16} {ms:>9.3f} {hits / len(queries):>9.3f}")
+
+
+def bench_hinglish(n_queries: int):
+    """Per-query latency of the romanised Hindi lexicon, uncached and memoised"""
+    from hinglish import HinglishLexicon, SYMPTOMS
+
+    rng = np.random.default_rng(13)
+    filler = ["mujhe", "aur", "hai", "kya", "se", "din", "mein", "bhi", "kaise", "bachen"]
+    words = filler + [spelling for spellings in SYMPTOMS.values() for spelling in spellings]
+    queries = [" ".join(rng.choice(words, size=rng.integers(3, 12))) for _ in range(n_queries)]
+
+    lexicon = HinglishLexicon()
+    print(f"{'mode':>10} {'queries':>8} {'ms/query':>9}")
+    print(f"{'uncached':>10} {n_queries:>8} {per_query_ms(lexicon._match, queries):>9.4f}")
+    hot = queries[:1000]  # repeated traffic that fits the memo
+    for query in hot:
+        lexicon.match(query)
+    print(f"{'memoised':>10} {len(hot):>8} {per_query_ms(lexicon.match, hot):>9.4f}")
+
+
+def bench_router(sizes: List[int], n_queries: int):
+    """Per-query latency of chained `in` checks vs the Aho-Corasick keyword router"""
+    from keyword_router import KeywordRouter, ROUTE_KEYWORDS
+
+    # Letters only (the router folds digits away): consonant-vowel syllables give distinct names
+    syllables = [consonant + vowel for consonant in "bcdfgjklmnprstv" for vowel in "aiu"]
+
+    def name(i: int) -> str:
+        return "".join(syllables[(i // len(syllables) ** k) % len(syllables)] for k in range(2))
+
+    rng = np.random.default_rng(17)
+    print(f"{'diseases':>9} {'keywords':>9} {'mode':>14} {'ms/query':>9}")
+    for size in sizes:
+        diseases = {f"disease{i}": (f"disease{name(i)}", f"rog{name(i)}", f"bimari{name(i)}") for i in range(size)}
+        words = ["what", "are", "the", "symptoms", "of", "how", "to", "prevent", "mujhe", "hai"]
+        queries = [
+            " ".join([*rng.choice(words, size=4), f"rog{name(rng.integers(0, size))}", *rng.choice(words, size=2)])
+            for _ in range(n_queries)
+        ]
+
+        def chained(query: str):
+            text = query.lower()
+            route = next((route for route, keywords in ROUTE_KEYWORDS.items() if any(k in text for k in keywords)), None)
+            disease = next((disease for disease, names in diseases.items() if any(n in text for n in names)), None)
+            return route, disease
+
+        router = KeywordRouter(ROUTE_KEYWORDS, diseases)
+        keywords = sum(len(names) for names in ROUTE_KEYWORDS.values()) + 3 * size
+        print(f"{size:>9} {keywords:>9} {'chained in':>14} {per_query_ms(chained, queries):>9.4f}")
+        print(f"{size:>9} {keywords:>9} {'aho-corasick':>14} {per_query_ms(router._route, queries):>9.4f}")
+
+
+def bench_outbreak(sizes: List[int], spike_rate: float = 0.01):
+    """Detection pass time vs number of regions, with recall on injected spikes"""
+    from outbreak import OutbreakEngine, SeriesStore, default_detectors
+
+    rng = np.random.default_rng(19)
+    print(f"{'regions':>8} {'detector':>12} {'ms/pass':>9} {'recall':>7} {'false+':>7}")
+    for size in sizes:
+        store = SeriesStore()
+        regions = [f"region{i}" for i in range(size)]
+        base = rng.gamma(2.0, 100.0, size)
+        weekly = 1 + 0.3 * np.sin(2 * np.pi * np.arange(store.capacity) / 7)
+        counts = rng.poisson(base[:, None] * weekly[None, :]).astype(np.float32)
+        spiked = rng.random(size) < spike_rate
+        counts[spiked, -1] = counts[spiked, -1] * 3 + 50
+        for day in range(store.capacity):
+            store.ingest_many(regions, day, counts[:, day])
+
+        series = store.window().astype(np.float64)
+        for detector in default_detectors():
+            started = time.perf_counter()
+            fired = np.nan_to_num(detector.score(series), nan=-np.inf) > detector.threshold
+            ms = (time.perf_counter() - started) * 1000
+            recall = fired[spiked].mean() if spiked.any() else 1.0
+            print(f"{size:>8} {detector.name:>12} {ms:>9.2f} {recall:>7.3f} {fired[~spiked].mean():>7.4f}")
+
+        engine = OutbreakEngine(store)
+        started = time.perf_counter()
+        alerts = engine.detect()
+        ms = (time.perf_counter() - started) * 1000
+        print(f"{size:>8} {'engine':>12} {ms:>9.2f} {'':>7} {'':>7}  ({len(alerts)} alerts)")
+
+
+def bench_coldstart(module: str, runs: int, top: int):
+    """Import time of a module in fresh interpreters, and the packages it spends it on (-X importtime)"""
+    totals = []
+    packages: Dict[str, int] = {}
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+        packages = {}
+        for line in result.stderr.splitlines():
+            fields = line.removeprefix("import time:").split("|")
+            if len(fields) != 3 or not fields[0].strip().isdigit():
+                continue  # log output or the column header
+            self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2].strip()
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + self_us
+            if name == module:
+                totals.append(cumulative_us / 1000)
+
+    print(f"import {module}: median {statistics.median(totals):.0f}ms, min {min(totals):.0f}ms over {runs} runs")
+    print(f"{'package':>24} {'ms':>8} {'share':>6}")
+    total_us = sum(packages.values())
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:>24} {self_us / 1000:>8.1f} {self_us / total_us:>6.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Healthcare chatbot micro-benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    matcher = subparsers.add_parser("matcher", help="symptom matcher latency vs KB size")
+    matcher.add_argument("--sizes", default="4,100,1000,10000")
+    matcher.add_argument("--queries", type=int, default=200)
+
+    hinglish = subparsers.add_parser("hinglish", help="romanised Hindi lexicon latency")
+    hinglish.add_argument("--queries", type=int, default=10000)
+
+    router = subparsers.add_parser("router", help="keyword router latency vs number of diseases")
+    router.add_argument("--sizes", default="4,100,1000")
+    router.add_argument("--queries", type=int, default=2000)
+
+    outbreak = subparsers.add_parser("outbreak", help="outbreak detector pass time vs number of regions")
+    outbreak.add_argument("--regions", default="1000,10000,100000")
+
+    coldstart = subparsers.add_parser("coldstart", help="per-package import time of the app")
+    coldstart.add_argument("--module", default="healthcare_chatbot_sih")
+    coldstart.add_argument("--runs", type=int, default=5)
+    coldstart.add_argument("--top", type=int, default=15)
+
+    args = parser.parse_args()
+    if args.benchmark == "matcher":
+        bench_matcher([int(size) for size in args.sizes.split(",")], args.queries)
+    elif args.benchmark == "hinglish":
+        bench_hinglish(args.queries)
+    elif args.benchmark == "router":
+        bench_router([int(size) for size in args.sizes.split(",")], args.queries)
+    elif args.benchmark == "outbreak":
+        bench_outbreak([int(size) for size in args.regions.split(",")])
+    elif args.benchmark == "coldstart":
+        bench_coldstart(args.module, args.runs, args.top)
@@ -0,0 +1,386 @@
+"""Health-alert broadcasts: subscriber registry and a resumable, throttled fan-out worker"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from outbound import TokenBucket
+from storage import Database
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", 500))      # recipients read per keyset page
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", 50))     # in-flight sends per channel
+# Broadcast share of each channel's sending rate; the rest is left for interactive replies
+BROADCAST_WHATSAPP_RATE = float(os.getenv("BROADCAST_WHATSAPP_RATE", 60))
+BROADCAST_SMS_RATE = float(os.getenv("BROADCAST_SMS_RATE", 1))
+# Workers share the database; the one holding an alert's lease sends it, and a lease not
+# renewed for this long (a crashed owner) is taken over by another worker
+BROADCAST_LEASE_SECONDS = float(os.getenv("BROADCAST_LEASE_SECONDS", 60))
+
+CHANNELS = ("whatsapp", "sms")
+NATIONWIDE = ("india", "all")  # alert locations that go to every subscriber
+
+# send(channel, phone, body) delivers one message or raises
+SendFn = Callable[[str, str, str], Awaitable[object]]
+
+
+def create_broadcast_schema(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS subscribers (
+            id INTEGER PRIMARY KEY,
+            phone TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            location TEXT NOT NULL,
+            language TEXT NOT NULL,
+            active INTEGER NOT NULL DEFAULT 1,
+            created_at DATETIME,
+            UNIQUE (channel, phone)
+        )
+    ''')
+    # Keyset fan-out reads (channel, [location, [language,]] id > ?) in id order from one of these
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_subscribers_audience
+        ON subscribers (channel, location, language, id) WHERE active = 1
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_subscribers_location
+        ON subscribers (channel, location, id) WHERE active = 1
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_subscribers_channel ON subscribers (channel, id) WHERE active = 1')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            alert_id INTEGER PRIMARY KEY,
+            location TEXT NOT NULL,
+            language TEXT,
+            status TEXT NOT NULL,
+            created_at DATETIME,
+            finished_at DATETIME,
+            owner TEXT,
+            lease_until REAL
+        )
+    ''')
+    if "owner" not in {row[1] for row in conn.execute('PRAGMA table_info(broadcasts)')}:
+        conn.execute('ALTER TABLE broadcasts ADD COLUMN owner TEXT')
+        conn.execute('ALTER TABLE broadcasts ADD COLUMN lease_until REAL')
+    # One checkpoint per channel: every subscriber up to last_subscriber_id has been handled
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS broadcast_progress (
+            alert_id INTEGER NOT NULL,
+            channel TEXT NOT NULL,
+            last_subscriber_id INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            updated_at DATETIME,
+            PRIMARY KEY (alert_id, channel)
+        ) WITHOUT ROWID
+    ''')
+
+
+def normalize_location(location: str) -> str:
+    return " ".join(location.lower().split())
+
+
+def subscribe(conn: sqlite3.Connection, phone: str, channel: str, location: str, language: str) -> int:
+    """Register (or re-activate and move) a subscriber; returns its id"""
+    return conn.execute('''
+        INSERT INTO subscribers (phone, channel, location, language, active, created_at)
+        VALUES (?, ?, ?, ?, 1, datetime('now'))
+        ON CONFLICT (channel, phone) DO UPDATE SET
+            location = excluded.location, language = excluded.language, active = 1
+        RETURNING id
+    ''', (phone, channel, normalize_location(location), language)).fetchone()[0]
+
+
+def unsubscribe(conn: sqlite3.Connection, phone: str, channel: str) -> bool:
+    return conn.execute(
+        'UPDATE subscribers SET active = 0 WHERE channel = ? AND phone = ? AND active = 1', (channel, phone)
+    ).rowcount > 0
+
+
+def recipients_page(conn: sqlite3.Connection, channel: str, location: str, language: Optional[str],
+                    after_id: int, limit: int) -> List[sqlite3.Row]:
+    """Next page of active subscribers after `after_id` (keyset pagination, never OFFSET)"""
+    sql = 'SELECT id, phone FROM subscribers WHERE channel = ? AND active = 1 AND id > ?'
+    params: list = [channel, after_id]
+    if location not in NATIONWIDE:
+        sql += ' AND location = ?'
+        params.append(location)
+    if language:
+        sql += ' AND language = ?'
+        params.append(language)
+    return conn.execute(sql + ' ORDER BY id LIMIT ?', (*params, limit)).fetchall()
+
+
+def claim_broadcast(conn: sqlite3.Connection, alert_id: int, owner: str, lease_seconds: float) -> bool:
+    """Take or renew an unfinished alert's lease; one conditional UPDATE, so only one owner wins"""
+    now = time.time()
+    return conn.execute('''
+        UPDATE broadcasts SET owner = ?, lease_until = ?, status = 'running'
+        WHERE alert_id = ? AND status != 'done' AND (owner IS NULL OR owner = ? OR lease_until < ?)
+    ''', (owner, now + lease_seconds, alert_id, owner, now)).rowcount > 0
+
+
+def release_broadcast(conn: sqlite3.Connection, alert_id: int, owner: str):
+    conn.execute('UPDATE broadcasts SET owner = NULL, lease_until = NULL WHERE alert_id = ? AND owner = ?',
+                 (alert_id, owner))
+
+
+def record_progress(conn: sqlite3.Connection, alert_id: int, channel: str, last_id: int, sent: int, failed: int):
+    """Advance a channel checkpoint and the alert's sent_count in the same transaction"""
+    conn.execute('''
+        UPDATE broadcast_progress
+        SET last_subscriber_id = ?, sent = sent + ?, failed = failed + ?, updated_at = datetime('now')
+        WHERE alert_id = ? AND channel = ?
+    ''', (last_id, sent, failed, alert_id, channel))
+    conn.execute('UPDATE health_alerts SET sent_count = sent_count + ? WHERE id = ?', (sent, alert_id))
+
+
+class _Page:
+    """Delivery state of one page of recipients"""
+
+    __slots__ = ("last_id", "pending", "sent", "failed")
+
+    def __init__(self, last_id: int, pending: int):
+        self.last_id = last_id
+        self.pending = pending
+        self.sent = 0
+        self.failed = 0
+
+
+class BroadcastEngine:
+    """Fans alerts out to subscribers, one broadcast at a time.
+
+    Each channel is streamed separately: recipients are read in keyset pages into a
+    bounded queue drained by `concurrency` workers behind the channel's token bucket,
+    so memory stays at a few pages however large the audience. A page's checkpoint
+    and sent_count are committed once it and every earlier page are done; after a
+    crash the broadcast resumes from the checkpoint, so delivery is at-least-once
+    (recipients of the unfinished pages may get the alert twice).
+
+    Every worker process runs an engine against the same database. An alert is
+    only sent by the engine holding its lease (claim_broadcast), renewed while it
+    runs; idle engines rescan for alerts whose owner stopped renewing.
+    """
+
+    def __init__(self, db: Database, send: SendFn, enabled: bool = True, chunk_size: int = BROADCAST_CHUNK_SIZE,
+                 concurrency: int = BROADCAST_CONCURRENCY, rates: Optional[Dict[str, float]] = None,
+                 lease_seconds: float = BROADCAST_LEASE_SECONDS):
+        self.db = db
+        self.send = send
+        self.enabled = enabled
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.owner: Optional[str] = None  # set per process by start()
+        rates = rates or {"whatsapp": BROADCAST_WHATSAPP_RATE, "sms": BROADCAST_SMS_RATE}
+        self._buckets = {channel: TokenBucket(rates[channel]) for channel in CHANNELS}
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[int] = set()  # alert ids waiting or running in this process
+        self._task: Optional[asyncio.Task] = None
+        self.current: Optional[int] = None
+
+        self.completed = 0
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0  # alerts another process held the lease on
+
+    async def submit(self, alert_id: int, location: str, language: Optional[str] = None):
+        """Record a broadcast for an existing health_alerts row and queue it"""
+        location = normalize_location(location)
+
+        def create(conn: sqlite3.Connection):
+            conn.execute('''
+                INSERT OR IGNORE INTO broadcasts (alert_id, location, language, status, created_at)
+                VALUES (?, ?, ?, 'pending', datetime('now'))
+            ''', (alert_id, location, language))
+            conn.executemany('INSERT OR IGNORE INTO broadcast_progress (alert_id, channel) VALUES (?, ?)',
+                             [(alert_id, channel) for channel in CHANNELS])
+
+        await self.db.run_write(create)
+        self._enqueue(alert_id)
+
+    def _enqueue(self, alert_id: int):
+        if self._queue is not None and alert_id not in self._queued:
+            self._queued.add(alert_id)
+            self._queue.put_nowait(alert_id)
+
+    async def broadcast(self, alert_id: int):
+        """Deliver one alert on every channel, resuming from its checkpoints, if this process wins its lease"""
+        if not await self.db.run_write(lambda conn: claim_broadcast(conn, alert_id, self.owner, self.lease_seconds)):
+            self.skipped += 1  # finished, or another worker is sending it
+            return
+        alert = await self.db.fetchone('''
+            SELECT b.location, b.language, a.message FROM broadcasts b
+            JOIN health_alerts a ON a.id = b.alert_id
+            WHERE b.alert_id = ?
+        ''', (alert_id,))
+        if alert is None:
+            await self.db.run_write(lambda conn: release_broadcast(conn, alert_id, self.owner))
+            return
+        progress = await self.db.fetchall(
+            'SELECT channel, last_subscriber_id FROM broadcast_progress WHERE alert_id = ?', (alert_id,)
+        )
+
+        self.current = alert_id
+        started = time.monotonic()
+        lease = asyncio.create_task(self._hold_lease(alert_id))
+        fan_out = asyncio.gather(*(
+            self._fan_out(alert_id, row["channel"], row["last_subscriber_id"], alert) for row in progress
+        ))
+        finished = False
+        try:
+            await asyncio.wait({lease, fan_out}, return_when=asyncio.FIRST_COMPLETED)
+            if not fan_out.done():
+                logger.warning(f"Lost the lease on alert {alert_id}; leaving it to its new owner")
+                return
+            fan_out.result()
+            await self.db.run_write(lambda conn: conn.execute('''
+                UPDATE broadcasts SET status = 'done', finished_at = datetime('now'), owner = NULL, lease_until = NULL
+                WHERE alert_id = ? AND owner = ?
+            ''', (alert_id, self.owner)))
+            finished = True
+        finally:
+            self.current = None
+            lease.cancel()
+            fan_out.cancel()
+            await asyncio.gather(lease, fan_out, return_exceptions=True)
+            if not finished:
+                # Stopped or failed: free the alert for the next start or another worker at once
+                await self.db.run_write(lambda conn: release_broadcast(conn, alert_id, self.owner))
+        self.completed += 1
+        logger.info(f"Broadcast of alert {alert_id} finished in {time.monotonic() - started:.1f}s")
+
+    async def _hold_lease(self, alert_id: int):
+        """Renew the lease while the broadcast runs; returns only once another process has taken it"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self.db.run_write(
+                    lambda conn: claim_broadcast(conn, alert_id, self.owner, self.lease_seconds)
+                ):
+                    return
+            except Exception as e:
+                logger.error(f"Broadcast lease renewal for alert {alert_id} failed: {e}")
+
+    async def _fan_out(self, alert_id: int, channel: str, after_id: int, alert: sqlite3.Row):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.chunk_size * 2)
+        pages: Deque[_Page] = deque()
+        workers = [asyncio.create_task(self._worker(channel, alert["message"], queue)) for _ in range(self.concurrency)]
+        try:
+            while True:
+                rows = await self.db.run_read(lambda conn: recipients_page(
+                    conn, channel, alert["location"], alert["language"], after_id, self.chunk_size
+                ))
+                if not rows:
+                    break
+                page = _Page(rows[-1]["id"], len(rows))
+                pages.append(page)
+                for row in rows:
+                    await queue.put((page, row["phone"]))
+                after_id = page.last_id
+                await self._checkpoint(alert_id, channel, pages)
+            await queue.join()
+            await self._checkpoint(alert_id, channel, pages)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _worker(self, channel: str, body: str, queue: asyncio.Queue):
+        bucket = self._buckets[channel]
+        while True:
+            page, phone = await queue.get()
+            try:
+                await bucket.acquire()
+                await self.send(channel, phone, body)
+                page.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                page.failed += 1
+                logger.warning(f"Broadcast to {channel}:{phone} failed: {e}")
+            finally:
+                page.pending -= 1
+                queue.task_done()
+
+    async def _checkpoint(self, alert_id: int, channel: str, pages: Deque[_Page]):
+        """Commit the finished prefix of pages as one checkpoint and sent_count update"""
+        last_id = sent = failed = 0
+        while pages and pages[0].pending == 0:
+            page = pages.popleft()
+            last_id, sent, failed = page.last_id, sent + page.sent, failed + page.failed
+        if last_id:
+            await self.db.run_write(lambda conn: record_progress(conn, alert_id, channel, last_id, sent, failed))
+            self.sent += sent
+            self.failed += failed
+
+    async def _resume(self) -> int:
+        """Queue unfinished broadcasts that no live process holds the lease on"""
+        rows = await self.db.fetchall('''
+            SELECT alert_id FROM broadcasts
+            WHERE status != 'done' AND (owner IS NULL OR lease_until < ?) ORDER BY alert_id
+        ''', (time.time(),))
+        for row in rows:
+            self._enqueue(row["alert_id"])
+        return len(rows)
+
+    async def _run(self):
+        while True:
+            try:
+                alert_id = await asyncio.wait_for(self._queue.get(), timeout=self.lease_seconds)
+            except asyncio.TimeoutError:
+                try:
+                    await self._resume()  # take over alerts whose owner stopped renewing
+                except Exception as e:
+                    logger.error(f"Broadcast rescan failed: {e}")
+                continue
+            try:
+                await self.broadcast(alert_id)
+            except Exception as e:
+                logger.error(f"Broadcast of alert {alert_id} failed: {e}")
+            finally:
+                self._queued.discard(alert_id)
+
+    async def start(self):
+        """Start the worker and resume broadcasts left unfinished by a previous process"""
+        if self._task is not None or not self.enabled:
+            return
+        self._queue = asyncio.Queue()
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        unfinished = await self._resume()
+        if unfinished:
+            logger.info(f"Resuming {unfinished} unfinished broadcasts")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop broadcasting; the checkpoints let the next start resume where this one stopped"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "current_alert": self.current,
+            "queued": len(self._queued),
+            "owner": self.owner,
+            "lease_seconds": self.lease_seconds,
+            "completed": self.completed,
+            "skipped": self.skipped,
+            "sent": self.sent,
+            "failed": self.failed,
+            "chunk_size": self.chunk_size,
+            "concurrency_per_channel": self.concurrency,
+            "rates": {channel: bucket.rate for channel, bucket in self._buckets.items()}
+        }
@@ -0,0 +1,177 @@
+"""Pre-fitted TF-IDF symptom matcher.
+
+The knowledge base's TF-IDF model is fitted with scikit-learn once and saved as
+its vocabulary, idf weights, stop words and the disease x term CSR matrix. The
+app loads that artifact when it matches the knowledge base, so a cold start
+never imports scikit-learn; otherwise it fits in-process. Build it with:
+
+    python fitted_matcher.py
+"""
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MATCHER_PATH = os.getenv("MATCHER_ARTIFACT_PATH", "symptom_matcher.npz")
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")  # scikit-learn's default token_pattern
+NGRAM_RANGE = (1, 2)
+
+# disease -> language -> {"symptoms": [...], ...}, as in HealthKnowledgeBase.symptoms_db
+SymptomsDB = Mapping[str, Mapping[str, Mapping]]
+
+
+class FittedVectorizer:
+    """transform() of a fitted TfidfVectorizer(stop_words='english', ngram_range=(1, 2)),
+    reproduced with numpy/scipy: lowercase, drop stop words, count n-grams, scale by
+    idf and L2-normalise each row"""
+
+    def __init__(self, vocabulary: Dict[str, int], idf: np.ndarray, stop_words: Iterable[str]):
+        self.vocabulary_ = vocabulary
+        self.idf_ = idf
+        self.stop_words = frozenset(stop_words)
+
+    def _terms(self, doc: str) -> List[str]:
+        tokens = [token for token in TOKEN_PATTERN.findall(doc.lower()) if token not in self.stop_words]
+        terms = []
+        for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def transform(self, docs: Iterable[str]) -> sparse.csr_matrix:
+        data: List[float] = []
+        indices: List[int] = []
+        indptr = [0]
+        for doc in docs:
+            counts: Dict[int, int] = {}
+            for term in self._terms(doc):
+                column = self.vocabulary_.get(term)
+                if column is not None:
+                    counts[column] = counts.get(column, 0) + 1
+            for column in sorted(counts):
+                indices.append(column)
+                data.append(counts[column] * self.idf_[column])
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix((np.asarray(data, dtype=np.float64), indices, indptr),
+                                   shape=(len(indptr) - 1, len(self.idf_)))
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+        return matrix
+
+
+@dataclass
+class FittedMatcher:
+    vectorizer: FittedVectorizer
+    diseases: List[str]
+    disease_matrix: sparse.csr_matrix  # disease x term: sum of each disease's symptom rows
+    fingerprint: str
+
+
+def fingerprint(symptoms_db: SymptomsDB) -> str:
+    """Stable hash of every symptom phrase, used to detect stale artifacts"""
+    digest = hashlib.sha256()
+    for disease, lang_data in symptoms_db.items():
+        for lang, data in lang_data.items():
+            for symptom in data.get("symptoms", []):
+                digest.update(f"{disease}\0{lang}\0{symptom}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def fit_matcher(symptoms_db: SymptomsDB) -> FittedMatcher:
+    """Fit TF-IDF over the symptom phrases (imports scikit-learn)"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    all_symptoms = []
+    symptom_labels = []
+    for disease, lang_data in symptoms_db.items():
+        for lang, data in lang_data.items():
+            symptoms = data.get("symptoms", [])
+            all_symptoms.extend(symptoms)
+            symptom_labels.extend([disease] * len(symptoms))
+
+    fitted = TfidfVectorizer(stop_words='english', ngram_range=NGRAM_RANGE).fit(all_symptoms)
+    vectorizer = FittedVectorizer(
+        {term: int(column) for term, column in fitted.vocabulary_.items()}, fitted.idf_, fitted.get_stop_words()
+    )
+    tfidf_matrix = vectorizer.transform(all_symptoms)
+
+    # Disease x term matrix: vectorized group-by sum of each disease's symptom rows,
+    # so a query is scored against all of a disease's symptoms at once
+    diseases = list(symptoms_db)
+    disease_ids = {disease: i for i, disease in enumerate(diseases)}
+    rows = np.array([disease_ids[label] for label in symptom_labels])
+    grouping = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, np.arange(len(rows)))),
+        shape=(len(diseases), len(rows))
+    )
+    return FittedMatcher(vectorizer, diseases, (grouping @ tfidf_matrix).tocsr(), fingerprint(symptoms_db))
+
+
+def save_matcher(matcher: FittedMatcher, path: str = MATCHER_PATH):
+    vocabulary = matcher.vectorizer.vocabulary_
+    terms = np.empty(len(vocabulary), dtype=object)
+    for term, column in vocabulary.items():
+        terms[column] = term
+    matrix = matcher.disease_matrix
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(
+        tmp_path,
+        terms=terms.astype(str),
+        idf=matcher.vectorizer.idf_,
+        stop_words=np.array(sorted(matcher.vectorizer.stop_words)),
+        diseases=np.array(matcher.diseases),
+        data=matrix.data, indices=matrix.indices, indptr=matrix.indptr, shape=np.array(matrix.shape),
+        fingerprint=np.array(matcher.fingerprint)
+    )
+    os.replace(tmp_path, path)
+
+
+def load_matcher(path: str = MATCHER_PATH) -> FittedMatcher:
+    with np.load(path, allow_pickle=False) as saved:
+        vectorizer = FittedVectorizer(
+            {str(term): column for column, term in enumerate(saved["terms"])}, saved["idf"], saved["stop_words"].tolist()
+        )
+        matrix = sparse.csr_matrix((saved["data"], saved["indices"], saved["indptr"]), shape=tuple(saved["shape"]))
+        return FittedMatcher(vectorizer, saved["diseases"].tolist(), matrix, str(saved["fingerprint"]))
+
+
+def load_or_fit(symptoms_db: SymptomsDB, path: str = MATCHER_PATH) -> FittedMatcher:
+    """Load the saved matcher if it matches the knowledge base, else fit one in-process"""
+    current = fingerprint(symptoms_db)
+    if path and os.path.exists(path):
+        try:
+            matcher = load_matcher(path)
+            if matcher.fingerprint == current:
+                logger.info(f"Loaded pre-fitted matcher ({len(matcher.vectorizer.vocabulary_)} terms) from {path}")
+                return matcher
+            logger.warning(f"Matcher artifact {path} is stale; run `python fitted_matcher.py` to rebuild")
+        except Exception as e:
+            logger.error(f"Matcher artifact load error: {e}")
+
+    matcher = fit_matcher(symptoms_db)
+    logger.info(f"Fitted TF-IDF matcher in-process ({len(matcher.vectorizer.vocabulary_)} terms)")
+    return matcher
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fit and save the TF-IDF symptom matcher")
+    parser.add_argument("--output", default=MATCHER_PATH)
+    args = parser.parse_args()
+
+    from healthcare_chatbot_sih import HealthKnowledgeBase
+
+    built = fit_matcher(HealthKnowledgeBase().symptoms_db)
+    save_matcher(built, args.output)
+    print(f"Wrote {args.output}: {len(built.diseases)} diseases, {len(built.vectorizer.vocabulary_)} terms")
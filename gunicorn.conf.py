@@ -0,0 +1,40 @@
+"""Gunicorn settings for the healthcare chatbot.
+
+    gunicorn -c gunicorn.conf.py healthcare_chatbot_sih:app
+
+The app is imported once in the master; the fitted knowledge base and response
+catalog are built there and inherited copy-on-write by every forked worker.
+Database pools, HTTP sessions and the translator are per-worker and are only
+opened in each worker's lifespan.
+
+Every worker runs the same background jobs. State that must agree across workers
+lives in the shared SQLite database:
+
+- conversation sessions are written through on every turn (session_store);
+- top-query counts are merged into top_query_counts on each flush (heavy_hitters);
+- interaction retention runs under a job_leases row and each alert broadcast under
+  a lease on its broadcasts row, so one worker archives or sends at a time;
+- outbreak alerts are claimed in outbreak_alerts, so each is raised once;
+- interaction ID nodes are claimed per process in interaction_id_nodes.
+
+The rest stays per worker by design and only costs duplicate work: the data API
+stats cache (each worker fetches and refreshes its own entries; snapshot saves
+use per-process temp files), the region poller and outbreak series, the health
+probe's dependency checks, the query cache, the translation memory tier (its
+SQLite tier is shared) and the last-interaction index (feedback also checks the
+database). /stats and /health therefore describe the worker that answered.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))  # lifespan shutdown drains within this
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded import and before the first fork
+    from healthcare_chatbot_sih import resources
+
+    resources.preload()
@@ -0,0 +1,111 @@
+"""Background dependency probing so health endpoints never touch a dependency"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", 30))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", 5))
+
+
+class HealthProbe:
+    """Runs registered dependency checks on its own schedule and keeps the latest
+    results as a ready-made snapshot.
+
+    A check is an async callable returning a dict of details (or None); raising or
+    timing out marks the dependency as "error". Critical checks decide readiness;
+    the others only degrade the reported status.
+    """
+
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL, timeout: float = HEALTH_PROBE_TIMEOUT):
+        self.interval = interval
+        self.timeout = timeout
+        self._checks: Dict[str, Callable[[], Awaitable[Optional[Dict]]]] = {}
+        self._critical: Dict[str, bool] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.rounds = 0
+        self.last_round_ms = 0.0
+        self.snapshot: Dict[str, Any] = {"status": "starting", "checked_at": None, "dependencies": {}}
+
+    def register(self, name: str, check: Callable[[], Awaitable[Optional[Dict]]], critical: bool = True):
+        self._checks[name] = check
+        self._critical[name] = critical
+
+    async def _run_check(self, name: str):
+        started = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(self._checks[name](), self.timeout)
+            result = {"status": "operational", **(details or {})}
+        except asyncio.TimeoutError:
+            result = {"status": "error", "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["checked_at"] = datetime.now()
+        self._results[name] = result
+
+    async def probe_once(self):
+        """Run every check concurrently and publish a new snapshot"""
+        started = time.perf_counter()
+        await asyncio.gather(*(self._run_check(name) for name in self._checks))
+        self.rounds += 1
+        self.last_round_ms = (time.perf_counter() - started) * 1000
+
+        failing = [name for name, result in self._results.items() if result["status"] != "operational"]
+        if any(self._critical[name] for name in failing):
+            status = "unhealthy"
+        elif failing:
+            status = "degraded"
+        else:
+            status = "healthy"
+        # Replaced wholesale so readers never see a half-updated snapshot
+        self.snapshot = {
+            "status": status,
+            "checked_at": datetime.now(),
+            "dependencies": dict(self._results)
+        }
+
+    @property
+    def ready(self) -> bool:
+        """True once a probe round has passed every critical check"""
+        dependencies = self.snapshot["dependencies"]
+        return bool(dependencies) and all(
+            dependencies[name]["status"] == "operational"
+            for name, critical in self._critical.items() if critical
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.error(f"Health probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "interval_seconds": self.interval,
+            "timeout_seconds": self.timeout,
+            "checks": {name: "critical" if critical else "optional" for name, critical in self._critical.items()},
+            "rounds": self.rounds,
+            "last_round_ms": round(self.last_round_ms, 2)
+        }
@@ -1,24 +1,41 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-import requests
 import json
-from twilio.rest import Client
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import os
 from datetime import datetime, timedelta
 import asyncio
 import logging
-from googletrans import Translator
+import time
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-import sqlite3
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
 import re
-from dataclasses import dataclass
-import aiohttp
+from dataclasses import dataclass, replace
 import hashlib
+from storage import Database, DB_PATH, create_lease_schema
+from interaction_logger import InteractionLogger, InteractionRecord
+from outbound import TwilioSender, TWILIO_ASYNC_REPLY
+from translation_cache import TranslationCache, create_translation_schema
+from response_catalog import load_or_compile, CATALOG_PATH
+from symptom_index import CoverageIndex, calibrate
+from fitted_matcher import load_or_fit
+from micro_batch import MicroBatcher
+from query_cache import QueryCache, normalize_query
+from http_client import SharedHTTPClient
+from stats_cache import StatsCache
+from health_probe import HealthProbe
+from analytics_rollup import create_rollup_schema, update_rollups, interaction_summary, accuracy_summary
+from interaction_store import InteractionStore, RetentionJob, InteractionIds, LastInteractionIndex
+from session_store import SessionStore, create_session_schema
+from heavy_hitters import TopQueryTracker, create_top_queries_schema
+from script_analysis import detect_language, contains_script, in_language_script
+from hinglish import HinglishLexicon
+from keyword_router import KeywordRouter
+from broadcast import BroadcastEngine, CHANNELS, create_broadcast_schema, subscribe, unsubscribe
+from outbreak import SeriesStore, OutbreakEngine, OutbreakMonitor, OutbreakAlert, create_outbreak_schema, today_period
+from region_poller import RegionPoller, COVID_DATA_API, load_regions
+from resources import ResourceContainer
 
 load_dotenv()
 
@@ -26,10 +43,24 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Heavy resources (fitted knowledge base, catalog, translator) are built once per process
+# and injected; background tasks spawned here are cancelled and drained on shutdown
+resources = ResourceContainer()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup_event()
+    try:
+        yield
+    finally:
+        await resources.drain()
+        await shutdown_event()
+
 app = FastAPI(
     title="AI Healthcare Chatbot - Smart India Hackathon",
     description="Multilingual AI chatbot for rural healthcare awareness",
-    version="2.0"
+    version="2.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for web integration
@@ -48,17 +79,49 @@ TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_SANDBOX")
 
 
 # Initialize services
-client = Client(TWILIO_SID, TWILIO_TOKEN) if TWILIO_SID and TWILIO_TOKEN else None
-translator = Translator()
+sender = TwilioSender(TWILIO_SID, TWILIO_TOKEN)
+http = SharedHTTPClient()  # every GOV_HEALTH_APIS call goes through this pooled session
+def create_translator():
+    from googletrans import Translator  # only needed once a reply actually needs translating
+    return Translator()
+
+translator = resources.register("translator", create_translator, eager=False)
+db = Database(DB_PATH)
+interaction_store = InteractionStore()
+interaction_ids = InteractionIds()
+last_interactions = LastInteractionIndex()  # session -> latest interaction ID, for feedback
+
+def write_interaction_batch(conn, records: List[InteractionRecord]):
+    """Logger writer: partitioned rows and hourly rollups commit (or roll back) together"""
+    interaction_store.insert(conn, records)
+    update_rollups(conn, records)
+
+interaction_logger = InteractionLogger(db, write_interaction_batch)
+retention_job = RetentionJob(db, interaction_store)
+
+def google_translate(text: str, dest: str):
+    """Upstream translation call (googletrans 3.x blocks, 4.x returns a coroutine)"""
+    return translator().translate(text, dest=dest)
+
+translation_cache = TranslationCache(db, google_translate)
 
 # Government Health API endpoints (Mock - replace with actual government APIs)
 GOV_HEALTH_APIS = {
-    "covid_data": "https://disease.sh/v3/covid-19",
+    "covid_data": COVID_DATA_API,
     "vaccination_centers": "https://cdn-api.co-vin.in/api/v2/appointment/sessions/public/",
     "health_advisories": "https://www.mohfw.gov.in/",
     "emergency_contacts": "https://www.nhp.gov.in/"
 }
 
+async def fetch_country_stats(location: str) -> Dict:
+    """Upstream disease.sh lookup for one country"""
+    async with http.session.get(f"{GOV_HEALTH_APIS['covid_data']}/countries/{location}") as resp:
+        resp.raise_for_status()
+        return await resp.json()
+
+# Upstream figures change a few times a day; serve them stale-while-revalidate
+country_stats = StatsCache(fetch_country_stats)
+
 # Enhanced knowledge base with accuracy improvements
 @dataclass
 class HealthResponse:
@@ -66,6 +129,10 @@ class HealthResponse:
     confidence: float
     language: str
     source: str
+    catalog_key: Optional[Tuple[str, str]] = None  # (intent, disease) in the response catalog
+    interaction_id: Optional[int] = None  # logged interaction this reply belongs to
+    topic: Optional[Tuple[str, str]] = None  # (intent, disease/location) when not given by catalog_key
+    ranking: Optional[List[Tuple[str, float, float]]] = None  # matcher's top-k (disease, coverage, probability)
 
 class HealthKnowledgeBase:
     def __init__(self):
@@ -225,56 +292,79 @@ class HealthKnowledgeBase:
     
     def setup_tfidf(self):
         """Setup TF-IDF vectorizer for improved query matching"""
-        all_symptoms = []
-        self.symptom_labels = []
+        # Saved by `python fitted_matcher.py`; fitted here (importing scikit-learn) when missing or stale
+        matcher = load_or_fit(self.symptoms_db)
+        self.vectorizer = matcher.vectorizer
+        self.diseases = matcher.diseases
+        self.disease_matrix = matcher.disease_matrix  # disease x term profiles
         
-        for disease, lang_data in self.symptoms_db.items():
-            for lang, data in lang_data.items():
-                symptoms = data.get("symptoms", [])
-                all_symptoms.extend(symptoms)
-                self.symptom_labels.extend([disease] * len(symptoms))
-        
-        self.vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1,2))
-        self.tfidf_matrix = self.vectorizer.fit_transform(all_symptoms)
+        # Scores how much of a query each disease's symptom terms cover (exact or inverted
+        # search, see symptom_index), so one fully matched symptom still scores 1.0
+        self.index = CoverageIndex(self.disease_matrix)
+    
+    def rank_batch(self, queries: List[str], k: int = 3, threshold: float = 0.3) -> List[List[Tuple[str, float, float]]]:
+        """Ranked top-k (disease, coverage, probability) per query in one pass"""
+        indices, scores = self.index.search(self.vectorizer.transform([query.lower() for query in queries]), k)
+        probabilities = calibrate(indices, scores, threshold)
+        return [
+            [(self.diseases[idx], float(score), float(prob)) for idx, score, prob in zip(row_idx, row_scores, row_probs) if idx >= 0]
+            for row_idx, row_scores, row_probs in zip(indices, scores, probabilities)
+        ]
+    
+    def rank_diseases(self, query: str, k: int = 3) -> List[Tuple[str, float, float]]:
+        """Ranked top-k (disease, coverage, probability) for a query"""
+        return self.rank_batch([query], k)[0]
+    
+    def mentions_symptoms(self, query: str) -> bool:
+        """Whether the query contains any known symptom term (tokenizing only, no index search)"""
+        return self.vectorizer.transform([query.lower()]).nnz > 0
     
     def find_best_match(self, query: str, threshold: float = 0.3) -> HealthResponse:
         """Find best matching disease based on symptoms with confidence scoring"""
         try:
-            query_vector = self.vectorizer.transform([query.lower()])
-            similarities = cosine_similarity(query_vector, self.tfidf_matrix)[0]
-            
-            if len(similarities) > 0:
-                best_match_idx = np.argmax(similarities)
-                confidence = similarities[best_match_idx]
-                
-                if confidence > threshold:
-                    disease = self.symptom_labels[best_match_idx]
-                    lang = 'hindi' if any(char in query for char in ['ा', 'ी', 'े', 'ो', 'ं', 'ँ']) else 'english'
-                    
-                    response_data = self.symptoms_db[disease][lang if lang in self.symptoms_db[disease] else 'english']
-                    
-                    return HealthResponse(
-                        content=response_data["response"],
-                        confidence=confidence,
-                        language=lang,
-                        source="knowledge_base"
-                    )
-            
-            # Default response with helpful suggestions
-            return HealthResponse(
-                content=self.get_default_response(),
-                confidence=0.1,
-                language='english',
-                source="default"
-            )
+            return self.response_for_match(query, self.rank_diseases(query), threshold)
         except Exception as e:
             logger.error(f"Error in find_best_match: {e}")
+            return self.error_response()
+    
+    def response_for_match(self, query: str, ranking: List[Tuple[str, float, float]], threshold: float = 0.3) -> HealthResponse:
+        """Turn a rank_batch row into a response for its best disease"""
+        # Coverage alone is 1.0 for every disease listing a one-symptom query; weighting it by
+        # the calibrated probability splits ties ("fever") and discounts partial matches
+        confidence = ranking[0][1] * ranking[0][2] if ranking else 0.0
+        if confidence > threshold:
+            disease = ranking[0][0]
+            lang = 'hindi' if contains_script(query, 'devanagari') else 'english'
+            
+            response_data = self.symptoms_db[disease][lang if lang in self.symptoms_db[disease] else 'english']
+            
             return HealthResponse(
-                content=self.get_default_response(),
-                confidence=0.1,
-                language='english',
-                source="error"
+                content=response_data["response"],
+                confidence=confidence,
+                language=lang,
+                source="knowledge_base",
+                catalog_key=("symptoms", disease) if lang == 'english' else None,
+                topic=("symptoms", disease),
+                ranking=ranking
             )
+        
+        # Default response with helpful suggestions
+        return HealthResponse(
+            content=self.get_default_response(),
+            confidence=0.1,
+            language='english',
+            source="default",
+            catalog_key=("default", ""),
+            ranking=ranking or None
+        )
+    
+    def error_response(self) -> HealthResponse:
+        return HealthResponse(
+            content=self.get_default_response(),
+            confidence=0.1,
+            language='english',
+            source="error"
+        )
     
     def get_default_response(self) -> str:
         return """🏥 AI स्वास्थ्य सहायक - AI Health Assistant
@@ -305,30 +395,52 @@ class HealthKnowledgeBase:
 
 ❓ मुझसे कुछ भी पूछें! Ask me anything!"""
 
-# Initialize knowledge base
-knowledge_base = HealthKnowledgeBase()
+# Knowledge base, fitted on first use (or in the gunicorn master, see gunicorn.conf.py)
+knowledge_base = resources.register("knowledge_base", HealthKnowledgeBase, fork_safe=True)
+
+# Processed replies for repeated queries
+query_cache = QueryCache()
+query_tracker = TopQueryTracker(db)
+
+# Per-conversation state (last intent, disease, location) for follow-up messages, shared by
+# every worker through SQLite
+sessions = SessionStore(db)
+
+# Romanised Hindi terms ("bukhar", "kaise bachen") mapped to routes, diseases and English symptoms
+hinglish = HinglishLexicon()
+
+# Concurrent matcher calls are transformed and scored together
+symptom_matcher = MicroBatcher(lambda queries: knowledge_base().rank_batch(queries), name="symptom-matcher")
+
+async def find_best_match_batched(query: str, threshold: float = 0.3) -> HealthResponse:
+    """find_best_match through the micro-batching queue"""
+    try:
+        ranking = await symptom_matcher.submit(query)
+        return knowledge_base().response_for_match(query, ranking, threshold)
+    except Exception as e:
+        logger.error(f"Error in find_best_match: {e}")
+        return knowledge_base().error_response()
+
+# Health-alert fan-out to registered subscribers
+async def send_broadcast_message(channel: str, phone: str, body: str):
+    if channel == "whatsapp":
+        return await sender.send(TWILIO_WHATSAPP_NUMBER, f"whatsapp:{phone}", body)
+    return await sender.send(TWILIO_WHATSAPP_NUMBER.replace('whatsapp:', ''), phone, truncate_for_sms(body))
+
+broadcaster = BroadcastEngine(db, send_broadcast_message, enabled=sender.configured)
 
 # Database for user interactions and analytics
 def init_database():
     """Initialize SQLite database for analytics"""
-    conn = sqlite3.connect('health_chatbot.db')
+    db.write_sync(create_schema)
+    db.write_sync(interaction_ids.claim)  # an ID node no other process on this database holds
+
+COUNTED_TABLES = ("health_alerts",)  # interaction partitions maintain their own counter
+
+def create_schema(conn):
+    """Create analytics tables on the writer connection"""
     cursor = conn.cursor()
     
-    # User interactions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_interactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT,
-            query TEXT,
-            response TEXT,
-            confidence REAL,
-            timestamp DATETIME,
-            language TEXT,
-            source TEXT,
-            feedback INTEGER DEFAULT 0
-        )
-    ''')
-    
     # Health alerts table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS health_alerts (
@@ -342,11 +454,55 @@ def init_database():
         )
     ''')
     
-    conn.commit()
-    conn.close()
-
-# Initialize database
-init_database()
+    # Row counters kept current by triggers, so health checks never scan a table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_row_counts (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL
+        )
+    ''')
+    for table in COUNTED_TABLES:
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE table_row_counts SET row_count = row_count + 1 WHERE table_name = '{table}';
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_delete AFTER DELETE ON {table}
+            BEGIN
+                UPDATE table_row_counts SET row_count = row_count - 1 WHERE table_name = '{table}';
+            END
+        ''')
+        # Seeded once from a full count; the triggers keep it exact from then on
+        if cursor.execute('SELECT 1 FROM table_row_counts WHERE table_name = ?', (table,)).fetchone() is None:
+            cursor.execute(f'''
+                INSERT INTO table_row_counts (table_name, row_count) SELECT ?, COUNT(*) FROM {table}
+            ''', (table,))
+    
+    # Month-partitioned interactions, the reply dictionary and the user_interactions view
+    interaction_store.create_schema(conn)
+    
+    # Leases that keep maintenance jobs to one worker at a time
+    create_lease_schema(conn)
+    
+    # Hourly rollups behind the analytics endpoints
+    create_rollup_schema(conn)
+    
+    # Common query counters merged from every worker
+    create_top_queries_schema(conn)
+    
+    # Conversation sessions, written through so every worker sees each turn
+    create_session_schema(conn)
+    
+    # Persistent translation cache
+    create_translation_schema(conn)
+    
+    # Alert subscribers and broadcast checkpoints
+    create_broadcast_schema(conn)
+    
+    # Outbreak alerts already raised, so workers raise each one once
+    create_outbreak_schema(conn)
 
 @app.post("/webhook")
 async def dialogflow_webhook(request: Request):
@@ -362,7 +518,18 @@ async def dialogflow_webhook(request: Request):
         # Enhanced query processing
         response = await process_enhanced_query(query_text, intent_name, parameters, session_id)
         
-        return JSONResponse({"fulfillmentText": response.content})
+        return JSONResponse({
+            "fulfillmentText": response.content,
+            # For /feedback; a string because 63-bit IDs overflow JavaScript numbers
+            "payload": {
+                "interaction_id": str(response.interaction_id) if response.interaction_id else None,
+                # Differential for the client to offer "did you mean"; probabilities include a no-match option
+                "ranking": [
+                    {"disease": disease, "coverage": round(coverage, 3), "probability": round(probability, 3)}
+                    for disease, coverage, probability in response.ranking or []
+                ]
+            }
+        })
         
     except Exception as e:
         logger.error(f"Webhook error: {e}")
@@ -370,94 +537,200 @@ async def dialogflow_webhook(request: Request):
             "fulfillmentText": "क्षमा करें, तकनीकी समस्या है। कृपया दोबारा कोशिश करें। / Sorry, technical issue. Please try again."
         })
 
+# Keyword routing (Dialogflow intents take precedence); tables live in keyword_router
+router = KeywordRouter()
+
+# A bare reply to "send your district/city name" is taken as the place unless it is this
+# long, contains digits (pincodes aside) or is small talk; unknown places fall back to
+# the general vaccination reply
+LOCATION_MAX_WORDS = 4
+PLACE_SUFFIXES = ("district", "city", "zila", "jila", "shahar")
+NOT_PLACES = frozenset({
+    "hi", "hello", "hey", "namaste", "ok", "okay", "yes", "no", "haan", "nahi", "thanks", "thank you",
+    "thank u", "shukriya", "dhanyavad", "bye", "help", "menu", "stop", "धन्यवाद", "नमस्ते", "हाँ", "नहीं"
+})
+PINCODE = re.compile(r"^[1-9]\d{5}$")
+
+def parse_location(text: str) -> Optional[str]:
+    """The place a normalised reply to the location question names, if it reads as one"""
+    if PINCODE.match(text):
+        return text
+    words = text.split()
+    if len(words) > 1 and words[-1] in PLACE_SUFFIXES:
+        words = words[:-1]
+    place = " ".join(words)
+    if not words or len(words) > LOCATION_MAX_WORDS or place in NOT_PLACES or any(c.isdigit() for c in place):
+        return None
+    return place
+
+def resolve_follow_up(session, query: str, intent: str, parameters: Dict) -> Tuple[str, Dict]:
+    """Fill in what a message leaves implicit from the conversation's last turn"""
+    parameters = dict(parameters or {})
+    text = normalize_query(query)
+    keywords = router.route(text)
+    disease = keywords.disease
+    if disease and not parameters.get("disease"):
+        parameters["disease"] = disease
+    
+    # A bare place name answering "send your district/city name"; the question is only
+    # open for the very next message, whatever it turns out to be
+    awaiting, session.awaiting = session.awaiting, None
+    location = parse_location(text) if awaiting == "location" and not intent else None
+    if (location and not disease and keywords.route is None and not hinglish.match(text).matched
+            and not knowledge_base().mentions_symptoms(text)):
+        parameters["location"] = location
+        return "vaccination.query", parameters
+    
+    # "How do I prevent it?" continues with the last disease instead of re-running the matcher
+    route = keywords.route or intent.split(".")[0]
+    if (route in ("symptoms", "prevention") and not parameters.get("disease") and session.last_disease
+            and not knowledge_base().mentions_symptoms(hinglish.match(text).text)):
+        parameters["disease"] = session.last_disease
+    return intent, parameters
+
+async def remember_turn(session, response: HealthResponse, parameters: Dict):
+    """Record what this reply was about for the next message, whichever worker receives it"""
+    topic, subject = response.topic or response.catalog_key or ("", "")
+    fields = {"last_intent": topic or None, "awaiting": None}
+    if topic in ("symptoms", "prevention") and subject:
+        fields["last_disease"] = subject
+    if topic == "vaccination":
+        if parameters.get("location"):
+            fields["last_location"] = subject
+        else:
+            fields["awaiting"] = "location"  # the reply asks for a district/city name
+    try:
+        await sessions.update(session, **fields)
+    except Exception as e:
+        logger.error(f"Session update error: {e}")
+
 async def process_enhanced_query(query: str, intent: str, parameters: Dict, session_id: str) -> HealthResponse:
     """Process query with enhanced accuracy and context awareness"""
     
+    # Count every query (cache hits included) for the common queries report
+    text = normalize_query(query)
+    query_tracker.offer(text)
+    
     # Language detection
     detected_lang = await detect_language_enhanced(query)
     
-    # Intent-based processing with fallback to ML matching
-    if intent == "symptoms.query" or "symptom" in query.lower() or "लक्षण" in query:
+    # Follow-ups are resolved before the cache lookup so the key reflects what was asked
+    session = await sessions.get(session_id)
+    intent, parameters = resolve_follow_up(session, query, intent, parameters)
+    
+    # Repeated queries are served from the reply cache; analytics are still logged
+    cache_key = query_cache.make_key(query, intent, parameters, detected_lang)
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        logged, final = cached
+        interaction_id = await log_user_interaction(session_id, query, logged)
+        await remember_turn(session, final, parameters)
+        return replace(final, interaction_id=interaction_id)
+    
+    # Intent-based processing with fallback to ML matching; the matcher only knows
+    # English and Devanagari symptom terms, so romanised Hindi ones are rewritten first
+    route = router.route(text).route
+    matcher_query = hinglish.match(text).text
+    if intent == "symptoms.query" or route == "symptoms":
         disease = parameters.get("disease", "")
         if disease:
             response = await handle_symptoms_query_enhanced({"disease": disease.lower()})
         else:
             # Use ML to find best match
-            response = knowledge_base.find_best_match(query)
+            response = await find_best_match_batched(matcher_query)
     
-    elif intent == "prevention.query" or any(word in query.lower() for word in ["prevent", "बचाव", "रोकथाम"]):
+    elif intent == "prevention.query" or route == "prevention":
         disease = parameters.get("disease", "")
         if disease:
             response = await handle_prevention_query_enhanced({"disease": disease.lower()})
         else:
             # Extract disease from query using ML
-            disease_match = knowledge_base.find_best_match(query)
+            disease_match = await find_best_match_batched(matcher_query)
             if disease_match.confidence > 0.3:
                 # Extract disease from the response
                 response = await handle_prevention_query_enhanced({"disease": extract_disease_from_response(disease_match.content)})
             else:
                 response = HealthResponse(
-                    content=get_prevention_general(),
+                    content=response_catalog().get("prevention", "", "en"),
                     confidence=0.7,
                     language=detected_lang,
-                    source="general"
+                    source="general",
+                    catalog_key=("prevention", "")
                 )
     
-    elif intent == "vaccination.query" or any(word in query.lower() for word in ["vaccin", "टीका", "immuniz"]):
+    elif intent == "vaccination.query" or route == "vaccination":
         response = await handle_vaccination_query_enhanced(parameters)
 
     
     else:
         # Use ML-based matching for unrecognized intents
-        response = knowledge_base.find_best_match(query)
+        response = await find_best_match_batched(matcher_query)
     
     # Log interaction for analytics
-    await log_user_interaction(session_id, query, response)
+    interaction_id = await log_user_interaction(session_id, query, response)
+    logged = replace(response)
     
-    # Translate if needed
+    # Serve the precompiled translation for catalog responses, translate anything else
     if detected_lang == 'hi' and response.language == 'english':
-        response.content = await translate_with_fallback(response.content, 'hi')
+        localized = response_catalog().lookup(response.catalog_key, 'hi')
+        if localized is not None:
+            response.content = localized
+        else:
+            response.content = await translate_with_fallback(response.content, 'hi')
         response.language = 'hi'
     
+    if response.source != "error":
+        query_cache.set(cache_key, (logged, replace(response)))
+    
+    await remember_turn(session, response, parameters)
+    response.interaction_id = interaction_id
     return response
 
 async def handle_symptoms_query_enhanced(parameters: Dict) -> HealthResponse:
     """Enhanced symptom query handler"""
     disease = parameters.get("disease", "").lower()
+    symptoms_db = knowledge_base().symptoms_db
     
-    if disease in knowledge_base.symptoms_db:
-        symptom_data = knowledge_base.symptoms_db[disease]["english"]
+    if disease in symptoms_db:
+        symptom_data = symptoms_db[disease]["english"]
         return HealthResponse(
-            content=symptom_data["response"],
+            content=response_catalog().get("symptoms", disease, "en"),
             confidence=symptom_data["confidence"],
             language="english",
-            source="knowledge_base"
+            source="knowledge_base",
+            catalog_key=("symptoms", disease)
         )
     
     return HealthResponse(
-        content="मैं इन रोगों के बारे में बता सकता हूं: मलेरिया, डेंगू, कोविड-19, टाइफाइड। कृपया बताएं आप किसके बारे में जानना चाहते हैं?",
+        content=response_catalog().get("symptoms", "", "en"),
         confidence=0.5,
         language="hindi",
-        source="fallback"
+        source="fallback",
+        catalog_key=("symptoms", "")
     )
 
+def get_symptoms_fallback() -> str:
+    return "मैं इन रोगों के बारे में बता सकता हूं: मलेरिया, डेंगू, कोविड-19, टाइफाइड। कृपया बताएं आप किसके बारे में जानना चाहते हैं?"
+
 async def handle_prevention_query_enhanced(parameters: Dict) -> HealthResponse:
     """Enhanced prevention query handler"""
     disease = parameters.get("disease", "").lower()
     
-    if disease in knowledge_base.prevention_db:
+    if disease in knowledge_base().prevention_db:
         return HealthResponse(
-            content=knowledge_base.prevention_db[disease],
+            content=response_catalog().get("prevention", disease, "en"),
             confidence=0.9,
             language="english",
-            source="knowledge_base"
+            source="knowledge_base",
+            catalog_key=("prevention", disease)
         )
     
     return HealthResponse(
-        content=get_prevention_general(),
+        content=response_catalog().get("prevention", "", "en"),
         confidence=0.7,
         language="english",
-        source="general"
+        source="general",
+        catalog_key=("prevention", "")
     )
 
 def get_prevention_general() -> str:
@@ -491,10 +764,30 @@ async def handle_vaccination_query_enhanced(parameters: Dict) -> HealthResponse:
     """Enhanced vaccination query with government data integration"""
     location = parameters.get("location", "india")
     
+    # Known locations are precompiled in the response catalog
+    content = response_catalog().get("vaccination", location.lower(), "en")
+    if content is not None:
+        return HealthResponse(
+            content=content,
+            confidence=0.9,
+            language="english",
+            source="government_integrated",
+            catalog_key=("vaccination", location.lower())
+        )
+    
     # Try to get real-time vaccination data
     vaccination_info = await get_vaccination_centers(location)
     
-    base_response = f"""💉 VACCINATION INFORMATION (टीकाकरण जानकारी):
+    return HealthResponse(
+        content=build_vaccination_response(vaccination_info),
+        confidence=0.9,
+        language="english",
+        source="government_integrated",
+        topic=("vaccination", location.lower())
+    )
+
+def build_vaccination_response(vaccination_info: str) -> str:
+    return f"""💉 VACCINATION INFORMATION (टीकाकरण जानकारी):
 
 🏥 कहां मिले टीका / Where to Get Vaccinated:
 • प्राथमिक स्वास्थ्य केंद्र (PHC) / Primary Health Centers
@@ -523,18 +816,19 @@ async def handle_vaccination_query_enhanced(parameters: Dict) -> HealthResponse:
 {vaccination_info}
 
 💡 अपने क्षेत्र के टीकाकरण केंद्र जानने के लिए अपना जिला/शहर का नाम भेजें!"""
-    
-    return HealthResponse(
-        content=base_response,
-        confidence=0.9,
-        language="english",
-        source="government_integrated"
-    )
 
 async def handle_emergency_query_enhanced(parameters: Dict) -> HealthResponse:
     """Enhanced emergency handler with location-specific information"""
-    
-    response = """🚨 आपातकालीन स्वास्थ्य संपर्क / EMERGENCY HEALTH CONTACTS:
+    return HealthResponse(
+        content=response_catalog().get("emergency", "", "en"),
+        confidence=0.95,
+        language="hindi",
+        source="emergency_database",
+        catalog_key=("emergency", "")
+    )
+
+def get_emergency_response() -> str:
+    return """🚨 आपातकालीन स्वास्थ्य संपर्क / EMERGENCY HEALTH CONTACTS:
 
 🆘 तुरंत कॉल करें / CALL IMMEDIATELY:
 • मेडिकल इमरजेंसी / Medical Emergency: 102
@@ -572,25 +866,15 @@ async def handle_emergency_query_enhanced(parameters: Dict) -> HealthResponse:
 
 🏥 यदि कोई इमरजेंसी है तो तुरंत 102 पर कॉल करें!"""
 
-    return HealthResponse(
-        content=response,
-        confidence=0.95,
-        language="hindi",
-        source="emergency_database"
-    )
-
 async def handle_health_data_query_enhanced(parameters: Dict) -> HealthResponse:
     """Enhanced health data with government API integration"""
     location = parameters.get("location", "india")
     
     try:
         # Get COVID data
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{GOV_HEALTH_APIS['covid_data']}/countries/{location}") as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    
-                    response = f"""📊 स्वास्थ्य डेटा / HEALTH DATA FOR {location.upper()}:
+        data = await country_stats.get(location)
+        if data:
+            response = f"""📊 स्वास्थ्य डेटा / HEALTH DATA FOR {location.upper()}:
 
 🦠 कोविड-19 स्थिति / COVID-19 STATUS:
 • कुल मामले / Total Cases: {data.get('cases', 'N/A'):,}
@@ -618,13 +902,13 @@ async def handle_health_data_query_enhanced(parameters: Dict) -> HealthResponse:
 
 🔄 अपडेट: {datetime.now().strftime('%d/%m/%Y %H:%M')}
 📞 हेल्पलाइन: 1075 | आपातकाल: 102"""
-                    
-                    return HealthResponse(
-                        content=response,
-                        confidence=0.9,
-                        language="hindi",
-                        source="government_api"
-                    )
+            
+            return HealthResponse(
+                content=response,
+                confidence=0.9,
+                language="hindi",
+                source="government_api"
+            )
     
     except Exception as e:
         logger.error(f"Health data query error: {e}")
@@ -645,32 +929,69 @@ async def handle_health_data_query_enhanced(parameters: Dict) -> HealthResponse:
         source="fallback"
     )
 
-async def get_vaccination_centers(location: str) -> str:
-    """Get vaccination centers for given location"""
-    try:
-        # Mock implementation - replace with actual government API
-        centers = {
-            "delhi": ["AIIMS Delhi", "Safdarjung Hospital", "RML Hospital"],
-            "mumbai": ["KEM Hospital", "Sion Hospital", "Nair Hospital"],
-            "bangalore": ["Victoria Hospital", "Bowring Hospital", "NIMHANS"],
-            "chennai": ["Stanley Medical College", "Kilpauk Medical College"],
-            "kolkata": ["Medical College Hospital", "SSKM Hospital"],
-        }
-        
-        location_centers = centers.get(location.lower(), ["स्थानीय PHC", "सामुदायिक स्वास्थ्य केंद्र", "जिला अस्पताल"])
-        
-        center_list = "\n".join([f"• {center}" for center in location_centers])
-        
-        return f"""
+# Mock implementation - replace with actual government API
+VACCINATION_CENTERS = {
+    "delhi": ["AIIMS Delhi", "Safdarjung Hospital", "RML Hospital"],
+    "mumbai": ["KEM Hospital", "Sion Hospital", "Nair Hospital"],
+    "bangalore": ["Victoria Hospital", "Bowring Hospital", "NIMHANS"],
+    "chennai": ["Stanley Medical College", "Kilpauk Medical College"],
+    "kolkata": ["Medical College Hospital", "SSKM Hospital"],
+}
+
+def format_vaccination_centers(location: str) -> str:
+    location_centers = VACCINATION_CENTERS.get(location.lower(), ["स्थानीय PHC", "सामुदायिक स्वास्थ्य केंद्र", "जिला अस्पताल"])
+    
+    center_list = "\n".join([f"• {center}" for center in location_centers])
+    
+    return f"""
 📍 {location.upper()} में टीकाकरण केंद्र:
 {center_list}
 
 💡 अधिक केंद्रों की जानकारी के लिए 1075 पर कॉल करें।"""
+
+async def get_vaccination_centers(location: str) -> str:
+    """Get vaccination centers for given location"""
+    try:
+        return format_vaccination_centers(location)
     
     except Exception as e:
         logger.error(f"Vaccination center query error: {e}")
         return "\n💡 स्थानीय टीकाकरण केंद्र की जानकारी के लिए निकटतम PHC से संपर्क करें।"
 
+# Precompiled response catalog
+def catalog_sources() -> Dict[Tuple[str, str], str]:
+    """Every static response the bot serves, keyed by (intent, disease)"""
+    kb = knowledge_base()
+    sources = {}
+    for disease, lang_data in kb.symptoms_db.items():
+        sources[("symptoms", disease)] = lang_data["english"]["response"]
+    sources[("symptoms", "")] = get_symptoms_fallback()
+    for disease, text in kb.prevention_db.items():
+        sources[("prevention", disease)] = text
+    sources[("prevention", "")] = get_prevention_general()
+    for location in list(VACCINATION_CENTERS) + ["india"]:
+        sources[("vaccination", location)] = build_vaccination_response(format_vaccination_centers(location))
+    sources[("emergency", "")] = get_emergency_response()
+    sources[("default", "")] = kb.get_default_response()
+    return sources
+
+response_catalog = resources.register(
+    "response_catalog", lambda: load_or_compile(catalog_sources(), CATALOG_PATH), fork_safe=True
+)
+
+@app.post("/admin/catalog/reload")
+async def reload_response_catalog():
+    """Hot-reload the response catalog from disk"""
+    try:
+        loop = asyncio.get_running_loop()
+        catalog = await loop.run_in_executor(None, load_or_compile, catalog_sources(), CATALOG_PATH)
+        response_catalog.replace(catalog)
+        query_cache.invalidate("catalog")
+        return {"status": "success", "catalog": catalog.info(), "timestamp": datetime.now()}
+    except Exception as e:
+        logger.error(f"Catalog reload error: {e}")
+        return {"status": "error", "message": str(e)}
+
 @app.post("/whatsapp")
 async def whatsapp_webhook(request: Request):
     """Enhanced WhatsApp webhook with better error handling"""
@@ -692,17 +1013,19 @@ async def whatsapp_webhook(request: Request):
         )
         
         # Send response back via WhatsApp
-        if client:
-            message = client.messages.create(
-                from_=TWILIO_WHATSAPP_NUMBER,
-                body=response.content,
-                to=from_number
-            )
+        if sender.configured:
+            if TWILIO_ASYNC_REPLY:
+                # Acknowledge the webhook now and deliver the reply in the background
+                sender.send_in_background(TWILIO_WHATSAPP_NUMBER, from_number, response.content)
+                await log_whatsapp_interaction(from_number, message_body, response.content)
+                return {"status": "accepted", "confidence": response.confidence}
+            
+            message = await sender.send(TWILIO_WHATSAPP_NUMBER, from_number, response.content)
             
             # Log successful interaction
             await log_whatsapp_interaction(from_number, message_body, response.content)
             
-            return {"status": "success", "message_sid": message.sid, "confidence": response.confidence}
+            return {"status": "success", "message_sid": message.get("sid"), "confidence": response.confidence}
         else:
             return {"status": "error", "message": "Twilio client not configured"}
             
@@ -730,14 +1053,15 @@ async def sms_webhook(request: Request):
         # Truncate response for SMS (160 character limit consideration)
         sms_response = truncate_for_sms(response.content)
         
-        if client:
-            message = client.messages.create(
-                from_=TWILIO_WHATSAPP_NUMBER.replace('whatsapp:', ''),  # Use SMS number
-                body=sms_response,
-                to=from_number
-            )
+        if sender.configured:
+            sms_number = TWILIO_WHATSAPP_NUMBER.replace('whatsapp:', '')  # Use SMS number
+            if TWILIO_ASYNC_REPLY:
+                sender.send_in_background(sms_number, from_number, sms_response)
+                return {"status": "accepted"}
             
-            return {"status": "success", "message_sid": message.sid}
+            message = await sender.send(sms_number, from_number, sms_response)
+            
+            return {"status": "success", "message_sid": message.get("sid")}
         else:
             return {"status": "error", "message": "SMS service not configured"}
             
@@ -765,20 +1089,8 @@ def truncate_for_sms(text: str, max_length: int = 1600) -> str:
 async def detect_language_enhanced(text: str) -> str:
     """Enhanced language detection with Hindi/English mixed text support"""
     try:
-        # Count Hindi characters
-        hindi_chars = sum(1 for char in text if 0x0900 <= ord(char) <= 0x097F)
-        total_chars = len([char for char in text if char.isalpha()])
-        
-        if total_chars == 0:
-            return 'en'
-        
-        hindi_ratio = hindi_chars / total_chars
-        
-        # If more than 30% Hindi characters, consider it Hindi
-        if hindi_ratio > 0.3:
-            return 'hi'
-        else:
-            return 'en'
+        # One memoised script pass; more than 30% Devanagari (or another Indic script) wins
+        return detect_language(text)
             
     except Exception as e:
         logger.error(f"Language detection error: {e}")
@@ -787,18 +1099,24 @@ async def detect_language_enhanced(text: str) -> str:
 async def translate_with_fallback(text: str, target_lang: str = 'hi') -> str:
     """Enhanced translation with fallback and caching"""
     try:
-        # Skip if already contains target language characters
-        if target_lang == 'hi' and any(0x0900 <= ord(char) <= 0x097F for char in text):
+        # Skip if already written in the target language's script
+        if in_language_script(text, target_lang):
             return text
         
-        # Use Google Translate
-        result = translator.translate(text, dest=target_lang)
-        return result.text
+        # Cached Google Translate (memory LRU -> SQLite -> upstream)
+        return await translation_cache.translate(text, target_lang)
         
     except Exception as e:
         logger.error(f"Translation error: {e}")
         return text  # Return original if translation fails
 
+async def pretranslate_knowledge_base():
+    """Warm the translation cache with responses the catalog has no Hindi entry for"""
+    texts = [text for (intent, disease), text in catalog_sources().items()
+             if response_catalog().get(intent, disease, 'hi') is None]
+    translated = await translation_cache.warm(texts, 'hi')
+    logger.info(f"Pre-translated {translated}/{len(texts)} knowledge base responses")
+
 # Utility functions
 def extract_disease_from_response(response: str) -> str:
     """Extract disease name from response for prevention queries"""
@@ -811,31 +1129,28 @@ def extract_disease_from_response(response: str) -> str:
     return ""
 
 # Database logging functions
-async def log_user_interaction(session_id: str, query: str, response: HealthResponse):
-    """Log user interaction for analytics and improvement"""
+async def log_user_interaction(session_id: str, query: str, response: HealthResponse) -> Optional[int]:
+    """Queue user interaction for analytics; written in batches by the background logger.
+    Returns the interaction ID the client can send feedback against."""
     try:
-        conn = sqlite3.connect('health_chatbot.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO user_interactions 
-            (user_id, query, response, confidence, timestamp, language, source)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            session_id,
-            query,
-            response.content[:500],  # Truncate long responses
-            response.confidence,
-            datetime.now(),
-            response.language,
-            response.source
+        interaction_id = interaction_ids.next()
+        queued = interaction_logger.log(InteractionRecord(
+            user_id=session_id,
+            query=query,
+            response=response.content,  # stored once per distinct reply, rows keep a hash
+            confidence=float(response.confidence),
+            timestamp=datetime.now(),
+            language=response.language,
+            source=response.source,
+            interaction_id=interaction_id
         ))
-        
-        conn.commit()
-        conn.close()
+        if queued:
+            last_interactions.set(session_id, interaction_id)
+            return interaction_id
         
     except Exception as e:
         logger.error(f"Database logging error: {e}")
+    return None
 
 async def log_whatsapp_interaction(phone_number: str, query: str, response: str):
     """Log WhatsApp interaction"""
@@ -847,23 +1162,40 @@ async def log_whatsapp_interaction(phone_number: str, query: str, response: str)
     ))
 
 # Health monitoring and alerts
-async def monitor_disease_outbreaks():
-    """Monitor for disease outbreaks and send alerts"""
-    while True:
+# Outbreak detection: daily case counts per region, scored by EWMA/CUSUM/seasonal detectors
+OUTBREAK_REGIONS = load_regions()  # region -> endpoint path under covid_data
+OUTBREAK_BACKFILL_DAYS = 60
+
+async def backfill_case_counts(store: SeriesStore, region: str, country: str):
+    """Seed a new region's history from the cumulative timeline so detectors can score it at once"""
+    async with http.session.get(f"{GOV_HEALTH_APIS['covid_data']}/historical/{country}",
+                                params={"lastdays": OUTBREAK_BACKFILL_DAYS}) as resp:
+        resp.raise_for_status()
+        timeline = (await resp.json())["timeline"]["cases"]
+    
+    days = sorted((datetime.strptime(day, "%m/%d/%y").date().toordinal(), total) for day, total in timeline.items())
+    for (_, previous), (period, total) in zip(days, days[1:]):
+        store.ingest(region, period, max(0, total - previous))
+
+async def ingest_case_count(region: str, data: Dict) -> float:
+    """Record a region's fresh payload in the outbreak series; returns today's case count"""
+    store = outbreak_monitor.engine.store
+    path = OUTBREAK_REGIONS[region]
+    if region not in store and path.startswith("countries/"):
         try:
-            # Check for COVID spikes
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{GOV_HEALTH_APIS['covid_data']}/countries/india") as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        today_cases = data.get('todayCases', 0)
-                        
-                        # Alert threshold
-                        if today_cases > 50000:  # Adjust threshold
-                            alert_message = f"""🚨 स्वास्थ्य चेतावनी / HEALTH ALERT 🚨
-
-आज कोविड मामले: {today_cases:,}
-Today's COVID cases: {today_cases:,}
+            await backfill_case_counts(store, region, path.split("/", 1)[1])
+        except Exception as e:
+            logger.error(f"Case history backfill for {region} failed: {e}")
+    cases = data.get('todayCases', 0)
+    store.ingest(region, today_period(), cases)
+    return cases
+
+async def raise_outbreak_alert(alert: OutbreakAlert):
+    region = alert.region.title()
+    alert_message = f"""🚨 स्वास्थ्य चेतावनी / HEALTH ALERT 🚨
+
+{region} में आज कोविड मामलों में असामान्य वृद्धि: {alert.value:,.0f}
+Unusual rise in COVID cases in {region} today: {alert.value:,.0f}
 
 सुरक्षा उपाय अपनाएं:
 • मास्क पहनें / Wear masks
@@ -873,33 +1205,28 @@ Today's COVID cases: {today_cases:,}
 
 सुरक्षित रहें! 🙏 Stay safe!
 हेल्पलाइन: 1075"""
-                            
-                            await send_health_alert(alert_message, "high", "india")
-            
-            # Check every 6 hours
-            await asyncio.sleep(21600)
-            
-        except Exception as e:
-            logger.error(f"Disease monitoring error: {e}")
-            await asyncio.sleep(3600)  # Retry in 1 hour
+    
+    logger.warning(f"Outbreak detected in {alert.region}: {alert.value:,.0f} cases ({', '.join(alert.detectors)})")
+    region_poller.mark_hot(alert.region)
+    await send_health_alert(alert_message, alert.severity, alert.region)
+
+# The poller feeds the series on per-region schedules; the monitor only runs detection and
+# claims each alert in the database, so one worker raises it
+outbreak_monitor = OutbreakMonitor(OutbreakEngine(SeriesStore()), None, raise_outbreak_alert, db=db)
+region_poller = RegionPoller(http, OUTBREAK_REGIONS, ingest_case_count, base_url=GOV_HEALTH_APIS['covid_data'])
 
 async def send_health_alert(message: str, severity: str, location: str):
     """Send health alert to registered users"""
     try:
         # Log alert in database
-        conn = sqlite3.connect('health_chatbot.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        alert_id = await db.execute('''
             INSERT INTO health_alerts (alert_type, message, severity, location, timestamp)
             VALUES (?, ?, ?, ?, ?)
         ''', ("disease_outbreak", message, severity, location, datetime.now()))
         
-        conn.commit()
-        conn.close()
-        
-        # Here you would send to registered users via WhatsApp/SMS
-        logger.info(f"Health alert logged: {severity} level alert for {location}")
+        # Queue the fan-out; the broadcaster streams subscribers and updates sent_count
+        await broadcaster.submit(alert_id, location)
+        logger.info(f"Health alert {alert_id} queued for broadcast: {severity} level alert for {location}")
         
     except Exception as e:
         logger.error(f"Alert sending error: {e}")
@@ -909,43 +1236,16 @@ async def send_health_alert(message: str, severity: str, location: str):
 async def get_interaction_analytics():
     """Get interaction analytics for monitoring chatbot performance"""
     try:
-        conn = sqlite3.connect('health_chatbot.db')
-        cursor = conn.cursor()
-        
-        # Get basic stats
-        cursor.execute('''
-            SELECT 
-                COUNT(*) as total_interactions,
-                AVG(confidence) as avg_confidence,
-                COUNT(DISTINCT user_id) as unique_users,
-                language,
-                source
-            FROM user_interactions 
-            WHERE timestamp > datetime('now', '-7 days')
-            GROUP BY language, source
-        ''')
-        
-        stats = cursor.fetchall()
-        
-        # Get most common queries
-        cursor.execute('''
-            SELECT query, COUNT(*) as frequency 
-            FROM user_interactions 
-            WHERE timestamp > datetime('now', '-7 days')
-            GROUP BY query 
-            ORDER BY frequency DESC 
-            LIMIT 10
-        ''')
-        
-        common_queries = cursor.fetchall()
-        
-        conn.close()
+        # Read pre-aggregated hourly rollups; cost is independent of table size
+        since = datetime.now() - timedelta(days=7)
+        stats = await db.run_read(lambda conn: interaction_summary(conn, since))
+        top_queries = (await query_tracker.top(10, window_seconds=7 * 24 * 3600))["items"]
         
         return {
             "status": "success",
             "period": "last_7_days",
-            "statistics": [dict(zip([col[0] for col in cursor.description], row)) for row in stats],
-            "common_queries": [{"query": q[0], "frequency": q[1]} for q in common_queries],
+            "statistics": stats,
+            "common_queries": [{"query": query, "frequency": frequency} for query, frequency in top_queries],
             "timestamp": datetime.now()
         }
         
@@ -957,37 +1257,14 @@ async def get_interaction_analytics():
 async def get_accuracy_metrics():
     """Get accuracy metrics for performance monitoring"""
     try:
-        conn = sqlite3.connect('health_chatbot.db')
-        cursor = conn.cursor()
-        
-        # Calculate accuracy metrics
-        cursor.execute('''
-            SELECT 
-                AVG(confidence) as avg_confidence,
-                COUNT(CASE WHEN confidence > 0.8 THEN 1 END) * 100.0 / COUNT(*) as high_confidence_percentage,
-                COUNT(CASE WHEN confidence > 0.6 THEN 1 END) * 100.0 / COUNT(*) as medium_confidence_percentage,
-                source,
-                language
-            FROM user_interactions 
-            WHERE timestamp > datetime('now', '-30 days')
-            GROUP BY source, language
-        ''')
-        
-        metrics = cursor.fetchall()
-        conn.close()
+        # Calculate accuracy metrics from the hourly rollups
+        since = datetime.now() - timedelta(days=30)
+        metrics = await db.run_read(lambda conn: accuracy_summary(conn, since))
         
         return {
             "status": "success",
             "target_accuracy": "80%",
-            "current_metrics": [
-                {
-                    "source": row[3],
-                    "language": row[4],
-                    "avg_confidence": round(row[0], 3),
-                    "high_confidence_percentage": round(row[1], 1),
-                    "medium_confidence_percentage": round(row[2], 1)
-                } for row in metrics
-            ],
+            "current_metrics": metrics,
             "timestamp": datetime.now()
         }
         
@@ -995,6 +1272,162 @@ async def get_accuracy_metrics():
         logger.error(f"Accuracy metrics error: {e}")
         return {"status": "error", "message": str(e)}
 
+@app.get("/analytics/logger")
+async def get_logger_metrics():
+    """Get write-behind interaction logger throughput and backpressure metrics"""
+    return {
+        "status": "success",
+        "interaction_logger": interaction_logger.stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/analytics/storage")
+async def get_storage_metrics():
+    """Get interaction partitions and retention job status"""
+    return {
+        "status": "success",
+        "interaction_storage": retention_job.stats(),
+        "session_index": last_interactions.stats(),
+        "conversation_sessions": sessions.stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/analytics/cache")
+async def get_cache_metrics():
+    """Get query reply cache hit/miss counters"""
+    return {
+        "status": "success",
+        "query_cache": query_cache.stats(),
+        "top_queries": query_tracker.stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/analytics/http")
+async def get_http_metrics():
+    """Get outbound HTTP pool settings and data API cache counters"""
+    return {
+        "status": "success",
+        "http_client": http.stats(),
+        "country_stats": country_stats.stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.post("/admin/cache/invalidate")
+async def invalidate_query_cache(scope: str = "all"):
+    """Invalidate cached replies built against the knowledge base, the catalog, or both"""
+    try:
+        query_cache.invalidate(scope)
+        return {"status": "success", "query_cache": query_cache.stats(), "timestamp": datetime.now()}
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+@app.get("/analytics/matcher")
+async def get_matcher_metrics(kb: HealthKnowledgeBase = Depends(knowledge_base)):
+    """Get symptom matcher micro-batching metrics"""
+    return {
+        "status": "success",
+        "knowledge_base": {"diseases": len(kb.diseases), "terms": len(kb.vectorizer.vocabulary_)},
+        "micro_batching": symptom_matcher.stats(),
+        "hinglish_lexicon": hinglish.stats(),
+        "keyword_router": router.stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/analytics/resources")
+async def get_resource_metrics():
+    """Get per-process resource build times and background task counts"""
+    return {
+        "status": "success",
+        "resources": resources.stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/analytics/translation")
+async def get_translation_metrics():
+    """Get translation cache hit/miss metrics"""
+    return {
+        "status": "success",
+        "translation_cache": translation_cache.stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/analytics/messaging")
+async def get_messaging_metrics():
+    """Get outbound WhatsApp/SMS delivery metrics"""
+    return {
+        "status": "success",
+        "outbound_messaging": sender.stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/analytics/outbreaks")
+async def get_outbreak_metrics():
+    """Get outbreak detector configuration and run metrics"""
+    return {
+        "status": "success",
+        "outbreak_detection": outbreak_monitor.stats(),
+        "region_polling": region_poller.stats(),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/analytics/broadcasts")
+async def get_broadcast_metrics():
+    """Get alert broadcast progress and subscriber counts"""
+    try:
+        recent = await db.fetchall('''
+            SELECT b.alert_id, b.location, b.status, b.owner, b.created_at, b.finished_at,
+                   SUM(p.sent) AS sent, SUM(p.failed) AS failed
+            FROM broadcasts b JOIN broadcast_progress p ON p.alert_id = b.alert_id
+            GROUP BY b.alert_id ORDER BY b.alert_id DESC LIMIT 20
+        ''')
+        subscribers = await db.fetchall(
+            'SELECT channel, COUNT(*) AS active FROM subscribers WHERE active = 1 GROUP BY channel'
+        )
+        return {
+            "status": "success",
+            "broadcaster": broadcaster.stats(),
+            "subscribers": {row["channel"]: row["active"] for row in subscribers},
+            "recent_broadcasts": [dict(row) for row in recent],
+            "timestamp": datetime.now()
+        }
+    except Exception as e:
+        logger.error(f"Broadcast analytics error: {e}")
+        return {"status": "error", "message": str(e)}
+
+# Alert subscription endpoints
+@app.post("/alerts/subscribe")
+async def subscribe_alerts(request: Request):
+    """Register a phone number for health alerts in a location"""
+    try:
+        data = await request.json()
+        channel = data.get("channel", "whatsapp")
+        phone = data.get("phone", "").replace("whatsapp:", "")
+        location = data.get("location", "")
+        language = data.get("language", "hi")
+        if channel not in CHANNELS or not phone or not location:
+            return {"status": "error", "message": f"phone, location and channel ({'/'.join(CHANNELS)}) are required"}
+        
+        subscriber_id = await db.run_write(lambda conn: subscribe(conn, phone, channel, location, language))
+        return {"status": "success", "subscriber_id": subscriber_id, "timestamp": datetime.now()}
+        
+    except Exception as e:
+        logger.error(f"Alert subscription error: {e}")
+        return {"status": "error", "message": str(e)}
+
+@app.post("/alerts/unsubscribe")
+async def unsubscribe_alerts(request: Request):
+    """Stop health alerts for a phone number"""
+    try:
+        data = await request.json()
+        channel = data.get("channel", "whatsapp")
+        phone = data.get("phone", "").replace("whatsapp:", "")
+        removed = await db.run_write(lambda conn: unsubscribe(conn, phone, channel))
+        return {"status": "success", "unsubscribed": removed, "timestamp": datetime.now()}
+        
+    except Exception as e:
+        logger.error(f"Alert unsubscription error: {e}")
+        return {"status": "error", "message": str(e)}
+
 # Feedback endpoint
 @app.post("/feedback")
 async def submit_feedback(request: Request):
@@ -1005,40 +1438,99 @@ async def submit_feedback(request: Request):
         rating = data.get("rating")  # 1-5 scale
         comment = data.get("comment", "")
         
-        conn = sqlite3.connect('health_chatbot.db')
-        cursor = conn.cursor()
+        # Target an explicit interaction, else the session's latest one: this worker's index
+        # knows replies still queued, the database those other workers served (IDs sort by time)
+        interaction_id = data.get("interaction_id")
+        if interaction_id is None and session_id:
+            candidates = [
+                last_interactions.get(session_id),
+                await db.run_read(lambda conn: interaction_store.latest_interaction(conn, session_id))
+            ]
+            interaction_id = max((c for c in candidates if c is not None), default=None)
+        if interaction_id is None:
+            return {"status": "error", "message": "No interaction found for feedback"}
+        interaction_id = int(interaction_id)
         
-        # Update the latest interaction with feedback
-        cursor.execute('''
-            UPDATE user_interactions 
-            SET feedback = ? 
-            WHERE user_id = ? 
-            ORDER BY timestamp DESC 
-            LIMIT 1
-        ''', (rating, session_id))
-        
-        conn.commit()
-        conn.close()
+        # Records still queued are patched in place; otherwise update the row by primary key
+        record = interaction_logger.pending(interaction_id)
+        if record is not None:
+            record.feedback = rating
+        found = await db.run_write(lambda conn: interaction_store.record_feedback(
+            conn, interaction_id, rating, session_id, comment, update_row=record is None
+        ))
+        if not found:
+            return {"status": "error", "message": f"Unknown interaction {interaction_id}"}
         
-        return {"status": "success", "message": "Feedback submitted successfully"}
+        return {"status": "success", "message": "Feedback submitted successfully", "interaction_id": str(interaction_id)}
         
     except Exception as e:
         logger.error(f"Feedback submission error: {e}")
         return {"status": "error", "message": str(e)}
 
-# Startup events
-@app.on_event("startup")
+# Lifespan: startup and shutdown steps run by lifespan() above
 async def startup_event():
     """Initialize background tasks and services"""
     logger.info("Starting Healthcare Chatbot API v2.0")
+    started = time.perf_counter()
     
-    # Start disease monitoring
-    asyncio.create_task(monitor_disease_outbreaks())
+    # Build the knowledge base, catalog and translator unless a preloading master already did
+    await resources.warm()
+    
+    # Open the pooled HTTP session before anything polls the data APIs
+    await http.start()
+    
+    # Restore the last data API snapshot so a restart doesn't refetch every location
+    country_stats.load()
     
     # Initialize database
     init_database()
     
-    logger.info("All services started successfully")
+    # Count common queries, merging every worker's counters into SQLite periodically
+    query_tracker.start()
+    
+    # Start write-behind interaction logging
+    interaction_logger.start()
+    
+    # Deliver queued alerts, resuming any broadcast interrupted by the last shutdown
+    await broadcaster.start()
+    
+    # Start outbreak detection from the saved case history, fed by the region poller
+    outbreak_monitor.load()
+    region_poller.start()
+    outbreak_monitor.start()
+    
+    # Probe dependencies in the background; /health only reads the snapshot
+    health_probe.start()
+    
+    # Archive interaction partitions past the retention window
+    retention_job.start()
+    
+    # Spill idle conversation sessions to SQLite
+    sessions.start()
+    
+    # Pre-translate knowledge base responses in the background
+    resources.spawn(pretranslate_knowledge_base(), name="pretranslate")
+    
+    logger.info(f"All services started successfully in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+async def shutdown_event():
+    """Finish pending deliveries, drain queued interactions and release pooled connections"""
+    await health_probe.stop()
+    await region_poller.stop()
+    await outbreak_monitor.stop()
+    await retention_job.stop()
+    await broadcaster.stop()
+    await sender.close()
+    await http.close()
+    await country_stats.stop()
+    await sessions.stop()
+    await interaction_logger.stop()
+    await query_tracker.stop()
+    translation_cache.close()
+    await symptom_matcher.stop()
+    await db.run_write(interaction_ids.release)
+    db.close()
+    logger.info("Database connections closed")
 
 # Health check endpoints
 @app.get("/")
@@ -1058,43 +1550,57 @@ async def root():
         "target_coverage": "80% accuracy, 20% awareness increase"
     }
 
+# Dependency probes, run in the background by health_probe
+async def probe_database() -> Dict:
+    rows = await db.fetchall('SELECT table_name, row_count FROM table_row_counts')
+    return {"row_counts": {row["table_name"]: row["row_count"] for row in rows}}
+
+async def probe_covid_data() -> Dict:
+    async with http.session.get(f"{GOV_HEALTH_APIS['covid_data']}/countries/india") as resp:
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}")
+    return {}
+
+health_probe = HealthProbe()
+health_probe.register("database", probe_database)
+health_probe.register("covid_data", probe_covid_data, critical=False)
+
 @app.get("/health")
 async def health_check():
-    """Comprehensive health check"""
-    try:
-        # Check database connectivity
-        conn = sqlite3.connect('health_chatbot.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM user_interactions')
-        interaction_count = cursor.fetchone()[0]
-        conn.close()
-        
-        # Check API connectivity
-        api_status = {}
-        try:
-            response = requests.get(f"{GOV_HEALTH_APIS['covid_data']}/countries/india", timeout=5)
-            api_status["covid_data"] = "operational" if response.status_code == 200 else "error"
-        except:
-            api_status["covid_data"] = "error"
-        
-        return {
-            "status": "healthy",
-            "timestamp": datetime.now(),
-            "database": {
-                "status": "connected",
-                "total_interactions": interaction_count
-            },
-            "external_apis": api_status,
-            "services": {
-                "whatsapp": "configured" if client else "not_configured",
-                "translation": "active",
-                "ml_matching": "active"
-            }
+    """Latest background probe snapshot (never calls a dependency itself)"""
+    snapshot = health_probe.snapshot
+    dependencies = snapshot["dependencies"]
+    database = dependencies.get("database", {})
+    return {
+        "status": snapshot["status"],
+        "timestamp": datetime.now(),
+        "checked_at": snapshot["checked_at"],
+        "database": {
+            "status": "connected" if database.get("status") == "operational" else database.get("status", "unknown"),
+            "total_interactions": database.get("row_counts", {}).get("user_interactions")
+        },
+        "external_apis": {
+            name: result["status"] for name, result in dependencies.items() if name != "database"
+        },
+        "dependencies": dependencies,
+        "services": {
+            "whatsapp": "configured" if sender.configured else "not_configured",
+            "translation": "active",
+            "ml_matching": "active"
         }
-        
-    except Exception as e:
-        logger.error(f"Health check error: {e}")
-        return {"status": "unhealthy", "error": str(e)}
+    }
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness: the process and event loop are responsive"""
+    return {"status": "alive", "timestamp": datetime.now()}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: every critical dependency passed the latest probe"""
+    if not health_probe.ready:
+        return JSONResponse(status_code=503, content={"status": "not_ready", "health": health_probe.snapshot["status"]})
+    return {"status": "ready", "timestamp": datetime.now()}
 
 # Run the application
 if __name__ == "__main__":
@@ -0,0 +1,251 @@
+"""Streaming top-K frequent query tracker (Space-Saving over time buckets, merged in SQLite)"""
+import asyncio
+import heapq
+import logging
+import os
+import sqlite3
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from storage import Database
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TOP_QUERIES_CAPACITY = int(os.getenv("TOP_QUERIES_CAPACITY", 500))           # counters kept per bucket
+TOP_QUERIES_BUCKET_SECONDS = int(os.getenv("TOP_QUERIES_BUCKET_SECONDS", 3600))
+TOP_QUERIES_WINDOW_BUCKETS = int(os.getenv("TOP_QUERIES_WINDOW_BUCKETS", 24 * 30))
+TOP_QUERIES_FLUSH_INTERVAL = float(os.getenv("TOP_QUERIES_FLUSH_INTERVAL", 300))  # merge into SQLite this often
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters with at most `capacity` counters.
+
+    Counters live in a stream-summary: items grouped by count, with the minimum
+    count tracked, so each offer is O(1). A new item that finds the table full
+    replaces an item with the minimum count and inherits it as its error bound;
+    any item with true frequency above n / capacity is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity: int = TOP_QUERIES_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._buckets: Dict[int, Dict[str, None]] = {}  # count -> insertion-ordered set of items
+        self._min = 0
+        self.total = 0
+
+    def _move(self, item: str, old: int, new: int):
+        bucket = self._buckets[old]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[old]
+            if old == self._min:
+                self._min = new  # unit increments: the next non-empty count is `new`
+        self._buckets.setdefault(new, {})[item] = None
+        self.counts[item] = new
+
+    def offer(self, item: str):
+        self.total += 1
+        count = self.counts.get(item)
+        if count is not None:
+            self._move(item, count, count + 1)
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+            self._buckets.setdefault(1, {})[item] = None
+            self._min = 1
+        else:
+            # Evict an item with the minimum count; the newcomer inherits that count as its error
+            floor = self._min
+            bucket = self._buckets[floor]
+            victim = next(iter(bucket))
+            del bucket[victim], self.counts[victim], self.errors[victim]
+            bucket[item] = None
+            self.counts[item] = floor
+            self.errors[item] = floor
+            self._move(item, floor, floor + 1)
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return heapq.nlargest(k, self.counts.items(), key=lambda entry: entry[1])
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """Summed counters of both summaries, truncated to the largest `capacity`"""
+        return SpaceSaving.from_dict({
+            "total": self.total + other.total,
+            "counts": dict(Counter(self.counts) + Counter(other.counts)),
+            "errors": dict(Counter(self.errors) + Counter(other.errors))
+        }, self.capacity)
+
+    @classmethod
+    def from_dict(cls, data: Dict, capacity: int = TOP_QUERIES_CAPACITY) -> "SpaceSaving":
+        summary = cls(capacity)
+        for item, count in sorted(data["counts"].items(), key=lambda entry: -entry[1])[:capacity]:
+            summary.counts[item] = count
+            summary.errors[item] = data["errors"].get(item, 0)
+            summary._buckets.setdefault(count, {})[item] = None
+        summary._min = min(summary._buckets) if summary._buckets else 0
+        summary.total = data.get("total", sum(summary.counts.values()))
+        return summary
+
+
+def create_top_queries_schema(conn: sqlite3.Connection):
+    # Per-bucket counters merged from every worker's summaries, trimmed to the capacity
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS top_query_counts (
+            bucket_start INTEGER NOT NULL,
+            query TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            error INTEGER NOT NULL,
+            PRIMARY KEY (bucket_start, query)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_top_query_counts_rank ON top_query_counts (bucket_start, count)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS top_query_totals (
+            bucket_start INTEGER PRIMARY KEY,
+            total INTEGER NOT NULL
+        )
+    ''')
+
+
+def merge_bucket(conn: sqlite3.Connection, bucket_start: int, summary: SpaceSaving, capacity: int):
+    """Add a summary's counters to its stored bucket, then keep the bucket's `capacity` largest"""
+    conn.executemany('''
+        INSERT INTO top_query_counts (bucket_start, query, count, error) VALUES (?, ?, ?, ?)
+        ON CONFLICT (bucket_start, query) DO UPDATE SET
+            count = count + excluded.count, error = error + excluded.error
+    ''', [(bucket_start, item, count, summary.errors.get(item, 0)) for item, count in summary.counts.items()])
+    conn.execute('''
+        INSERT INTO top_query_totals (bucket_start, total) VALUES (?, ?)
+        ON CONFLICT (bucket_start) DO UPDATE SET total = total + excluded.total
+    ''', (bucket_start, summary.total))
+    conn.execute('''
+        DELETE FROM top_query_counts WHERE bucket_start = ? AND query NOT IN (
+            SELECT query FROM top_query_counts WHERE bucket_start = ? ORDER BY count DESC LIMIT ?
+        )
+    ''', (bucket_start, bucket_start, capacity))
+
+
+def stored_top(conn: sqlite3.Connection, since: int, limit: int) -> Tuple[List[Tuple[str, int]], int]:
+    """Counters summed over the stored buckets starting at or after `since`, and their total"""
+    items = conn.execute('''
+        SELECT query, SUM(count) AS count FROM top_query_counts WHERE bucket_start >= ?
+        GROUP BY query ORDER BY count DESC LIMIT ?
+    ''', (since, limit)).fetchall()
+    total = conn.execute('SELECT COALESCE(SUM(total), 0) FROM top_query_totals WHERE bucket_start >= ?',
+                         (since,)).fetchone()[0]
+    return [(row[0], row[1]) for row in items], total
+
+
+class TopQueryTracker:
+    """Time-windowed heavy hitters shared by every worker process.
+
+    Each process counts its queries in one Space-Saving summary per time bucket and
+    every `flush_interval` merges them into top_query_counts (merge_bucket), then
+    starts afresh, so memory stays bounded by the capacity and every worker's traffic
+    lands in the same counters. A top-K lookup sums the stored buckets in the window,
+    cached until the next flush, and adds the counts this process has not flushed yet.
+    """
+
+    def __init__(self, db: Database, capacity: int = TOP_QUERIES_CAPACITY,
+                 bucket_seconds: int = TOP_QUERIES_BUCKET_SECONDS, window_buckets: int = TOP_QUERIES_WINDOW_BUCKETS,
+                 flush_interval: float = TOP_QUERIES_FLUSH_INTERVAL):
+        self.db = db
+        self.capacity = capacity
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, SpaceSaving] = {}  # bucket start -> counts not flushed yet
+        self._stored: Dict[int, Tuple[float, List[Tuple[str, int]], int]] = {}  # cutoff -> (read at, items, total)
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+
+    def _bucket_start(self, now: float) -> int:
+        return int(now // self.bucket_seconds) * self.bucket_seconds
+
+    def offer(self, item: str):
+        if item:
+            start = self._bucket_start(time.time())
+            summary = self._pending.get(start)
+            if summary is None:
+                summary = self._pending[start] = SpaceSaving(self.capacity)
+            summary.offer(item)
+
+    def _oldest(self) -> int:
+        return self._bucket_start(time.time()) - (self.window_buckets - 1) * self.bucket_seconds
+
+    async def flush(self):
+        """Merge the unflushed summaries into SQLite and expire buckets past the window"""
+        pending, self._pending = self._pending, {}
+        oldest = self._oldest()
+
+        def merge(conn: sqlite3.Connection):
+            for start, summary in pending.items():
+                if start >= oldest:
+                    merge_bucket(conn, start, summary, self.capacity)
+            conn.execute('DELETE FROM top_query_counts WHERE bucket_start < ?', (oldest,))
+            conn.execute('DELETE FROM top_query_totals WHERE bucket_start < ?', (oldest,))
+
+        try:
+            await self.db.run_write(merge)
+            self.flushes += 1
+            self._stored.clear()
+        except Exception as e:
+            # Keep the counts for the next flush, combined with what arrived meanwhile
+            for start, summary in pending.items():
+                newer = self._pending.get(start)
+                self._pending[start] = summary if newer is None else summary.merge(newer)
+            logger.error(f"Could not flush top query counters: {e}")
+
+    async def top(self, k: int = 10, window_seconds: Optional[float] = None) -> Dict:
+        """Top-k items over the last `window_seconds` (default: the whole window), across workers"""
+        current_start = self._bucket_start(time.time())
+        buckets = self.window_buckets if window_seconds is None else max(1, -(-int(window_seconds) // self.bucket_seconds))
+        cutoff = current_start - (min(buckets, self.window_buckets) - 1) * self.bucket_seconds
+
+        cached = self._stored.get(cutoff)
+        if cached is None or time.monotonic() - cached[0] >= self.flush_interval:
+            items, total = await self.db.run_read(lambda conn: stored_top(conn, cutoff, self.capacity))
+            cached = self._stored[cutoff] = (time.monotonic(), items, total)
+        _, items, total = cached
+
+        combined: Counter = Counter(dict(items))
+        for start, summary in self._pending.items():
+            if start >= cutoff:
+                combined.update(summary.counts)
+                total += summary.total
+        return {"total": total, "items": combined.most_common(k)}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop periodic flushing and merge what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "capacity_per_bucket": self.capacity,
+            "bucket_seconds": self.bucket_seconds,
+            "window_buckets": self.window_buckets,
+            "flush_interval_seconds": self.flush_interval,
+            "pending_buckets": len(self._pending),
+            "pending_items": sum(len(summary.counts) for summary in self._pending.values()),
+            "pending_offers": sum(summary.total for summary in self._pending.values()),
+            "flushes": self.flushes
+        }
@@ -0,0 +1,179 @@
+"""Romanised Hindi (Hinglish) lexicon: maps transliterated health terms to canonical English"""
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Configuration
+HINGLISH_CACHE_SIZE = int(os.getenv("HINGLISH_CACHE_SIZE", 8192))
+
+# canonical term -> romanised spellings; routes and diseases use the same names as the
+# keyword router, symptoms use the English terms the TF-IDF matcher was fitted on
+ROUTES = {
+    "symptoms": ("lakshan", "lakshana", "lakshno", "lachhan", "lachan", "nishani"),
+    "prevention": ("bachav", "bachao", "bachaye", "bachaen", "bachen", "bachein", "bachne", "bachna",
+                   "roktham", "rokthaam", "rokna", "rokne", "rokein"),
+    "vaccination": ("tika", "teeka", "tike", "teeke", "tikakaran", "teekakaran", "tikakarn")
+}
+
+DISEASES = {
+    "malaria": ("maleria", "malariya", "maleriya", "malairiya"),
+    "dengue": ("dengu", "dengi", "dengoo", "dengue bukhar", "dengu bukhar"),
+    "covid": ("korona", "karona", "kovid", "corona virus"),
+    "typhoid": ("taifaid", "taifoid", "taifayd", "motijhara", "miyadi bukhar", "miyaadi bukhar")
+}
+
+SYMPTOMS = {
+    "fever": ("bukhar", "bukhaar", "bukar", "jwar", "jvar", "taap"),
+    "high fever": ("tez bukhar", "bahut bukhar", "zyada bukhar"),
+    "prolonged fever": ("lamba bukhar", "purana bukhar", "lagatar bukhar"),
+    "chills": ("thand", "thandi", "thand lagna", "kapkapi", "kaanpna"),
+    "headache": ("sirdard", "sir dard", "sar dard", "sardard", "sir dukhna", "sar dukhna"),
+    "nausea": ("ji michlana", "jee michlana", "ji machlana", "ji machalna", "matli"),
+    "vomiting": ("ulti", "ultee", "ulty", "ulti aana"),
+    "sweating": ("pasina", "paseena", "pasina aana"),
+    "fatigue": ("thakan", "thakaan", "thakavat", "thakawat"),
+    "weakness": ("kamzori", "kamjori", "kamzoree"),
+    "body aches": ("badan dard", "sharir dard", "sharir mein dard", "body dard"),
+    "eye pain": ("aankh dard", "ankh dard", "aankhon dard"),
+    "muscle pain": ("mansapeshi dard", "maspeshi dard"),
+    "joint pain": ("jodo dard", "jodon dard", "jod dard", "joint dard"),
+    "rash": ("chakatte", "daane", "laal daane", "dane"),
+    "bleeding": ("khoon behna", "khoon aana", "khun aana"),
+    "cough": ("khansi", "khaansi", "khasi"),
+    "breathing difficulty": ("saans dikkat", "saans taklif", "saans phoolna", "sans phulna"),
+    "loss of taste": ("swad nahi", "swaad nahi", "swad na aana"),
+    "loss of smell": ("gandh nahi", "sungh nahi", "khushbu nahi"),
+    "sore throat": ("gala kharab", "gale dard", "gala dard", "gale kharash"),
+    "stomach pain": ("pet dard", "pait dard"),
+    "constipation": ("kabj", "kabz", "kabziyat"),
+    "diarrhea": ("dast", "loose motion", "patle dast"),
+    "loss of appetite": ("bhook nahi", "bhukh nahi", "bhook na lagna"),
+    "pain": ("dard",)
+}
+
+# Grammatical fillers skipped inside a phrase, so "sir mein dard" matches "sir dard"
+FILLERS = frozenset({"me", "mein", "men", "main", "mai", "ka", "ki", "ke", "ko", "se", "lene", "hona", "hai"})
+
+# Single-word spellings that fold to common English words ("taap" -> "tap", "daane" -> "dane");
+# they only count as Hindi in a message with Hindi context
+ENGLISH_HOMOGRAPHS = frozenset({"tap", "dane"})
+# Hindi function words that mark a message as Hindi (English look-alikes such as "me" are left out)
+HINDI_CONTEXT = frozenset({"hai", "hain", "mein", "ka", "ki", "ke", "ko", "se", "mujhe", "hoon", "hu", "raha",
+                           "rahi", "rahe", "bahut", "gaya", "kya", "aur", "nahi", "tha", "thi", "ho"})
+
+_END = "#"  # trie key marking a complete phrase (folded tokens are letters only)
+
+_FOLDS = (("ph", "f"), ("w", "v"), ("z", "j"), ("q", "k"), ("ck", "k"), ("ee", "i"), ("oo", "u"))
+_REPEATS = re.compile(r"(.)\1+")
+_NON_LETTERS = re.compile(r"[^a-z]")
+
+
+@lru_cache(maxsize=HINGLISH_CACHE_SIZE)
+def fold(token: str) -> str:
+    """Spelling-insensitive key for a romanised token: "Bukhaar", "bukhār", "bukhar" -> "bukhar\""""
+    token = unicodedata.normalize("NFKD", token.lower())
+    token = _NON_LETTERS.sub("", token)
+    for spelling, sound in _FOLDS:
+        token = token.replace(spelling, sound)
+    return _REPEATS.sub(r"\1", token)
+
+
+@dataclass(frozen=True)
+class LexiconMatch:
+    route: Optional[str]                 # "symptoms" / "prevention" / "vaccination"
+    disease: Optional[str]
+    symptoms: Tuple[str, ...]            # canonical English symptom terms, in query order
+    text: str                            # the query with every recognised term in canonical English
+    matched: int                         # number of romanised terms recognised
+
+
+class HinglishLexicon:
+    """Token trie over folded romanised phrases, matched greedily longest-first.
+
+    Both the lexicon and the query are folded (case, diacritics, doubled letters and
+    common spelling swaps), so one entry covers most transliterations. Results are
+    memoised per normalised query; a miss is a single left-to-right walk of the trie.
+    A lone token that folds to an English word (ENGLISH_HOMOGRAPHS) is only read as
+    Hindi when the message has Hindi context: a HINDI_CONTEXT word or another term.
+    """
+
+    def __init__(self, routes: Dict[str, Tuple[str, ...]] = ROUTES, diseases: Dict[str, Tuple[str, ...]] = DISEASES,
+                 symptoms: Dict[str, Tuple[str, ...]] = SYMPTOMS, cache_size: int = HINGLISH_CACHE_SIZE):
+        self._root: Dict = {}
+        self.terms = 0
+        self._context = frozenset(fold(word) for word in HINDI_CONTEXT)
+        for kind, entries in (("route", routes), ("disease", diseases), ("symptom", symptoms)):
+            for canonical, spellings in entries.items():
+                for spelling in spellings:
+                    self._add(spelling, kind, canonical)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _add(self, phrase: str, kind: str, canonical: str):
+        node = self._root
+        for token in phrase.split():
+            node = node.setdefault(fold(token), {})
+        node.setdefault(_END, (kind, canonical))  # first entry wins when spellings fold together
+        self.terms += 1
+
+    def _longest(self, folded: List[str], start: int) -> Tuple[int, Optional[Tuple[str, str]]]:
+        node, end, found = self._root, start, None
+        position = start
+        while position < len(folded):
+            child = node.get(folded[position])
+            if child is None:
+                if node is self._root or folded[position] not in FILLERS:
+                    break
+                position += 1
+                continue
+            node = child
+            position += 1
+            if _END in node:
+                end, found = position, node[_END]
+        return end, found
+
+    def _match(self, text: str) -> LexiconMatch:
+        """Recognise romanised terms in a normalised (lower-case, punctuation-free) query"""
+        tokens = text.split()
+        folded = [fold(token) for token in tokens]
+        spans = []
+        position = 0
+        while position < len(tokens):
+            end, found = self._longest(folded, position)
+            spans.append((position, end, found) if found else (position, position + 1, None))
+            position = end if found else position + 1
+
+        def homograph(start: int, end: int) -> bool:
+            return end - start == 1 and folded[start] in ENGLISH_HOMOGRAPHS
+
+        hindi = (any(token in self._context for token in folded)
+                 or any(found and not homograph(start, end) for start, end, found in spans))
+        route = disease = None
+        symptoms: List[str] = []
+        output: List[str] = []
+        matched = 0
+        for start, end, found in spans:
+            if found is None or (not hindi and homograph(start, end)):
+                output.append(tokens[start])
+                continue
+            kind, canonical = found
+            if kind == "route":
+                route = route or canonical
+            elif kind == "disease":
+                disease = disease or canonical
+            else:
+                symptoms.append(canonical)
+            output.append(canonical)
+            matched += 1
+        return LexiconMatch(route, disease, tuple(symptoms), " ".join(output), matched)
+
+    def stats(self) -> Dict:
+        info = self.match.cache_info()
+        return {
+            "terms": self.terms,
+            "cache_size": info.currsize,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses
+        }
@@ -0,0 +1,68 @@
+"""App-lifetime aiohttp client for outbound data APIs"""
+import logging
+import os
+from typing import Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 100))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", 10))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", 300))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", 30))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 10))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", 15))
+
+
+class SharedHTTPClient:
+    """One pooled aiohttp session per process: keep-alive connections, per-host
+    limits, cached DNS and connect/read timeouts so a hung upstream can't hold a
+    request forever. Started on app startup and closed on shutdown.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=HTTP_TOTAL_TIMEOUT,
+            connect=HTTP_CONNECT_TIMEOUT,
+            sock_read=HTTP_READ_TIMEOUT
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            logger.info("Shared HTTP client started")
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled session (created on first use if startup hasn't run)"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> Dict:
+        connector = self._session.connector if self._session is not None and not self._session.closed else None
+        return {
+            "open": connector is not None,
+            "pool_limit": HTTP_POOL_LIMIT,
+            "limit_per_host": HTTP_LIMIT_PER_HOST,
+            "dns_cache_ttl": HTTP_DNS_TTL,
+            "timeouts": {"connect": HTTP_CONNECT_TIMEOUT, "read": HTTP_READ_TIMEOUT, "total": HTTP_TOTAL_TIMEOUT}
+        }
@@ -0,0 +1,198 @@
+"""Write-behind interaction logger with a bounded queue and group commit"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from storage import Database
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+LOG_QUEUE_SIZE = int(os.getenv("INTERACTION_LOG_QUEUE", 10000))
+LOG_BATCH_SIZE = int(os.getenv("INTERACTION_LOG_BATCH", 500))
+LOG_FLUSH_MS = float(os.getenv("INTERACTION_LOG_FLUSH_MS", 200))
+
+# Queued after the last record on shutdown so the consumer drains and exits
+_STOP = object()
+
+
+@dataclass
+class InteractionRecord:
+    user_id: str
+    query: str
+    response: str
+    confidence: float
+    timestamp: datetime
+    language: str
+    source: str
+    interaction_id: Optional[int] = None  # assigned at enqueue time, returned to the client
+    feedback: int = 0
+
+
+class InteractionLogger:
+    """Buffers interaction records and flushes them in one transaction per batch.
+
+    Request handlers call log(), which never waits on disk. A single consumer task
+    passes each batch to `writer(conn, batch)` on the database writer connection,
+    committing a batch every `batch_size` records or `flush_interval` seconds, whichever
+    comes first. When the queue is full new records are dropped and counted rather
+    than slowing down replies.
+    """
+
+    def __init__(self, db: Database, writer: Callable[[sqlite3.Connection, List[InteractionRecord]], None],
+                 max_queue: int = LOG_QUEUE_SIZE, batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_MS / 1000):
+        self.db = db
+        self.writer = writer
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._unflushed: Dict[int, InteractionRecord] = {}  # queued records by interaction_id
+
+        # Backpressure and throughput metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        # Capacity is enforced in log() so the stop sentinel always fits
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    def start(self):
+        """Start the consumer task on the running event loop"""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            if self._queue is not None and self._queue.empty():
+                self._queue = None  # rebind to the current loop on restart
+            self._task = asyncio.create_task(self._run())
+
+    def log(self, record: InteractionRecord) -> bool:
+        """Enqueue a record without blocking; returns False if it had to be dropped"""
+        if self._stopping:
+            self.dropped += 1
+            return False
+        if self.queue.qsize() >= self.max_queue:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Interaction log queue full ({self.max_queue}), dropped {self.dropped} records so far")
+            return False
+
+        self.queue.put_nowait(record)
+        if record.interaction_id is not None:
+            self._unflushed[record.interaction_id] = record
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    async def _collect(self) -> Tuple[List[InteractionRecord], bool]:
+        """Wait for the first record, then gather more until the batch is full or the window closes.
+
+        Returns the batch and whether the stop sentinel was reached.
+        """
+        item = await self.queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            # Take whatever is already queued before considering a wait
+            while len(batch) < self.batch_size and not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is _STOP:
+                    return batch, True
+                batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def pending(self, interaction_id: int) -> Optional[InteractionRecord]:
+        """A record still waiting in the queue; it can be patched until its batch is handed to the writer"""
+        return self._unflushed.get(interaction_id)
+
+    async def _flush(self, batch: List[InteractionRecord]):
+        # Writes submitted after this point queue behind the batch on the writer thread
+        for record in batch:
+            self._unflushed.pop(record.interaction_id, None)
+        started = time.perf_counter()
+        try:
+            await self.db.run_write(lambda conn: self.writer(conn, batch))
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Interaction batch write error ({len(batch)} records): {e}")
+        finally:
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    async def _run(self):
+        stopped = False
+        while not stopped:
+            batch, stopped = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    def _drain_nowait(self) -> List[InteractionRecord]:
+        records = []
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                records.append(item)
+        return records
+
+    async def flush(self):
+        """Write everything currently queued (used by shutdown and maintenance)"""
+        pending = self._drain_nowait()
+        for i in range(0, len(pending), self.batch_size):
+            await self._flush(pending[i:i + self.batch_size])
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop accepting records and drain the queue to the database"""
+        self._stopping = True
+        if self._task is not None and not self._task.done():
+            self.queue.put_nowait(_STOP)
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                logger.error("Interaction logger did not drain in time")
+        self._task = None
+        # Anything left (e.g. the consumer was never started) is written directly
+        await asyncio.wait_for(self.flush(), timeout)
+        logger.info(f"Interaction logger drained: {self.written} written, {self.dropped} dropped, {self.failed} failed")
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.max_queue,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "running": self._task is not None and not self._task.done()
+        }
@@ -0,0 +1,540 @@
+"""Month-partitioned interaction storage with a deduplicated response dictionary"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from storage import Database, claim_lease, release_lease
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+RETENTION_MONTHS = int(os.getenv("INTERACTION_RETENTION_MONTHS", 6))        # hot partitions kept in SQLite
+ARCHIVE_DIR = os.getenv("INTERACTION_ARCHIVE_DIR", "interaction_archive")
+RETENTION_INTERVAL = float(os.getenv("INTERACTION_RETENTION_INTERVAL", 86400))
+RETENTION_LEASE = "interaction_retention"  # job_leases row: one worker archives per interval
+SESSION_INDEX_SIZE = int(os.getenv("SESSION_INDEX_SIZE", 50000))          # sessions remembered for feedback
+
+PARTITION_PREFIX = "user_interactions_"
+PARTITION_PATTERN = re.compile(r"^user_interactions_(\d{6})$")
+VIEW_NAME = "user_interactions"      # read-only union of every partition, with response text
+COUNTER_NAME = "user_interactions"   # row in table_row_counts
+KNOWN_HASHES_LIMIT = 100000         # reply hashes remembered as already stored
+# Interaction IDs: milliseconds since the epoch | 8-bit node claimed per process | 12-bit sequence
+ID_NODE_BITS = 8
+ID_SEQUENCE_BITS = 12
+ARCHIVE_COLUMNS = ("id", "user_id", "query", "response_hash", "confidence", "timestamp", "language", "source", "feedback")
+
+
+def response_hash(content: str) -> str:
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def partition_name(timestamp: datetime) -> str:
+    return f"{PARTITION_PREFIX}{timestamp:%Y%m}"
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class InteractionIds:
+    """Time-ordered 63-bit interaction IDs generated before the row is written.
+
+    The millisecond timestamp in the high bits names the month partition, so a row
+    can be found from its ID alone. Each process claims a node in the
+    interaction_id_nodes table at startup (see claim), so workers sharing a database
+    never mint the same ID; the sequence allows 4096 IDs per millisecond per process.
+    """
+
+    def __init__(self, node: Optional[int] = None):
+        self.node = node
+        self._last_ms = 0
+        self._sequence = 0
+
+    def claim(self, conn: sqlite3.Connection) -> int:
+        """Claim a node no live process holds (runs in a writer transaction)"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS interaction_id_nodes (
+                node INTEGER PRIMARY KEY,
+                pid INTEGER NOT NULL,
+                claimed_at DATETIME
+            )
+        ''')
+        pid = os.getpid()
+        held = conn.execute('SELECT node FROM interaction_id_nodes WHERE pid = ?', (pid,)).fetchone()
+        if held is not None:
+            self.node = held[0]
+            return self.node
+
+        # The database is a local file, so every holder is a process on this host
+        for node, holder in conn.execute('SELECT node, pid FROM interaction_id_nodes').fetchall():
+            if not pid_alive(holder):
+                conn.execute('DELETE FROM interaction_id_nodes WHERE node = ?', (node,))
+        taken = {row[0] for row in conn.execute('SELECT node FROM interaction_id_nodes')}
+        free = [node for node in range(1 << ID_NODE_BITS) if node not in taken]
+        for node in random.sample(free, len(free)):
+            try:
+                conn.execute('INSERT INTO interaction_id_nodes (node, pid, claimed_at) VALUES (?, ?, ?)',
+                             (node, pid, datetime.now()))
+            except sqlite3.IntegrityError:
+                continue  # another process claimed it since the SELECT
+            self.node = node
+            logger.info(f"Claimed interaction ID node {node}")
+            return node
+        raise RuntimeError(f"All {1 << ID_NODE_BITS} interaction ID nodes are held by live processes")
+
+    def release(self, conn: sqlite3.Connection):
+        if self.node is not None:
+            conn.execute('DELETE FROM interaction_id_nodes WHERE node = ? AND pid = ?', (self.node, os.getpid()))
+
+    def next(self) -> int:
+        if self.node is None:
+            raise RuntimeError("InteractionIds.claim() must run before IDs are generated")
+        ms = int(time.time() * 1000)
+        if ms <= self._last_ms:
+            # Same millisecond (or the clock stepped back): keep counting from the last one
+            ms = self._last_ms
+            self._sequence += 1
+            if self._sequence >> ID_SEQUENCE_BITS:
+                ms += 1
+                self._sequence = 0
+        else:
+            self._sequence = 0
+        self._last_ms = ms
+        return (ms << (ID_NODE_BITS + ID_SEQUENCE_BITS)) | (self.node << ID_SEQUENCE_BITS) | self._sequence
+
+
+def id_timestamp(interaction_id: int) -> datetime:
+    return datetime.fromtimestamp((interaction_id >> (ID_NODE_BITS + ID_SEQUENCE_BITS)) / 1000)
+
+
+def legacy_id(row_id: int, timestamp) -> int:
+    """ID for a row migrated from the old AUTOINCREMENT table: its own timestamp in the
+    high bits, so it names the partition it lands in, and the old row id in the low bits"""
+    try:
+        stamp = datetime.fromisoformat(str(timestamp)) if timestamp is not None else datetime.now()
+    except ValueError:
+        stamp = datetime.now()
+    low_bits = ID_NODE_BITS + ID_SEQUENCE_BITS
+    return (int(stamp.timestamp() * 1000) << low_bits) | (row_id & ((1 << low_bits) - 1))
+
+
+class LastInteractionIndex:
+    """LRU map of session/user ID -> latest interaction ID"""
+
+    def __init__(self, max_entries: int = SESSION_INDEX_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def set(self, session_id: str, interaction_id: int):
+        self._entries[session_id] = interaction_id
+        self._entries.move_to_end(session_id)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[int]:
+        interaction_id = self._entries.get(session_id)
+        if interaction_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return interaction_id
+
+    def stats(self) -> Dict:
+        return {"sessions": len(self._entries), "capacity": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+def month_index(month: str) -> int:
+    """'202610' -> months since year 0, for retention arithmetic"""
+    return int(month[:4]) * 12 + int(month[4:]) - 1
+
+
+def list_partitions(conn: sqlite3.Connection) -> List[str]:
+    """Partition table names, oldest first"""
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?", (f"{PARTITION_PREFIX}%",)
+    ).fetchall()
+    return sorted(row[0] for row in rows if PARTITION_PATTERN.match(row[0]))
+
+
+class InteractionStore:
+    """Interactions go to one table per month (user_interactions_YYYYMM) and keep only a
+    hash of the reply; reply text is stored once in `responses`. The `user_interactions`
+    view joins everything back together for ad-hoc queries. Old partitions are
+    compacted into gzip'd columnar JSON files and dropped by `RetentionJob`.
+
+    Methods run on the database writer connection (see storage.Database), except
+    `export_partition`, `expired_partitions` and `latest_interaction`, which only read.
+    Other worker processes add and drop partitions too, so anything that must see
+    all of them re-reads the set from sqlite_master (list_partitions) first.
+    """
+
+    def __init__(self, retention_months: int = RETENTION_MONTHS, archive_dir: str = ARCHIVE_DIR):
+        self.retention_months = retention_months
+        self.archive_dir = archive_dir
+        self._partitions: Set[str] = set()
+        self._known_hashes: Set[str] = set()   # reply texts known to be committed
+        self._staged_hashes: Set[str] = set()  # inserted by a batch that may yet roll back
+
+    @property
+    def partitions(self) -> List[str]:
+        return sorted(self._partitions)
+
+    def _refresh_partitions(self, conn: sqlite3.Connection) -> Set[str]:
+        self._partitions = set(list_partitions(conn))
+        return self._partitions
+
+    # Schema
+    def create_schema(self, conn: sqlite3.Connection):
+        """Create the response dictionary and current partition (expects table_row_counts to exist)"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                hash TEXT PRIMARY KEY,
+                content TEXT NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feedback_comments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                interaction_id INTEGER,
+                user_id TEXT,
+                rating INTEGER,
+                comment TEXT,
+                timestamp DATETIME
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_feedback_comments_interaction ON feedback_comments (interaction_id)')
+        for name in self._refresh_partitions(conn):
+            self._index_partition(conn, name)
+
+        legacy = conn.execute(
+            "SELECT type FROM sqlite_master WHERE name = ?", (VIEW_NAME,)
+        ).fetchone()
+        migrated = legacy is not None and legacy[0] == "table"
+        if migrated:
+            self._migrate_legacy(conn)
+
+        self._ensure_partition(conn, partition_name(datetime.now()), rebuild_view=not migrated)
+        if migrated:
+            self._rebuild_view(conn)
+        if conn.execute('SELECT 1 FROM table_row_counts WHERE table_name = ?', (COUNTER_NAME,)).fetchone() is None:
+            conn.execute(
+                'INSERT INTO table_row_counts (table_name, row_count) VALUES (?, ?)',
+                (COUNTER_NAME, sum(conn.execute(f'SELECT COUNT(*) FROM {name}').fetchone()[0] for name in self._partitions))
+            )
+
+    def _ensure_partition(self, conn: sqlite3.Connection, name: str, rebuild_view: bool = True):
+        if name in self._partitions:
+            return
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT,
+                query TEXT,
+                response_hash TEXT,
+                confidence REAL,
+                timestamp DATETIME,
+                language TEXT,
+                source TEXT,
+                feedback INTEGER DEFAULT 0
+            )
+        ''')
+        self._index_partition(conn, name)
+        # Keep the shared row counter exact, as for the other counted tables
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name}_count_insert AFTER INSERT ON {name}
+            BEGIN
+                UPDATE table_row_counts SET row_count = row_count + 1 WHERE table_name = '{COUNTER_NAME}';
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name}_count_delete AFTER DELETE ON {name}
+            BEGIN
+                UPDATE table_row_counts SET row_count = row_count - 1 WHERE table_name = '{COUNTER_NAME}';
+            END
+        ''')
+        self._partitions.add(name)
+        if rebuild_view:
+            self._rebuild_view(conn)
+
+    @staticmethod
+    def _index_partition(conn: sqlite3.Connection, name: str):
+        # Serves "latest interaction for this user" when the session index misses
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name}_user_time ON {name} (user_id, timestamp)')
+
+    def _rebuild_view(self, conn: sqlite3.Connection):
+        conn.execute(f'DROP VIEW IF EXISTS {VIEW_NAME}')
+        selects = [
+            f'''SELECT p.id, p.user_id, p.query, r.content AS response, p.confidence, p.timestamp,
+                       p.language, p.source, p.feedback, p.response_hash
+                FROM {name} p LEFT JOIN responses r ON r.hash = p.response_hash'''
+            for name in sorted(self._refresh_partitions(conn))
+        ]
+        conn.execute(f'CREATE VIEW {VIEW_NAME} AS ' + ' UNION ALL '.join(selects))
+
+    def _migrate_legacy(self, conn: sqlite3.Connection):
+        """Move rows from the old single user_interactions table into partitions"""
+        conn.create_function("response_hash", 1, lambda content: response_hash(content or ""), deterministic=True)
+        conn.create_function("legacy_id", 2, legacy_id, deterministic=True)
+        conn.execute('''
+            INSERT OR IGNORE INTO responses (hash, content)
+            SELECT DISTINCT response_hash(response), IFNULL(response, '') FROM user_interactions
+        ''')
+        # Rows are re-keyed so their IDs name their month, as live IDs do; rows without
+        # a timestamp land in (and are keyed to) the current month's partition
+        month_expr = "IFNULL(strftime('%Y%m', timestamp), ?)"
+        current = f"{datetime.now():%Y%m}"
+        months = [row[0] for row in conn.execute(f"SELECT DISTINCT {month_expr} FROM user_interactions", (current,))]
+        for month in months:
+            name = f"{PARTITION_PREFIX}{month}"
+            self._ensure_partition(conn, name, rebuild_view=False)  # the legacy table still holds the view's name
+            conn.execute(f'''
+                INSERT INTO {name} (id, user_id, query, response_hash, confidence, timestamp, language, source, feedback)
+                SELECT legacy_id(id, timestamp), user_id, query, response_hash(response), confidence, timestamp,
+                       language, source, feedback
+                FROM user_interactions WHERE {month_expr} = ? ORDER BY id
+            ''', (current, month))
+        conn.execute('DROP TABLE user_interactions')
+        conn.execute('DELETE FROM table_row_counts WHERE table_name = ?', (COUNTER_NAME,))
+        logger.info(f"Migrated legacy user_interactions into {len(months)} monthly partitions")
+
+    # Writes
+    def insert(self, conn: sqlite3.Connection, records: Iterable):
+        """Insert interaction records: new reply texts once, then one executemany per month"""
+        self._promote_staged(conn)
+        by_partition: Dict[str, List[tuple]] = {}
+        new_responses: Dict[str, str] = {}
+        for record in records:
+            digest = response_hash(record.response)
+            if digest not in self._known_hashes:
+                new_responses[digest] = record.response
+            # Rows with an ID live in the partition the ID names, so lookups by ID hit one table
+            stamp = record.timestamp if record.interaction_id is None else id_timestamp(record.interaction_id)
+            by_partition.setdefault(partition_name(stamp), []).append((
+                record.interaction_id, record.user_id, record.query, digest, record.confidence,
+                record.timestamp, record.language, record.source, record.feedback
+            ))
+
+        if new_responses:
+            conn.executemany('INSERT OR IGNORE INTO responses (hash, content) VALUES (?, ?)', new_responses.items())
+        for name, rows in by_partition.items():
+            self._ensure_partition(conn, name)
+            conn.executemany(f'''
+                INSERT INTO {name} (id, user_id, query, response_hash, confidence, timestamp, language, source, feedback)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        # This transaction may still roll back, so its texts only count as stored once the
+        # next batch finds them committed; until then they are re-inserted (OR IGNORE)
+        self._staged_hashes = set(new_responses)
+
+    def _promote_staged(self, conn: sqlite3.Connection):
+        """Remember the previous batch's reply hashes, if that batch committed"""
+        staged = list(self._staged_hashes)
+        self._staged_hashes = set()
+        if len(self._known_hashes) + len(staged) > KNOWN_HASHES_LIMIT:
+            self._known_hashes.clear()
+        for i in range(0, len(staged), 500):
+            chunk = staged[i:i + 500]
+            self._known_hashes.update(row[0] for row in conn.execute(
+                f'SELECT hash FROM responses WHERE hash IN ({", ".join("?" * len(chunk))})', chunk
+            ))
+
+    def latest_interaction(self, conn: sqlite3.Connection, user_id: str) -> Optional[int]:
+        """The user's most recent interaction ID, newest partition first (indexed)"""
+        for name in reversed(list_partitions(conn)):
+            row = conn.execute(
+                f'SELECT id FROM {name} WHERE user_id = ? ORDER BY timestamp DESC LIMIT 1', (user_id,)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+        return None
+
+    def record_feedback(self, conn: sqlite3.Connection, interaction_id: int, rating, user_id: str = None,
+                        comment: str = "", update_row: bool = True) -> bool:
+        """Set the rating on one interaction by primary key and keep any comment.
+
+        Returns whether the interaction row was found (always True when update_row is False).
+        """
+        found = not update_row
+        if update_row:
+            home = partition_name(id_timestamp(interaction_id))
+            # The ID names its partition; the rest are searched by primary key only on a miss
+            partitions = self._refresh_partitions(conn)
+            for name in [home] + sorted(partitions - {home}, reverse=True):
+                if name in partitions and conn.execute(
+                    f'UPDATE {name} SET feedback = ? WHERE id = ?', (rating, interaction_id)
+                ).rowcount > 0:
+                    found = True
+                    break
+        if comment and found:
+            conn.execute(
+                'INSERT INTO feedback_comments (interaction_id, user_id, rating, comment, timestamp) VALUES (?, ?, ?, ?, ?)',
+                (interaction_id, user_id, rating, comment, datetime.now())
+            )
+        return found
+
+    # Retention
+    def expired_partitions(self, conn: sqlite3.Connection, now: Optional[datetime] = None) -> List[str]:
+        current = month_index(f"{(now or datetime.now()):%Y%m}")
+        return [
+            name for name in list_partitions(conn)
+            if current - month_index(PARTITION_PATTERN.match(name).group(1)) >= self.retention_months
+        ]
+
+    def export_partition(self, conn: sqlite3.Connection, name: str) -> Tuple[str, int]:
+        """Write one partition to a gzip'd columnar JSON file; returns (path, rows).
+
+        Only reads, so it runs on a reader connection and never holds up writes.
+        """
+        rows = conn.execute(f'SELECT {", ".join(ARCHIVE_COLUMNS)} FROM {name} ORDER BY id').fetchall()
+        hashes = sorted({row[3] for row in rows if row[3] is not None})
+        responses = {}
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            responses.update(conn.execute(
+                f'SELECT hash, content FROM responses WHERE hash IN ({", ".join("?" * len(chunk))})', chunk
+            ).fetchall())
+
+        archive = {
+            "partition": name,
+            "rows": len(rows),
+            "columns": {column: [row[i] for row in rows] for i, column in enumerate(ARCHIVE_COLUMNS)},
+            "responses": responses
+        }
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{name}.json.gz")
+        with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as f:
+            json.dump(archive, f, ensure_ascii=False, default=str)
+        os.replace(f"{path}.tmp", path)
+        return path, len(rows)
+
+    def drop_partition(self, conn: sqlite3.Connection, name: str, archived_rows: int) -> bool:
+        """Drop an exported partition, unless rows arrived after the export read it"""
+        if name not in self._refresh_partitions(conn):
+            return False  # already dropped elsewhere
+        rows = conn.execute(f'SELECT COUNT(*) FROM {name}').fetchone()[0]
+        if rows != archived_rows:
+            logger.warning(f"{name} changed while archiving ({archived_rows} -> {rows} rows); retrying next run")
+            return False
+        # DROP TABLE doesn't fire the delete trigger, so settle the counter explicitly
+        conn.execute(f'DROP TABLE {name}')
+        conn.execute('UPDATE table_row_counts SET row_count = row_count - ? WHERE table_name = ?', (rows, COUNTER_NAME))
+        self._rebuild_view(conn)
+        return True
+
+    def prune_responses(self, conn: sqlite3.Connection) -> int:
+        """Delete reply texts no remaining partition refers to"""
+        referenced = " UNION ".join(f"SELECT response_hash FROM {name}" for name in sorted(self._refresh_partitions(conn)))
+        cursor = conn.execute(f'DELETE FROM responses WHERE hash NOT IN ({referenced})')
+        self._known_hashes.clear()
+        self._staged_hashes.clear()
+        return cursor.rowcount
+
+
+def read_archive(path: str) -> List[Dict]:
+    """Load an archived partition back into row dicts (with reply text restored)"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        archive = json.load(f)
+    columns = archive["columns"]
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    for row in rows:
+        row["response"] = archive["responses"].get(row["response_hash"])
+    return rows
+
+
+class RetentionJob:
+    """Periodically archives partitions older than the retention window.
+
+    Every worker process schedules the job; a run only proceeds for the worker that
+    holds the RETENTION_LEASE row in job_leases (storage.claim_lease), which lasts
+    one interval and is renewed by each of its runs.
+    """
+
+    def __init__(self, db: Database, store: InteractionStore, interval: float = RETENTION_INTERVAL):
+        self.db = db
+        self.store = store
+        self.interval = interval
+        self._token = uuid.uuid4().hex[:12]
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.skipped = 0  # runs left to the worker holding the lease
+        self.archived: List[str] = []
+
+    @property
+    def owner(self) -> str:
+        # Forked workers inherit the token, so the PID tells them apart
+        return f"{os.getpid()}-{self._token}"
+
+    async def run_once(self) -> List[str]:
+        """Archive expired partitions: read and gzip on a reader, only the DROP takes the writer"""
+        owner = self.owner
+        if not await self.db.run_write(lambda conn: claim_lease(conn, RETENTION_LEASE, owner, self.interval)):
+            self.skipped += 1
+            return []
+        paths = []
+        for name in await self.db.run_read(self.store.expired_partitions):
+            path, rows = await self.db.run_read(lambda conn: self.store.export_partition(conn, name))
+            if await self.db.run_write(lambda conn: self.store.drop_partition(conn, name, rows)):
+                paths.append(path)
+        if paths:
+            pruned = await self.db.run_write(self.store.prune_responses)
+            logger.info(f"Archived {len(paths)} interaction partitions, pruned {pruned} unused responses")
+        self.runs += 1
+        self.archived.extend(paths)
+        return paths
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Interaction retention job failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the schedule and hand the lease to the next worker that runs"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        owner = self.owner
+        try:
+            await self.db.run_write(lambda conn: release_lease(conn, RETENTION_LEASE, owner))
+        except Exception as e:
+            logger.error(f"Could not release the retention lease: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "retention_months": self.store.retention_months,
+            "archive_dir": self.store.archive_dir,
+            "partitions": self.store.partitions,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "archived": self.archived[-20:]
+        }
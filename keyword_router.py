@@ -0,0 +1,153 @@
+"""Keyword routing: one Aho-Corasick pass finds every intent and disease keyword in a message"""
+import os
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from hinglish import DISEASES as HINGLISH_DISEASES, ROUTES as HINGLISH_ROUTES, fold
+from query_cache import normalize_query
+
+# Configuration
+ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", 8192))
+
+# route -> keywords, highest priority first (Dialogflow intents still take precedence).
+# Keywords match at the start of a word, so stems like "vaccin" cover "vaccination";
+# romanised Hindi keywords must match whole words ("tike" is not "ticket").
+ROUTE_KEYWORDS = {
+    "symptoms": ("symptom", "लक्षण", *HINGLISH_ROUTES["symptoms"]),
+    "prevention": ("prevent", "बचाव", "बचे", "बचने", "रोकथाम", *HINGLISH_ROUTES["prevention"]),
+    "vaccination": ("vaccin", "immuniz", "टीका", *HINGLISH_ROUTES["vaccination"])
+}
+
+# disease -> names in English, Hindi and romanised Hindi; add a row to route a new disease
+DISEASE_KEYWORDS = {
+    "malaria": ("malaria", "मलेरिया", *HINGLISH_DISEASES["malaria"]),
+    "dengue": ("dengue", "डेंगू", *HINGLISH_DISEASES["dengue"]),
+    "covid": ("covid", "corona", "कोविड", "कोरोना", *HINGLISH_DISEASES["covid"]),
+    "typhoid": ("typhoid", "टाइफाइड", *HINGLISH_DISEASES["typhoid"])
+}
+
+# Romanised keywords are spelled out in full (with their variants) in the Hinglish lexicon
+WHOLE_WORD_KEYWORDS = tuple(keyword for table in (HINGLISH_ROUTES, HINGLISH_DISEASES)
+                            for keywords in table.values() for keyword in keywords)
+
+
+def fold_text(text: str) -> str:
+    """Normalise a message and fold its romanised tokens (Devanagari tokens are kept as-is)"""
+    return " ".join(fold(token) or token for token in normalize_query(text).split())
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of every pattern in one scan of the text"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[List[Tuple[int, Any]]] = [[]]
+        for pattern, value in patterns:
+            self._add(pattern, value)
+        self._fail = self._link()
+
+    def _add(self, pattern: str, value: Any):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(pattern), value))
+
+    def _link(self) -> List[int]:
+        """Breadth-first failure links; each state also inherits its fallback's outputs"""
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fallback = fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[fail[child]]
+                queue.append(child)
+        return fail
+
+    def scan(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """Yield (start, end, value) for every pattern occurrence, in order of end position"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in outputs[state]:
+                yield position + 1 - length, position + 1, value
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+
+@dataclass(frozen=True)
+class RouteMatch:
+    route: Optional[str]          # highest-priority route mentioned
+    disease: Optional[str]        # first disease mentioned
+    routes: Tuple[str, ...]       # every route mentioned, by priority
+    diseases: Tuple[str, ...]     # every disease mentioned, in order of appearance
+
+
+class KeywordRouter:
+    """Routes a message from declarative keyword tables with one automaton.
+
+    Keywords and messages are folded the same way as the Hinglish lexicon, so
+    spelling variants of romanised keywords match. A hit counts only when it
+    starts a word, and for `whole_words` keywords only when it also ends one.
+    Among routes the table order decides; among diseases the earliest mention
+    wins. Results are memoised per message.
+    """
+
+    def __init__(self, routes: Dict[str, Tuple[str, ...]] = ROUTE_KEYWORDS,
+                 diseases: Dict[str, Tuple[str, ...]] = DISEASE_KEYWORDS,
+                 whole_words: Iterable[str] = WHOLE_WORD_KEYWORDS, cache_size: int = ROUTER_CACHE_SIZE):
+        self._priority = {route: rank for rank, route in enumerate(routes)}
+        whole = {fold_text(keyword) for keyword in whole_words}
+        patterns = {}
+        for kind, table in (("route", routes), ("disease", diseases)):
+            for name, keywords in table.items():
+                for keyword in keywords:
+                    folded = fold_text(keyword)
+                    patterns.setdefault(folded, (kind, name, folded in whole))  # first table entry wins
+        self.keywords = len(patterns)
+        self._automaton = AhoCorasick(patterns.items())
+        self.route = lru_cache(maxsize=cache_size)(self._route)
+
+    def _route(self, text: str) -> RouteMatch:
+        """All route and disease keywords in `text`, with the priority rules applied"""
+        folded = fold_text(text)
+        routes = set()
+        diseases: Dict[str, int] = {}
+        for start, end, (kind, name, whole) in self._automaton.scan(folded):
+            if start and folded[start - 1] != " ":
+                continue
+            if whole and end < len(folded) and folded[end] != " ":
+                continue
+            if kind == "route":
+                routes.add(name)
+            else:
+                diseases[name] = min(start, diseases.get(name, start))
+        ranked = tuple(sorted(routes, key=self._priority.__getitem__))
+        ordered = tuple(sorted(diseases, key=diseases.__getitem__))
+        return RouteMatch(ranked[0] if ranked else None, ordered[0] if ordered else None, ranked, ordered)
+
+    def stats(self) -> Dict:
+        info = self.route.cache_info()
+        return {
+            "keywords": self.keywords,
+            "automaton_states": self._automaton.states,
+            "cache_size": info.currsize,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses
+        }
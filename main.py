@@ -9,6 +9,9 @@ from datetime import datetime
 import asyncio
 from googletrans import Translator
 from dotenv import load_dotenv
+from script_analysis import contains_script
+from keyword_router import KeywordRouter, ROUTE_KEYWORDS
+from outbreak import OutbreakEngine, SeriesStore, DETECTION_HISTORY_DAYS, today_period
 
 load_dotenv()
 
@@ -383,34 +386,24 @@ async def whatsapp_webhook(request: Request):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+# "disease"/"बीमारी" also ask for symptoms in the simple bot
+simple_router = KeywordRouter({**ROUTE_KEYWORDS, "symptoms": ROUTE_KEYWORDS["symptoms"] + ("बीमारी", "disease")})
+
 async def process_with_simple_nlp(text: str) -> str:
     """Simple NLP processing for direct WhatsApp integration"""
-    text_lower = text.lower()
+    keywords = simple_router.route(text)
+    disease = {"disease": keywords.disease} if keywords.disease else {}
     
     # Symptom queries
-    if any(word in text_lower for word in ["symptom", "लक्षण", "बीमारी", "disease"]):
-        if "malaria" in text_lower or "मलेरिया" in text:
-            return await handle_symptoms_query({"disease": "malaria"})
-        elif "dengue" in text_lower or "डेंगू" in text:
-            return await handle_symptoms_query({"disease": "dengue"})
-        elif "covid" in text_lower or "कोविड" in text:
-            return await handle_symptoms_query({"disease": "covid"})
-        else:
-            return await handle_symptoms_query({})
+    if keywords.route == "symptoms":
+        return await handle_symptoms_query(disease)
     
     # Prevention queries
-    elif any(word in text_lower for word in ["prevent", "prevention", "बचाव", "रोकथाम"]):
-        if "malaria" in text_lower or "मलेरिया" in text:
-            return await handle_prevention_query({"disease": "malaria"})
-        elif "dengue" in text_lower or "डेंगू" in text:
-            return await handle_prevention_query({"disease": "dengue"})
-        elif "covid" in text_lower or "कोविड" in text:
-            return await handle_prevention_query({"disease": "covid"})
-        else:
-            return await handle_prevention_query({})
+    elif keywords.route == "prevention":
+        return await handle_prevention_query(disease)
     
     # Vaccination queries
-    elif any(word in text_lower for word in ["vaccin", "टीका", "immuniz"]):
+    elif keywords.route == "vaccination":
         return await handle_vaccination_query({})
 
     
@@ -442,7 +435,7 @@ async def translate_text(text: str, target_lang: str = 'hi') -> str:
     """Translate text to target language"""
     try:
         # Skip translation if text already contains Hindi characters
-        if any(ord(char) >= 2304 and ord(char) <= 2431 for char in text):
+        if contains_script(text, "devanagari"):
             return text
         
         result = translator.translate(text, dest=target_lang)
@@ -451,21 +444,32 @@ async def translate_text(text: str, target_lang: str = 'hi') -> str:
         return text  # Return original if translation fails
 
 # Health monitoring background task
+outbreak_engine = OutbreakEngine(SeriesStore())
+
+def fetch_case_counts(region: str):
+    """Blocking fetch of a region's daily case timeline and today's count (run in an executor)"""
+    history = requests.get(f"{DISEASE_API}/historical/{region}", params={"lastdays": DETECTION_HISTORY_DAYS}, timeout=10)
+    history.raise_for_status()
+    current = requests.get(f"{DISEASE_API}/countries/{region}", timeout=10)
+    current.raise_for_status()
+    return history.json()["timeline"]["cases"], current.json().get('todayCases', 0)
+
 async def monitor_health_trends():
     """Monitor health trends and send alerts if needed"""
+    loop = asyncio.get_running_loop()
     while True:
         try:
-            # Check for significant health trends
-            response = requests.get(f"{DISEASE_API}/countries/india")
-            if response.status_code == 200:
-                data = response.json()
-                today_cases = data.get('todayCases', 0)
-                
-                # Simple threshold-based alerting
-                if today_cases > 10000:  # Adjust threshold as needed
-                    alert_message = f"""🚨 HEALTH ALERT 🚨
+            # Refresh the case series off the event loop, then score it with the outbreak detectors
+            timeline, today_cases = await loop.run_in_executor(None, fetch_case_counts, "india")
+            days = sorted((datetime.strptime(day, "%m/%d/%y").date().toordinal(), total) for day, total in timeline.items())
+            for (_, previous), (period, total) in zip(days, days[1:]):
+                outbreak_engine.store.ingest("india", period, max(0, total - previous))
+            outbreak_engine.store.ingest("india", today_period(), today_cases)
+            
+            for alert in outbreak_engine.detect():
+                alert_message = f"""🚨 HEALTH ALERT 🚨
                     
-High number of COVID cases reported today: {today_cases:,}
+Unusual rise in COVID cases reported today: {alert.value:,.0f}
 
 Please follow safety guidelines:
 • Wear masks in public
@@ -474,9 +478,9 @@ Please follow safety guidelines:
 • Wash hands frequently
 
 Stay safe! 🙏"""
-                    
-                    # Here you would send to registered users
-                    print(f"Alert triggered: {today_cases} cases")
+                
+                # Here you would send to registered users
+                print(f"Alert triggered: {alert.value:,.0f} cases ({', '.join(alert.detectors)})")
             
             # Check every 6 hours
             await asyncio.sleep(21600)
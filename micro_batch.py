@@ -0,0 +1,123 @@
+"""Micro-batching queue: concurrent calls within a short window share one batched call"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BATCH_WINDOW_MS = float(os.getenv("MATCHER_BATCH_WINDOW_MS", 2))
+BATCH_MAX_SIZE = int(os.getenv("MATCHER_BATCH_MAX_SIZE", 64))
+
+# Upper bounds of the batch-size histogram buckets
+HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class MicroBatcher:
+    """Collects items submitted within `window_ms` (or until `max_batch`) and runs
+    `batch_fn(items) -> results` once for the whole batch on a worker thread.
+    Each caller's future resolves with its own result.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], window_ms: float = BATCH_WINDOW_MS,
+                 max_batch: int = BATCH_MAX_SIZE, name: str = "batch"):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.name = name
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()  # batches in flight, awaited by stop()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+        self.errors = 0
+        self.last_batch_ms = 0.0
+        self.histogram: Dict[int, int] = {bucket: 0 for bucket in HISTOGRAM_BUCKETS}
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+            logger.error(f"{self.name} micro-batch task failed: {task.exception()}")
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self._executor, self.batch_fn, items)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"{self.name} micro-batch of {len(items)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.last_batch_ms = (time.perf_counter() - started) * 1000
+
+        self._record(len(items))
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, size: int):
+        self.batches += 1
+        self.items += size
+        self.max_seen = max(self.max_seen, size)
+        for bucket in HISTOGRAM_BUCKETS:
+            if size <= bucket:
+                self.histogram[bucket] += 1
+                break
+        else:
+            self.histogram[HISTOGRAM_BUCKETS[-1]] += 1
+
+    async def stop(self):
+        """Run whatever is still queued, wait for in-flight batches, then release the worker thread"""
+        self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "max_batch_seen": self.max_seen,
+            "batch_size_histogram": {f"<={bucket}": count for bucket, count in self.histogram.items()},
+            "last_batch_ms": round(self.last_batch_ms, 3),
+            "errors": self.errors,
+            "pending": len(self._pending),
+            "in_flight": len(self._tasks)
+        }
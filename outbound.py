@@ -0,0 +1,201 @@
+"""Async, rate-aware outbound messaging through the Twilio REST API"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, Optional, Set
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Configuration (point TWILIO_API_BASE at a local stub server for testing)
+TWILIO_API_BASE = os.getenv("TWILIO_API_BASE", "https://api.twilio.com")
+TWILIO_ASYNC_REPLY = os.getenv("TWILIO_ASYNC_REPLY", "false").lower() in ("1", "true", "yes")
+
+# Twilio sending limits per sender: 1 msg/s for an SMS long code, 80 msg/s for a WhatsApp sender
+SMS_RATE_PER_SEC = float(os.getenv("TWILIO_SMS_RATE", 1))
+WHATSAPP_RATE_PER_SEC = float(os.getenv("TWILIO_WHATSAPP_RATE", 80))
+
+SEND_MAX_RETRIES = int(os.getenv("TWILIO_MAX_RETRIES", 3))
+SEND_BACKOFF_BASE = float(os.getenv("TWILIO_BACKOFF_BASE", 0.5))
+SEND_BACKOFF_CAP = float(os.getenv("TWILIO_BACKOFF_CAP", 8))
+SEND_RETRY_AFTER_CAP = float(os.getenv("TWILIO_RETRY_AFTER_CAP", 30))  # longest Retry-After honoured
+SEND_POOL_SIZE = int(os.getenv("TWILIO_POOL_SIZE", 20))
+SEND_TIMEOUT = float(os.getenv("TWILIO_TIMEOUT", 10))
+SEND_CONNECT_TIMEOUT = float(os.getenv("TWILIO_CONNECT_TIMEOUT", 5))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Failures before the request reached Twilio; anything later (a read timeout, a dropped
+# connection) may follow an accepted message, so retrying could deliver it twice
+CONNECT_ERRORS = (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+
+
+class TwilioSendError(Exception):
+    """Raised when Twilio rejects a message or retries are exhausted"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Twilio error {status}: {message}")
+        self.status = status
+
+
+class TokenBucket:
+    """Token bucket limiter; acquire() waits until a token is available"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # The lock keeps waiters in FIFO order so a burst drains at exactly `rate`
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class TwilioSender:
+    """Sends WhatsApp/SMS messages over a pooled aiohttp session.
+
+    Each sender number gets its own token bucket matching Twilio's per-sender limits.
+    Throttling (429), server errors and failures to connect are retried with
+    full-jitter exponential backoff, honouring Retry-After (up to a cap) when
+    Twilio sends it. A timeout or disconnect after the request was sent is not
+    retried, since Twilio may already have accepted the message.
+    """
+
+    def __init__(self, account_sid: Optional[str], auth_token: Optional[str], base_url: str = TWILIO_API_BASE,
+                 max_retries: int = SEND_MAX_RETRIES, pool_size: int = SEND_POOL_SIZE, timeout: float = SEND_TIMEOUT):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._background: Set[asyncio.Task] = set()
+
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.throttled = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.account_sid and self.auth_token)
+
+    @property
+    def messages_url(self) -> str:
+        return f"{self.base_url}/2010-04-01/Accounts/{self.account_sid}/Messages.json"
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.account_sid, self.auth_token),
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=min(self.timeout, SEND_CONNECT_TIMEOUT))
+            )
+        return self._session
+
+    def _bucket_for(self, from_: str) -> TokenBucket:
+        bucket = self._buckets.get(from_)
+        if bucket is None:
+            rate = WHATSAPP_RATE_PER_SEC if from_.startswith("whatsapp:") else SMS_RATE_PER_SEC
+            bucket = self._buckets[from_] = TokenBucket(rate)
+        return bucket
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), SEND_RETRY_AFTER_CAP)
+            except ValueError:
+                pass
+        return random.uniform(0, min(SEND_BACKOFF_CAP, SEND_BACKOFF_BASE * (2 ** attempt)))
+
+    async def send(self, from_: str, to: str, body: str) -> Dict:
+        """Send one message and return Twilio's message resource (includes `sid`)"""
+        if not self.configured:
+            raise TwilioSendError(0, "Twilio credentials not configured")
+
+        session = self._get_session()
+        bucket = self._bucket_for(from_)
+        payload = {"From": from_, "To": to, "Body": body}
+
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            retry_after = None
+            try:
+                async with session.post(self.messages_url, data=payload) as resp:
+                    if resp.status < 300:
+                        self.sent += 1
+                        return await resp.json(content_type=None)
+
+                    detail = await resp.text()
+                    if resp.status not in RETRYABLE_STATUS:
+                        self.failed += 1
+                        raise TwilioSendError(resp.status, detail)
+                    if resp.status == 429:
+                        self.throttled += 1
+                    retry_after = resp.headers.get("Retry-After")
+                    error = TwilioSendError(resp.status, detail)
+            except CONNECT_ERRORS as e:
+                error = TwilioSendError(0, str(e) or type(e).__name__)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.failed += 1
+                raise TwilioSendError(0, f"delivery unknown, not retried: {str(e) or type(e).__name__}") from e
+
+            if attempt == self.max_retries:
+                break
+            self.retries += 1
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(f"Twilio send to {to} failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+        self.failed += 1
+        raise error
+
+    def send_in_background(self, from_: str, to: str, body: str) -> asyncio.Task:
+        """Deliver a message after the webhook has been acknowledged"""
+        task = asyncio.create_task(self._send_logged(from_, to, body))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _send_logged(self, from_: str, to: str, body: str):
+        try:
+            message = await self.send(from_, to, body)
+            logger.info(f"Delivered reply to {to}: {message.get('sid')}")
+        except Exception as e:
+            logger.error(f"Background delivery to {to} failed: {e}")
+
+    async def close(self, timeout: float = 10.0):
+        """Wait for in-flight background deliveries, then close the HTTP pool"""
+        if self._background:
+            await asyncio.wait(set(self._background), timeout=timeout)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> Dict:
+        return {
+            "configured": self.configured,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "pending_background": len(self._background),
+            "senders": len(self._buckets)
+        }
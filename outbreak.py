@@ -0,0 +1,394 @@
+"""Outbreak detection: per-region daily case series in a ring buffer, scored by vectorized detectors"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from storage import Database
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DETECTION_HISTORY_DAYS = int(os.getenv("DETECTION_HISTORY_DAYS", 56))     # ring buffer length per region
+DETECTION_INTERVAL = float(os.getenv("DETECTION_INTERVAL", 900))          # detect (and poll, if given) every 15 minutes
+DETECTION_RETRY_INTERVAL = float(os.getenv("DETECTION_RETRY_INTERVAL", 3600))  # after a failed poll
+DETECTION_COOLDOWN = float(os.getenv("DETECTION_COOLDOWN", 86400))        # one alert per region per day, across workers
+DETECTION_MIN_CASES = float(os.getenv("DETECTION_MIN_CASES", 20))         # ignore spikes below this count
+DETECTION_MIN_VOTES = int(os.getenv("DETECTION_MIN_VOTES", 1))            # detectors that must agree
+OUTBREAK_STORE_PATH = os.getenv("OUTBREAK_STORE_PATH", "outbreak_series.npz")
+
+
+def today_period() -> int:
+    return date.today().toordinal()
+
+
+class SeriesStore:
+    """Daily values for many regions in one (regions x days) float32 ring buffer.
+
+    Column `period % capacity` holds each day, so ingesting is an O(1) write and a
+    detection pass reads every region's window with one gather. Days with no data
+    are NaN; regions are added by growing the row dimension geometrically.
+    """
+
+    def __init__(self, capacity: int = DETECTION_HISTORY_DAYS, initial_regions: int = 64):
+        self.capacity = capacity
+        self.regions: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._values = np.full((initial_regions, capacity), np.nan, dtype=np.float32)
+        self.latest: Optional[int] = None  # newest period stored
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    def __contains__(self, region: str) -> bool:
+        return region in self._index
+
+    def _row(self, region: str) -> int:
+        row = self._index.get(region)
+        if row is None:
+            row = self._index[region] = len(self.regions)
+            self.regions.append(region)
+            if row == len(self._values):
+                grown = np.full((len(self._values) * 2, self.capacity), np.nan, dtype=np.float32)
+                grown[:row] = self._values
+                self._values = grown
+        return row
+
+    def _advance(self, period: int):
+        """Clear the columns of days skipped since the newest period"""
+        if self.latest is None:
+            self.latest = period
+            return
+        if period <= self.latest:
+            return
+        stale = np.arange(self.latest + 1, min(period, self.latest + self.capacity) + 1) % self.capacity
+        self._values[:, stale] = np.nan
+        self.latest = period
+
+    def ingest(self, region: str, period: int, value: float):
+        self.ingest_many([region], period, [value])
+
+    def ingest_many(self, regions: Sequence[str], period: int, values: Sequence[float]):
+        """Store one day's value for several regions; days older than the window are dropped"""
+        self._advance(period)
+        if period <= self.latest - self.capacity:
+            return
+        rows = np.fromiter((self._row(region) for region in regions), dtype=np.intp, count=len(regions))
+        self._values[rows, period % self.capacity] = values
+
+    def window(self, period: Optional[int] = None) -> np.ndarray:
+        """(regions x capacity) matrix ordered oldest -> newest, ending at `period` (default: newest)"""
+        end = self.latest if period is None else period
+        if end is None:
+            return np.empty((0, self.capacity), dtype=np.float32)
+        columns = np.arange(end - self.capacity + 1, end + 1) % self.capacity
+        return self._values[:len(self.regions), columns]
+
+    def save(self, path: str):
+        temp_path = f"{path}.{os.getpid()}.tmp"  # workers may save the same snapshot concurrently
+        with open(temp_path, "wb") as f:
+            np.savez(f, regions=np.array(self.regions, dtype=str), values=self._values[:len(self.regions)],
+                     latest=np.array(-1 if self.latest is None else self.latest))
+        os.replace(temp_path, path)
+
+    def load(self, path: str):
+        with np.load(path) as data:
+            values = data["values"]
+            if values.shape[1] != self.capacity:
+                raise ValueError(f"snapshot holds {values.shape[1]} days, store expects {self.capacity}")
+            regions = [str(region) for region in data["regions"]]
+            latest = int(data["latest"])
+        self.regions = []
+        self._index = {}
+        self._values = np.full((max(64, len(regions)), self.capacity), np.nan, dtype=np.float32)
+        for region in regions:
+            self._row(region)
+        self._values[:len(regions)] = values
+        self.latest = None if latest < 0 else latest
+
+
+def _masked_moments(values: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Row-wise (weighted) mean, std and sample count, ignoring NaNs"""
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    weights = present if weights is None else present * weights
+    total = weights.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (weights * filled).sum(axis=1) / total
+        variance = (weights * (filled - mean[:, None]) ** 2).sum(axis=1) / total
+    return mean, np.sqrt(variance), present.sum(axis=1)
+
+
+def _floor_std(mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+    """Counts are roughly Poisson, so never trust a spread below sqrt(mean) (or 1)"""
+    return np.maximum(std, np.sqrt(np.maximum(mean, 1.0)))
+
+
+class Detector(ABC):
+    """Scores the newest day of every region at once; scores above `threshold` fire"""
+
+    name = "detector"
+    threshold = 3.0
+    min_points = 7  # history required before a region is scored
+
+    @abstractmethod
+    def score(self, series: np.ndarray) -> np.ndarray:
+        """(regions x days) window -> one score per region, NaN where a region cannot be scored"""
+
+
+class EWMADetector(Detector):
+    """Today against an exponentially weighted mean/std of the preceding days"""
+
+    name = "ewma"
+
+    def __init__(self, alpha: float = 0.2, threshold: float = 3.0):
+        self.alpha = alpha
+        self.threshold = threshold
+
+    def score(self, series: np.ndarray) -> np.ndarray:
+        history, current = series[:, :-1], series[:, -1]
+        weights = (1 - self.alpha) ** np.arange(history.shape[1] - 1, -1, -1)
+        mean, std, count = _masked_moments(history, weights)
+        with np.errstate(invalid="ignore"):
+            z = (current - mean) / _floor_std(mean, std)
+        return np.where(count >= self.min_points, z, np.nan)
+
+
+class CUSUMDetector(Detector):
+    """One-sided CUSUM over the last `recent` days against the baseline before them.
+
+    Catches sustained rises that stay below a single-day z threshold.
+    """
+
+    name = "cusum"
+
+    def __init__(self, recent: int = 7, slack: float = 0.5, threshold: float = 5.0):
+        self.recent = recent
+        self.slack = slack
+        self.threshold = threshold
+
+    def score(self, series: np.ndarray) -> np.ndarray:
+        baseline, recent = series[:, :-self.recent], series[:, -self.recent:]
+        mean, std, count = _masked_moments(baseline)
+        std = _floor_std(mean, std)
+        total = np.zeros(len(series))
+        with np.errstate(invalid="ignore"):
+            for day in range(recent.shape[1]):  # loop over days; each step covers every region
+                z = np.nan_to_num((recent[:, day] - mean) / std)
+                total = np.maximum(0.0, total + z - self.slack)
+        return np.where((count >= self.min_points) & ~np.isnan(series[:, -1]), total, np.nan)
+
+
+class SeasonalZDetector(Detector):
+    """Today against the same weekday in earlier weeks (reporting has a weekly cycle)"""
+
+    name = "seasonal_z"
+    min_points = 3
+
+    def __init__(self, season: int = 7, threshold: float = 3.0):
+        self.season = season
+        self.threshold = threshold
+
+    def score(self, series: np.ndarray) -> np.ndarray:
+        lags = np.arange(series.shape[1] - 1 - self.season, -1, -self.season)
+        mean, std, count = _masked_moments(series[:, lags])
+        with np.errstate(invalid="ignore"):
+            z = (series[:, -1] - mean) / _floor_std(mean, std)
+        return np.where(count >= self.min_points, z, np.nan)
+
+
+def default_detectors() -> List[Detector]:
+    return [EWMADetector(), CUSUMDetector(), SeasonalZDetector()]
+
+
+@dataclass
+class OutbreakAlert:
+    region: str
+    period: int                   # day (ordinal) the alert is for
+    value: float                  # today's count
+    detectors: Tuple[str, ...]    # detectors that fired
+    scores: Dict[str, float]
+
+    @property
+    def severity(self) -> str:
+        return "high" if len(self.detectors) >= 2 else "medium"
+
+
+def create_outbreak_schema(conn: sqlite3.Connection):
+    # Alerts raised so far, shared by every worker: one row per region and day
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS outbreak_alerts (
+            region TEXT NOT NULL,
+            period INTEGER NOT NULL,
+            alerted_at REAL NOT NULL,
+            value REAL,
+            detectors TEXT,
+            PRIMARY KEY (region, period)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_outbreak_alerts_recent ON outbreak_alerts (region, alerted_at)')
+
+
+def claim_alert(conn: sqlite3.Connection, alert: OutbreakAlert, cooldown: float, now: float) -> bool:
+    """Record an alert unless its region already alerted for that day or within the cooldown.
+
+    One INSERT decides, so when several workers detect the same outbreak exactly one
+    of them gets True and raises it.
+    """
+    return conn.execute('''
+        INSERT INTO outbreak_alerts (region, period, alerted_at, value, detectors)
+        SELECT ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (SELECT 1 FROM outbreak_alerts WHERE region = ? AND alerted_at > ?)
+        ON CONFLICT (region, period) DO NOTHING
+    ''', (alert.region, alert.period, now, alert.value, json.dumps(alert.detectors),
+          alert.region, now - cooldown)).rowcount > 0
+
+
+class OutbreakEngine:
+    """Runs every detector over every region and turns firings into deduplicated alerts"""
+
+    def __init__(self, store: SeriesStore, detectors: Optional[List[Detector]] = None,
+                 cooldown: float = DETECTION_COOLDOWN, min_cases: float = DETECTION_MIN_CASES,
+                 min_votes: int = DETECTION_MIN_VOTES):
+        self.store = store
+        self.detectors = detectors or default_detectors()
+        self.cooldown = cooldown
+        self.min_cases = min_cases
+        self.min_votes = min_votes
+        self._last_alert: Dict[str, float] = {}  # region -> when it last alerted
+
+        self.runs = 0
+        self.alerts = 0
+        self.suppressed = 0
+        self.last_run_ms = 0.0
+
+    def detect(self, now: Optional[float] = None) -> List[OutbreakAlert]:
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        series = self.store.window().astype(np.float64)
+        if not len(series):
+            return []
+
+        scores = np.stack([detector.score(series) for detector in self.detectors])
+        thresholds = np.array([detector.threshold for detector in self.detectors])[:, None]
+        fired = np.nan_to_num(scores, nan=-np.inf) > thresholds
+        current = series[:, -1]
+        candidates = np.flatnonzero((fired.sum(axis=0) >= self.min_votes) & (current >= self.min_cases))
+
+        alerts = []
+        for row in candidates:
+            region = self.store.regions[row]
+            if now - self._last_alert.get(region, -np.inf) < self.cooldown:
+                self.suppressed += 1
+                continue
+            self._last_alert[region] = now
+            alerts.append(OutbreakAlert(
+                region=region,
+                period=self.store.latest,
+                value=float(current[row]),
+                detectors=tuple(d.name for d, hit in zip(self.detectors, fired[:, row]) if hit),
+                scores={d.name: round(float(s), 2) for d, s in zip(self.detectors, scores[:, row]) if not np.isnan(s)}
+            ))
+
+        self.runs += 1
+        self.alerts += len(alerts)
+        self.last_run_ms = (time.perf_counter() - started) * 1000
+        return alerts
+
+    def stats(self) -> Dict:
+        return {
+            "regions": len(self.store),
+            "history_days": self.store.capacity,
+            "detectors": {d.name: d.threshold for d in self.detectors},
+            "runs": self.runs,
+            "alerts": self.alerts,
+            "suppressed_by_cooldown": self.suppressed,
+            "last_run_ms": round(self.last_run_ms, 3)
+        }
+
+
+class OutbreakMonitor:
+    """Scheduled poll -> ingest -> detect -> alert loop around an OutbreakEngine
+
+    Pass poll=None when the store is fed elsewhere (e.g. by a RegionPoller) and only
+    detection should run on the schedule. With a `db`, every worker process runs a
+    monitor and each alert is claimed in the shared outbreak_alerts table first
+    (claim_alert), so only one of them raises it and the cooldown survives restarts.
+    """
+
+    def __init__(self, engine: OutbreakEngine, poll: Optional[Callable[[SeriesStore], Awaitable[None]]],
+                 on_alert: Callable[[OutbreakAlert], Awaitable[None]], interval: float = DETECTION_INTERVAL,
+                 path: Optional[str] = OUTBREAK_STORE_PATH, db: Optional[Database] = None):
+        self.engine = engine
+        self.poll = poll
+        self.on_alert = on_alert
+        self.interval = interval
+        self.path = path
+        self.db = db
+        self._task: Optional[asyncio.Task] = None
+        self.errors = 0
+        self.claimed_elsewhere = 0  # alerts another worker (or an earlier process) already raised
+
+    def load(self):
+        """Restore the series saved by a previous process so detectors keep their history"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            self.engine.store.load(self.path)
+            logger.info(f"Loaded outbreak series for {len(self.engine.store)} regions from {self.path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not read outbreak series {self.path}: {e}")
+
+    async def run_once(self):
+        if self.poll is not None:
+            await self.poll(self.engine.store)
+        now = time.time()
+        for alert in self.engine.detect(now):
+            if self.db is not None and not await self.db.run_write(
+                lambda conn: claim_alert(conn, alert, self.engine.cooldown, now)
+            ):
+                self.claimed_elsewhere += 1
+                continue
+            await self.on_alert(alert)
+        if self.path:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.engine.store.save, self.path)
+            except OSError as e:
+                logger.error(f"Could not write outbreak series {self.path}: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+                await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Outbreak monitoring error: {e}")
+                await asyncio.sleep(min(self.interval, DETECTION_RETRY_INTERVAL))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {**self.engine.stats(), "interval_seconds": self.interval, "errors": self.errors,
+                "claimed_elsewhere": self.claimed_elsewhere}
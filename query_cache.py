@@ -0,0 +1,103 @@
+"""Size-bounded LRU + TTL cache for processed query replies"""
+import json
+import os
+import string
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Configuration
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 5000))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", 600))
+
+# Invalidation scopes; each has its own generation counter
+SCOPES = ("knowledge_base", "catalog")
+
+_PUNCTUATION = str.maketrans({char: " " for char in string.punctuation + "।॥“”‘’"})
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace (Devanagari matras are kept)"""
+    return " ".join(query.lower().translate(_PUNCTUATION).split())
+
+
+class QueryCache:
+    """LRU cache with per-entry TTL and generation-based invalidation.
+
+    Entries remember the knowledge base and catalog generations they were built
+    against; bumping a scope's generation invalidates exactly the entries built
+    before it, lazily on their next lookup.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple[int, ...], Any]]" = OrderedDict()
+        self.generations = {scope: 0 for scope in SCOPES}
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stale = 0
+        self.evictions = 0
+        self.invalidations = {scope: 0 for scope in SCOPES}
+
+    @staticmethod
+    def make_key(query: str, intent: str, parameters: Dict, language: str) -> Hashable:
+        params = json.dumps(parameters or {}, sort_keys=True, ensure_ascii=False, default=str)
+        return normalize_query(query), intent or "", params, language
+
+    def _current(self) -> Tuple[int, ...]:
+        return tuple(self.generations[scope] for scope in SCOPES)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires, generations, value = entry
+        if expires < time.monotonic():
+            self.expired += 1
+        elif generations != self._current():
+            self.stale += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, self._current(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, scope: str):
+        """Invalidate every entry built before now for one scope, or "all\""""
+        scopes = SCOPES if scope == "all" else (scope,)
+        for name in scopes:
+            if name not in self.generations:
+                raise ValueError(f"Unknown cache scope: {name}")
+            self.generations[name] += 1
+            self.invalidations[name] += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "expired": self.expired,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "generations": dict(self.generations),
+            "invalidations": dict(self.invalidations)
+        }
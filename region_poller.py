@@ -0,0 +1,217 @@
+"""Concurrent, adaptive polling of per-region case data with conditional requests"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from http_client import SharedHTTPClient
+
+logger = logging.getLogger(__name__)
+
+# Configuration (point COVID_DATA_API at a local mock disease.sh server for testing)
+COVID_DATA_API = os.getenv("COVID_DATA_API", "https://disease.sh/v3/covid-19")
+OUTBREAK_REGIONS = os.getenv("OUTBREAK_REGIONS", "india")            # comma-separated countries
+OUTBREAK_REGIONS_FILE = os.getenv("OUTBREAK_REGIONS_FILE")             # JSON {region: endpoint path}
+POLL_CONCURRENCY = int(os.getenv("POLL_CONCURRENCY", 10))
+POLL_BASE_INTERVAL = float(os.getenv("POLL_BASE_INTERVAL", 21600))
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", 900))        # hot regions
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", 43200))      # quiet or unchanged regions
+POLL_JITTER = float(os.getenv("POLL_JITTER", 0.1))                    # +/- fraction of each interval
+POLL_STARTUP_SPREAD = float(os.getenv("POLL_STARTUP_SPREAD", 60))     # first polls spread over this many seconds
+
+# Relative change in the polled value that makes a region hotter / cooler
+POLL_HOT_CHANGE = 0.25
+POLL_STABLE_CHANGE = 0.05
+
+# on_data(region, payload) ingests a fresh payload and returns the value it observed
+DataHandler = Callable[[str, Dict], Awaitable[Optional[float]]]
+
+
+def load_regions() -> Dict[str, str]:
+    """Region name -> endpoint path, from OUTBREAK_REGIONS plus the optional JSON file"""
+    regions = {name.strip().lower(): f"countries/{name.strip().lower()}"
+               for name in OUTBREAK_REGIONS.split(",") if name.strip()}
+    if OUTBREAK_REGIONS_FILE:
+        with open(OUTBREAK_REGIONS_FILE, encoding="utf-8") as f:
+            regions.update({name.lower(): path for name, path in json.load(f).items()})
+    return regions
+
+
+class RegionState:
+    """Polling state for one region endpoint"""
+
+    __slots__ = ("name", "path", "interval", "next_due", "etag", "last_modified", "value",
+                 "polls", "not_modified", "failures")
+
+    def __init__(self, name: str, path: str, interval: float):
+        self.name = name
+        self.path = path
+        self.interval = interval
+        self.next_due: Optional[float] = None   # None while a poll is in flight
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.value: Optional[float] = None
+        self.polls = 0
+        self.not_modified = 0
+        self.failures = 0                       # consecutive
+
+
+class RegionPoller:
+    """Polls many region endpoints on independent, adaptive schedules.
+
+    Due regions come off a min-heap keyed by due time and are fetched through a
+    bounded semaphore on the shared HTTP session. Each region's interval shrinks
+    when its value moves sharply (or when mark_hot() is called after an alert)
+    and grows while it is unchanged or answering 304 Not Modified to the ETag /
+    If-Modified-Since validators. Every delay is jittered so regions polled at
+    the same interval drift apart instead of bursting together.
+    """
+
+    def __init__(self, http: SharedHTTPClient, regions: Dict[str, str], on_data: DataHandler,
+                 base_url: str = COVID_DATA_API, concurrency: int = POLL_CONCURRENCY,
+                 base_interval: float = POLL_BASE_INTERVAL, min_interval: float = POLL_MIN_INTERVAL,
+                 max_interval: float = POLL_MAX_INTERVAL, jitter: float = POLL_JITTER,
+                 startup_spread: float = POLL_STARTUP_SPREAD):
+        self.http = http
+        self.on_data = on_data
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.startup_spread = startup_spread
+        self._states = {name: RegionState(name, path, base_interval) for name, path in regions.items()}
+        self._heap: List[Tuple[float, str]] = []
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+        self.polls = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.active = 0
+        self.max_active = 0
+
+    def _schedule(self, state: RegionState, delay: float):
+        state.next_due = time.monotonic() + delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+        heapq.heappush(self._heap, (state.next_due, state.name))
+        if self._wake is not None:
+            self._wake.set()
+
+    def mark_hot(self, region: str):
+        """Poll a region at the minimum interval from now on (e.g. after it raised an alert)"""
+        state = self._states.get(region)
+        if state is None:
+            return
+        state.interval = self.min_interval
+        if state.next_due is not None and state.next_due > time.monotonic() + self.min_interval:
+            self._schedule(state, self.min_interval)  # the old heap entry is skipped as stale
+
+    def _adapt(self, state: RegionState, value: Optional[float]):
+        previous, state.value = state.value, value
+        if value is None or previous is None:
+            return
+        change = abs(value - previous) / max(abs(previous), 1.0)
+        if change >= POLL_HOT_CHANGE:
+            state.interval = max(self.min_interval, state.interval / 2)
+        elif change <= POLL_STABLE_CHANGE:
+            state.interval = min(self.max_interval, state.interval * 1.5)
+        else:
+            state.interval = self.base_interval
+
+    async def _poll(self, state: RegionState):
+        delay = state.interval
+        async with self._semaphore:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            headers = {}
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+            try:
+                async with self.http.session.get(f"{self.base_url}/{state.path}", headers=headers) as resp:
+                    state.polls += 1
+                    self.polls += 1
+                    if resp.status == 304:
+                        state.not_modified += 1
+                        self.not_modified += 1
+                        state.interval = min(self.max_interval, state.interval * 1.5)
+                    else:
+                        resp.raise_for_status()
+                        payload = await resp.json()
+                        state.etag = resp.headers.get("ETag")
+                        state.last_modified = resp.headers.get("Last-Modified")
+                        self._adapt(state, await self.on_data(state.name, payload))
+                state.failures = 0
+                delay = state.interval
+            except Exception as e:
+                # Back off a failing endpoint without touching its learned interval
+                state.failures += 1
+                self.errors += 1
+                delay = min(self.max_interval, state.interval * 2 ** state.failures)
+                logger.warning(f"Polling {state.name} failed ({state.failures} in a row): {e}")
+            finally:
+                self.active -= 1
+                self._schedule(state, delay)
+
+    async def _run(self):
+        for state in self._states.values():
+            state.next_due = time.monotonic() + random.uniform(0, self.startup_spread)
+            heapq.heappush(self._heap, (state.next_due, state.name))
+        while True:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                due, name = heapq.heappop(self._heap)
+                state = self._states[name]
+                if state.next_due != due:
+                    continue  # rescheduled since this entry was pushed
+                state.next_due = None
+                task = asyncio.create_task(self._poll(state))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+            self._wake.clear()
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = [task for task in (self._task, *self._inflight) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._heap.clear()
+
+    def stats(self) -> Dict:
+        intervals = [state.interval for state in self._states.values()]
+        return {
+            "regions": len(self._states),
+            "concurrency": self.concurrency,
+            "in_flight": len(self._inflight),
+            "max_concurrent_seen": self.max_active,
+            "polls": self.polls,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "hot_regions": sum(interval < self.base_interval for interval in intervals),
+            "interval_seconds": {
+                "min": min(intervals),
+                "median": statistics.median(intervals),
+                "max": max(intervals)
+            } if intervals else {}
+        }
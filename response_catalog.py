@@ -0,0 +1,178 @@
+"""Precompiled multilingual response catalog.
+
+Every static reply the bot can serve is compiled ahead of time into a versioned
+catalog keyed by (intent, disease, lang), so serving a reply is a dict lookup
+instead of a machine translation. Build it with:
+
+    python response_catalog.py [--languages en,hi,bn]
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from types import MappingProxyType
+from typing import Awaitable, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from script_analysis import in_language_script
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CATALOG_PATH = os.getenv("RESPONSE_CATALOG_PATH", "response_catalog.json")
+CATALOG_LANGUAGES = tuple(lang.strip() for lang in os.getenv("CATALOG_LANGUAGES", "en,hi").split(",") if lang.strip())
+SOURCE_LANG = "en"
+CATALOG_FORMAT = 1  # bump when the saved layout or how entries are built changes; older files are rebuilt
+
+SourceKey = Tuple[str, str]          # (intent, disease)
+CatalogKey = Tuple[str, str, str]    # (intent, disease, lang)
+
+
+def fingerprint(sources: Mapping[SourceKey, str]) -> str:
+    """Stable hash of the source texts, used to detect stale catalogs"""
+    digest = hashlib.sha256()
+    for (intent, disease), text in sorted(sources.items()):
+        digest.update(f"{intent}\0{disease}\0{text}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCatalog:
+    """Immutable (intent, disease, lang) -> response text map"""
+
+    def __init__(self, entries: Mapping[CatalogKey, str], source_fingerprint: str,
+                 languages: Iterable[str], built_at: Optional[str] = None):
+        self._entries = MappingProxyType(dict(entries))
+        self.source_fingerprint = source_fingerprint
+        self.languages = tuple(languages)
+        self.built_at = built_at or datetime.now().isoformat(timespec="seconds")
+        self.version = f"{CATALOG_FORMAT}.{source_fingerprint[:12]}"
+
+    def get(self, intent: str, disease: str, lang: str) -> Optional[str]:
+        return self._entries.get((intent, disease, lang))
+
+    def lookup(self, key: Optional[SourceKey], lang: str) -> Optional[str]:
+        """Look up a (intent, disease) key from a HealthResponse in the given language"""
+        if key is None:
+            return None
+        return self._entries.get((key[0], key[1], lang))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "languages": list(self.languages),
+            "entries": len(self._entries)
+        }
+
+    def save(self, path: str = CATALOG_PATH):
+        payload = {
+            "format": CATALOG_FORMAT,
+            "source_fingerprint": self.source_fingerprint,
+            "languages": list(self.languages),
+            "built_at": self.built_at,
+            "entries": [
+                {"intent": intent, "disease": disease, "lang": lang, "content": content}
+                for (intent, disease, lang), content in sorted(self._entries.items())
+            ]
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = CATALOG_PATH) -> "ResponseCatalog":
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("format") != CATALOG_FORMAT:
+            raise ValueError(f"Unsupported catalog format: {payload.get('format')}")
+        entries = {(e["intent"], e["disease"], e["lang"]): e["content"] for e in payload["entries"]}
+        return cls(entries, payload["source_fingerprint"], payload["languages"], payload.get("built_at"))
+
+
+def compile_catalog(sources: Mapping[SourceKey, str], languages: Iterable[str] = CATALOG_LANGUAGES,
+                    translations: Optional[Mapping[str, Mapping[SourceKey, str]]] = None) -> ResponseCatalog:
+    """Compile source texts plus any available translations into a catalog.
+
+    Only texts written mostly in a language's script are passed through as that
+    language, matching translate_with_fallback; bilingual texts need a translation.
+    Entries with no translation are left out, and callers fall back to runtime
+    translation for them.
+    """
+    languages = tuple(languages)
+    translations = translations or {}
+    entries: Dict[CatalogKey, str] = {}
+
+    for (intent, disease), text in sources.items():
+        for lang in languages:
+            if lang == SOURCE_LANG or in_language_script(text, lang):
+                entries[(intent, disease, lang)] = text
+            elif (intent, disease) in translations.get(lang, {}):
+                entries[(intent, disease, lang)] = translations[lang][(intent, disease)]
+
+    return ResponseCatalog(entries, fingerprint(sources), languages)
+
+
+async def translate_sources(sources: Mapping[SourceKey, str], languages: Iterable[str],
+                            translate: Callable[[str, str], Awaitable[str]]) -> Dict[str, Dict[SourceKey, str]]:
+    """Machine-translate every source text that the catalog can't pass through"""
+    translations: Dict[str, Dict[SourceKey, str]] = {}
+    for lang in languages:
+        if lang == SOURCE_LANG:
+            continue
+        keys = [key for key, text in sources.items() if not in_language_script(text, lang)]
+        results = await asyncio.gather(*(translate(sources[key], lang) for key in keys), return_exceptions=True)
+        translations[lang] = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Catalog translation failed for {key} -> {lang}: {result}")
+            else:
+                translations[lang][key] = result
+    return translations
+
+
+def load_or_compile(sources: Mapping[SourceKey, str], path: str = CATALOG_PATH,
+                    languages: Iterable[str] = CATALOG_LANGUAGES) -> ResponseCatalog:
+    """Load the built catalog if it matches the current sources, else compile pass-through entries"""
+    current = fingerprint(sources)
+    if os.path.exists(path):
+        try:
+            catalog = ResponseCatalog.load(path)
+            if catalog.source_fingerprint == current:
+                logger.info(f"Loaded response catalog {catalog.version} ({len(catalog)} entries)")
+                return catalog
+            logger.warning(f"Response catalog {path} is stale; run `python response_catalog.py` to rebuild")
+        except Exception as e:
+            logger.error(f"Response catalog load error: {e}")
+
+    catalog = compile_catalog(sources, languages)
+    logger.info(f"Compiled in-memory response catalog {catalog.version} ({len(catalog)} entries)")
+    return catalog
+
+
+async def build(path: str = CATALOG_PATH, languages: Iterable[str] = CATALOG_LANGUAGES) -> ResponseCatalog:
+    """Translate every knowledge base response and write the catalog to disk"""
+    import healthcare_chatbot_sih as chatbot
+
+    chatbot.init_database()  # the translation cache lives in SQLite; the app only opens it at startup
+    sources = chatbot.catalog_sources()
+    translations = await translate_sources(sources, languages, chatbot.translation_cache.translate)
+    catalog = compile_catalog(sources, languages, translations)
+    catalog.save(path)
+    return catalog
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the precompiled response catalog")
+    parser.add_argument("--output", default=CATALOG_PATH)
+    parser.add_argument("--languages", default=",".join(CATALOG_LANGUAGES))
+    args = parser.parse_args()
+
+    built = asyncio.run(build(args.output, [lang.strip() for lang in args.languages.split(",") if lang.strip()]))
+    print(f"Wrote {args.output}: {built.info()}")
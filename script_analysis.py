@@ -0,0 +1,96 @@
+"""Single-pass Unicode script analysis shared by language detection and translation"""
+import os
+from collections import Counter
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
+
+# Configuration
+SCRIPT_CACHE_SIZE = int(os.getenv("SCRIPT_CACHE_SIZE", 4096))
+SCRIPT_LANGUAGE_THRESHOLD = 0.3  # share of a script's characters that makes a message that language
+SCRIPT_NATIVE_THRESHOLD = 0.8    # share that makes a text already written in that language (not bilingual)
+
+# Unicode blocks (inclusive) for the scripts we classify
+SCRIPT_RANGES = {
+    "latin": ((0x41, 0x5A), (0x61, 0x7A), (0xC0, 0xD6), (0xD8, 0xF6), (0xF8, 0x24F)),
+    "devanagari": ((0x0900, 0x097F),),
+    "bengali": ((0x0980, 0x09FF),),
+    "gurmukhi": ((0x0A00, 0x0A7F),),
+    "gujarati": ((0x0A80, 0x0AFF),),
+    "oriya": ((0x0B00, 0x0B7F),),
+    "tamil": ((0x0B80, 0x0BFF),),
+    "telugu": ((0x0C00, 0x0C7F),),
+    "kannada": ((0x0C80, 0x0CFF),),
+    "malayalam": ((0x0D00, 0x0D7F),)
+}
+
+# Language code for each script (Devanagari is read as Hindi)
+SCRIPT_LANGUAGES = {
+    "latin": "en", "devanagari": "hi", "bengali": "bn", "gurmukhi": "pa", "gujarati": "gu",
+    "oriya": "or", "tamil": "ta", "telugu": "te", "kannada": "kn", "malayalam": "ml"
+}
+LANGUAGE_SCRIPTS = {language: script for script, language in SCRIPT_LANGUAGES.items()}
+
+# Every classified code point maps to a private-use tag character for its script, so one
+# str.translate plus one Counter pass (both in C) counts all scripts at once
+_TAGS = {chr(0xE000 + i): script for i, script in enumerate(SCRIPT_RANGES)}
+_TAG_TABLE = {
+    code: tag
+    for tag, script in _TAGS.items()
+    for start, end in SCRIPT_RANGES[script]
+    for code in range(start, end + 1)
+}
+
+
+class ScriptProfile:
+    """Per-script character counts for one text (shared between callers, read-only)"""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, counts: Dict[str, int]):
+        self.counts: Mapping[str, int] = MappingProxyType(counts)
+        self.total = sum(counts.values())
+
+    def ratio(self, script: str) -> float:
+        return self.counts.get(script, 0) / self.total if self.total else 0.0
+
+    def ratios(self) -> Dict[str, float]:
+        return {script: round(count / self.total, 4) for script, count in self.counts.items()}
+
+    def has(self, script: str) -> bool:
+        return script in self.counts
+
+    @property
+    def dominant(self) -> Optional[str]:
+        return max(self.counts, key=self.counts.get) if self.counts else None
+
+
+@lru_cache(maxsize=SCRIPT_CACHE_SIZE)
+def analyze(text: str) -> ScriptProfile:
+    """Classify every character of `text` by script in one pass (memoised per text)"""
+    tagged = Counter(text.translate(_TAG_TABLE))
+    return ScriptProfile({_TAGS[tag]: count for tag, count in tagged.items() if tag in _TAGS})
+
+
+def contains_script(text: str, script: str) -> bool:
+    return analyze(text).has(script)
+
+
+def in_language_script(text: str, language: str, min_ratio: float = SCRIPT_NATIVE_THRESHOLD) -> bool:
+    """Whether `text` is mostly written in `language`'s script (e.g. 'hi' -> Devanagari).
+
+    Bilingual replies ("Fever / बुखार") sit around 0.35-0.65 Devanagari and still need translating.
+    """
+    script = LANGUAGE_SCRIPTS.get(language)
+    return script is not None and script != "latin" and analyze(text).ratio(script) >= min_ratio
+
+
+def detect_language(text: str, threshold: float = SCRIPT_LANGUAGE_THRESHOLD) -> str:
+    """Language code of the strongest Indic script above `threshold`, else English"""
+    profile = analyze(text)
+    indic = [(profile.ratio(script), script) for script in profile.counts if script != "latin"]
+    if indic:
+        ratio, script = max(indic)
+        if ratio > threshold:
+            return SCRIPT_LANGUAGES[script]
+    return "en"
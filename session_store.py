@@ -0,0 +1,169 @@
+"""Conversation sessions: written through to SQLite, with an in-memory LRU read cache"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from storage import Database
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 200000))        # sessions kept in memory
+SESSION_COLD_TTL = float(os.getenv("SESSION_COLD_TTL", 7 * 86400))       # sessions idle longer than this are deleted
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", 60))
+
+SESSION_COLUMNS = ("session_id", "last_intent", "last_disease", "last_location", "awaiting", "turns", "updated_at")
+SESSION_FIELDS = ("last_intent", "last_disease", "last_location", "awaiting")  # what a turn may change
+
+
+class SessionState:
+    """What the bot remembers about one conversation"""
+
+    __slots__ = SESSION_COLUMNS
+
+    def __init__(self, session_id: str, last_intent: Optional[str] = None, last_disease: Optional[str] = None,
+                 last_location: Optional[str] = None, awaiting: Optional[str] = None, turns: int = 0,
+                 updated_at: Optional[float] = None):
+        self.session_id = session_id
+        self.last_intent = last_intent
+        self.last_disease = last_disease
+        self.last_location = last_location
+        self.awaiting = awaiting              # what the last reply asked for, e.g. "location"
+        self.turns = turns                    # bumped by every committed update; the cache's version
+        self.updated_at = updated_at or time.time()
+
+
+def create_session_schema(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS conversation_sessions (
+            session_id TEXT PRIMARY KEY,
+            last_intent TEXT,
+            last_disease TEXT,
+            last_location TEXT,
+            awaiting TEXT,
+            turns INTEGER,
+            updated_at REAL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_conversation_sessions_updated ON conversation_sessions (updated_at)')
+
+
+def update_session(conn: sqlite3.Connection, session_id: str, fields: Dict, now: float) -> sqlite3.Row:
+    """Apply one turn's fields in a single upsert and return the merged row.
+
+    Only the named fields are written, so when two workers update the same session
+    each keeps the other's changes, and `turns` counts both.
+    """
+    unknown = set(fields) - set(SESSION_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown session fields: {sorted(unknown)}")
+    names = list(fields)
+    assignments = "".join(f"{name} = excluded.{name}, " for name in names)
+    return conn.execute(f'''
+        INSERT INTO conversation_sessions (session_id, {"".join(f"{name}, " for name in names)}turns, updated_at)
+        VALUES (?, {"?, " * len(names)}1, ?)
+        ON CONFLICT (session_id) DO UPDATE SET {assignments}turns = turns + 1, updated_at = excluded.updated_at
+        RETURNING {", ".join(SESSION_COLUMNS)}
+    ''', (session_id, *(fields[name] for name in names), now)).fetchone()
+
+
+class SessionStore:
+    """Session store shared by every worker process through SQLite.
+
+    Each turn's changes are written through with one upsert (update_session), so a
+    follow-up handled by another worker sees them. The OrderedDict LRU only caches
+    states: get() always reads the row and reuses the cached object while its
+    `turns` version still matches. A sweep task deletes sessions idle past the TTL.
+    """
+
+    def __init__(self, db: Database, max_cached: int = SESSION_CACHE_SIZE, cold_ttl: float = SESSION_COLD_TTL,
+                 sweep_interval: float = SESSION_SWEEP_INTERVAL):
+        self.db = db
+        self.max_cached = max_cached
+        self.cold_ttl = cold_ttl
+        self.sweep_interval = sweep_interval
+        self._cache: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+        self.cache_hits = 0
+        self.refreshed = 0  # cached states another worker had changed since
+        self.created = 0
+        self.writes = 0
+        self.expired = 0
+
+    def _remember(self, state: SessionState) -> SessionState:
+        self._cache[state.session_id] = state
+        self._cache.move_to_end(state.session_id)
+        if len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return state
+
+    async def get(self, session_id: str) -> SessionState:
+        """The session's committed state (a fresh one if unknown or expired)"""
+        row = await self.db.fetchone(
+            f'SELECT {", ".join(SESSION_COLUMNS)} FROM conversation_sessions WHERE session_id = ?', (session_id,)
+        )
+        cached = self._cache.get(session_id)
+        if row is None or row["updated_at"] < time.time() - self.cold_ttl:
+            self.created += 1
+            return self._remember(SessionState(session_id))
+        if cached is not None and cached.turns == row["turns"]:
+            self.cache_hits += 1
+            self._cache.move_to_end(session_id)
+            return cached
+        if cached is not None:
+            self.refreshed += 1
+        return self._remember(SessionState(*row))
+
+    async def update(self, state: SessionState, **fields) -> SessionState:
+        """Commit a turn's changes and refresh `state` with the merged row"""
+        now = time.time()
+        row = await self.db.run_write(lambda conn: update_session(conn, state.session_id, fields, now))
+        self.writes += 1
+        for name, value in zip(SESSION_COLUMNS, row):
+            setattr(state, name, value)
+        return self._remember(state)
+
+    async def sweep(self):
+        """Delete sessions idle past the TTL"""
+        expired_before = time.time() - self.cold_ttl
+        self.expired += await self.db.run_write(
+            lambda conn: conn.execute('DELETE FROM conversation_sessions WHERE updated_at < ?', (expired_before,)).rowcount
+        )
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Session sweep error: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop sweeping; every turn is already committed"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "cached_sessions": len(self._cache),
+            "cache_capacity": self.max_cached,
+            "cache_hits": self.cache_hits,
+            "refreshed": self.refreshed,
+            "created": self.created,
+            "writes": self.writes,
+            "expired": self.expired
+        }
@@ -0,0 +1,194 @@
+"""Stale-while-revalidate cache for per-location health statistics"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+STATS_SOFT_TTL = float(os.getenv("STATS_SOFT_TTL", 900))        # serve from memory without refreshing
+STATS_HARD_TTL = float(os.getenv("STATS_HARD_TTL", 21600))      # past this, stale data is never served
+STATS_SNAPSHOT_PATH = os.getenv("STATS_SNAPSHOT_PATH", "stats_snapshot.json")
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", 1000))     # locations kept, least recently used evicted
+STATS_SAVE_DELAY = float(os.getenv("STATS_SAVE_DELAY", 30))     # refreshes within this share one snapshot write
+
+
+class StatsCache:
+    """Per-location cache in front of an async `fetch_fn(location) -> dict`.
+
+    Fresh entries (younger than `soft_ttl`) are served from memory. Stale entries
+    (up to `hard_ttl`) are served immediately while one background refresh runs.
+    Misses and expired entries wait for the upstream; concurrent callers for the
+    same location share a single in-flight fetch. At most `max_entries` locations
+    are kept, in LRU order. Entries are snapshotted to disk, debounced and off the
+    event loop, so a restart starts warm.
+    """
+
+    def __init__(self, fetch_fn: Callable[[str], Awaitable[Dict]], soft_ttl: float = STATS_SOFT_TTL,
+                 hard_ttl: float = STATS_HARD_TTL, snapshot_path: Optional[str] = STATS_SNAPSHOT_PATH,
+                 max_entries: int = STATS_CACHE_SIZE, save_delay: float = STATS_SAVE_DELAY):
+        self.fetch_fn = fetch_fn
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.snapshot_path = snapshot_path
+        self.max_entries = max_entries
+        self.save_delay = save_delay
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._dirty = False
+        self._save_timer: Optional[asyncio.TimerHandle] = None
+        self._save_task: Optional[asyncio.Task] = None
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.saves = 0
+
+    @staticmethod
+    def _key(location: str) -> str:
+        return location.strip().lower()
+
+    async def get(self, location: str) -> Optional[Dict]:
+        """Return stats for `location`, or None if the upstream has nothing usable"""
+        key = self._key(location)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            age = time.time() - entry[0]
+            if age < self.soft_ttl:
+                self.fresh_hits += 1
+                return entry[1]
+            if age < self.hard_ttl:
+                self.stale_hits += 1
+                self._refresh(key)
+                return entry[1]
+
+        self.misses += 1
+        try:
+            return await asyncio.shield(self._refresh(key))
+        except Exception as e:
+            logger.error(f"Stats fetch for {key} failed: {e}")
+            return None
+
+    def _refresh(self, key: str) -> asyncio.Future:
+        """Start (or join) the single in-flight fetch for `key`"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return future
+        future = asyncio.ensure_future(self._fetch(key))
+        self._inflight[key] = future
+        # Background refreshes nobody awaits must not log "exception never retrieved"
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return future
+
+    async def _fetch(self, key: str) -> Dict:
+        try:
+            data = await self.fetch_fn(key)
+            self._store(key, time.time(), data)
+            self._dirty = True
+            self.refreshes += 1
+            self._schedule_save()
+            return data
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: str, fetched_at: float, data: Any):
+        self._entries[key] = (fetched_at, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def load(self):
+        """Restore entries from the on-disk snapshot, dropping anything past the hard TTL"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read stats snapshot {self.snapshot_path}: {e}")
+            return
+
+        cutoff = time.time() - self.hard_ttl
+        for key, entry in snapshot.get("entries", {}).items():
+            if entry["fetched_at"] > cutoff:
+                self._store(key, entry["fetched_at"], entry["data"])  # saved in LRU order
+        logger.info(f"Loaded {len(self._entries)} cached stats entries from {self.snapshot_path}")
+
+    def _schedule_save(self):
+        """Save once, `save_delay` after the first refresh not yet on disk"""
+        if self.snapshot_path and self._save_timer is None:
+            self._save_timer = asyncio.get_running_loop().call_later(self.save_delay, self._start_save)
+
+    def _start_save(self):
+        self._save_timer = None
+        if self._save_task is not None and not self._save_task.done():
+            self._schedule_save()  # one write at a time; retry after this one
+            return
+        self._save_task = asyncio.ensure_future(self.save())
+
+    def _write(self, entries: List[Tuple[str, Tuple[float, Any]]]):
+        snapshot = {
+            "entries": {key: {"fetched_at": fetched_at, "data": data} for key, (fetched_at, data) in entries}
+        }
+        temp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"  # workers may save the same snapshot concurrently
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp_path, self.snapshot_path)
+
+    async def save(self):
+        """Copy the entries on the loop, serialise and write the snapshot atomically off it"""
+        if not self.snapshot_path or not self._dirty:
+            return
+        entries = list(self._entries.items())
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, entries)
+            self.saves += 1
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"Could not write stats snapshot {self.snapshot_path}: {e}")
+
+    async def stop(self):
+        """Cancel the pending debounced save, wait for a running one and write a final snapshot"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        if self._save_task is not None:
+            await self._save_task
+            self._save_task = None
+        await self.save()
+
+    def stats(self) -> Dict:
+        now = time.time()
+        ages = [now - fetched_at for fetched_at, _ in self._entries.values()]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "fresh": sum(age < self.soft_ttl for age in ages),
+            "stale": sum(self.soft_ttl <= age < self.hard_ttl for age in ages),
+            "soft_ttl_seconds": self.soft_ttl,
+            "hard_ttl_seconds": self.hard_ttl,
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "evictions": self.evictions,
+            "saves": self.saves
+        }
@@ -0,0 +1,163 @@
+"""SQLite persistence layer with a pooled, non-blocking async API"""
+import asyncio
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DB_PATH = os.getenv("HEALTH_DB_PATH", "health_chatbot.db")
+DB_READERS = int(os.getenv("HEALTH_DB_READERS", 4))
+DB_BUSY_TIMEOUT = float(os.getenv("HEALTH_DB_BUSY_TIMEOUT", 30))
+
+
+class Database:
+    """Long-lived SQLite connection pool in WAL mode: one writer plus N readers.
+
+    Every statement runs on a dedicated worker thread, so coroutines awaiting the
+    database never block the event loop. All writes are serialised through the
+    single writer connection; reads are spread across the reader connections.
+    """
+
+    def __init__(self, path: str = DB_PATH, readers: int = DB_READERS):
+        self.path = path
+        self.readers = max(1, readers)
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._reader_conns: List[sqlite3.Connection] = []
+        self._write_executor: Optional[ThreadPoolExecutor] = None
+        self._read_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT * 1000)}")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def open(self):
+        """Open the writer and reader connections (idempotent)"""
+        with self._lock:
+            if self._writer is not None:
+                return
+
+            # The writer goes first so the database file and WAL mode exist for the readers
+            self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+            self._writer = self._write_executor.submit(self._connect).result()
+
+            self._read_executor = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="db-reader")
+            for _ in range(self.readers):
+                conn = self._connect(readonly=True)
+                self._reader_conns.append(conn)
+                self._reader_pool.put(conn)
+
+            logger.info(f"Database pool opened: {self.path} (1 writer, {self.readers} readers)")
+
+    def close(self):
+        """Finish pending work and close every pooled connection"""
+        with self._lock:
+            if self._writer is None:
+                return
+
+            self._read_executor.shutdown(wait=True)
+            self._write_executor.submit(self._writer.close).result()
+            self._write_executor.shutdown(wait=True)
+            for conn in self._reader_conns:
+                conn.close()
+
+            self._writer = None
+            self._reader_conns = []
+            self._reader_pool = queue.Queue()
+            self._write_executor = None
+            self._read_executor = None
+
+    # Worker-thread bodies
+    def _write_txn(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        # The connection context manager commits on success and rolls back on error
+        with self._writer:
+            return fn(self._writer)
+
+    def _with_reader(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._reader_pool.get()
+        try:
+            return fn(conn)
+        finally:
+            self._reader_pool.put(conn)
+
+    # Synchronous API (startup/maintenance code outside the event loop)
+    def write_sync(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) in a single write transaction and wait for the result"""
+        self.open()
+        return self._write_executor.submit(self._write_txn, fn).result()
+
+    def read_sync(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) on a pooled reader connection and wait for the result"""
+        self.open()
+        return self._read_executor.submit(self._with_reader, fn).result()
+
+    # Async API
+    async def run_write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) in a single write transaction off the event loop"""
+        self.open()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._write_executor, self._write_txn, fn)
+
+    async def run_read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) on a pooled reader connection off the event loop"""
+        self.open()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, self._with_reader, fn)
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        """Execute a write statement and return the last inserted row id"""
+        return await self.run_write(lambda conn: conn.execute(sql, params).lastrowid)
+
+    async def executemany(self, sql: str, seq_of_params: Iterable[Sequence]) -> int:
+        """Execute a write statement for every parameter set in one transaction"""
+        return await self.run_write(lambda conn: conn.executemany(sql, seq_of_params).rowcount)
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[sqlite3.Row]:
+        return await self.run_read(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql: str, params: Sequence = ()) -> Optional[sqlite3.Row]:
+        return await self.run_read(lambda conn: conn.execute(sql, params).fetchone())
+
+
+# Leases: maintenance jobs that every worker process schedules but only one should run
+def create_lease_schema(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            lease_until REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+
+def claim_lease(conn: sqlite3.Connection, name: str, owner: str, seconds: float) -> bool:
+    """Take or renew the named lease if it is free, expired or already `owner`'s (one upsert)"""
+    now = time.time()
+    return conn.execute('''
+        INSERT INTO job_leases (name, owner, lease_until) VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, lease_until = excluded.lease_until
+        WHERE job_leases.owner = excluded.owner OR job_leases.lease_until < ?
+    ''', (name, owner, now + seconds, now)).rowcount > 0
+
+
+def release_lease(conn: sqlite3.Connection, name: str, owner: str):
+    conn.execute('DELETE FROM job_leases WHERE name = ? AND owner = ?', (name, owner))
@@ -0,0 +1,232 @@
+"""Pluggable nearest-neighbour indexes over TF-IDF symptom vectors"""
+import logging
+import os
+from typing import Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MATCHER_INDEX = os.getenv("MATCHER_INDEX", "auto")               # auto | exact | inverted
+MATCHER_RECALL = float(os.getenv("MATCHER_RECALL", 1.0))         # share of query weight probed by the inverted index
+INVERTED_MIN_ROWS = int(os.getenv("MATCHER_INVERTED_MIN_ROWS", 5000))
+RERANK_DEPTH = int(os.getenv("MATCHER_RERANK_DEPTH", 32))      # candidates re-scored per result slot
+MATCHER_TEMPERATURE = float(os.getenv("MATCHER_TEMPERATURE", 0.1))  # softmax temperature for match probabilities
+
+
+def l2_normalize(matrix) -> sparse.csr_matrix:
+    """Return a CSR copy of `matrix` with unit-length rows (all-zero rows stay zero)"""
+    matrix = sparse.csr_matrix(matrix, dtype=np.float64, copy=True)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+    return matrix
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first, via argpartition; lower indices win ties"""
+    if k == 1:
+        return np.array([np.argmax(scores)])  # first index wins ties, like np.argmax
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    candidates = np.flatnonzero(scores >= kth)  # every row tied with the k-th, in index order
+    return candidates[np.argsort(-scores[candidates], kind="stable")][:k]
+
+
+def gather_ranges(indptr: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenated positions of the CSR/CSC slices `ids`, plus each slice's length"""
+    starts = indptr[ids]
+    lengths = indptr[ids + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum()), lengths
+
+
+def as_rows(matrix, normalize: bool) -> sparse.csr_matrix:
+    return l2_normalize(matrix) if normalize else sparse.csr_matrix(matrix, dtype=np.float64)
+
+
+class ExactIndex:
+    """Exact search: one sparse matmul against a CSR matrix.
+
+    Rows and queries are L2-normalised (cosine) unless normalize=False, which
+    scores raw dot products.
+    """
+
+    name = "exact"
+
+    def __init__(self, matrix, normalize: bool = True):
+        self.normalize = normalize
+        self.matrix = as_rows(matrix, normalize)
+        self._matrix_t = self.matrix.T.tocsr()
+
+    @property
+    def size(self) -> int:
+        return self.matrix.shape[0]
+
+    def search(self, queries, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (indices, scores) of shape (n_queries, k); missing slots are -1 / 0"""
+        queries = as_rows(queries, self.normalize)
+        scores = (queries @ self._matrix_t).toarray()
+        n, size = scores.shape
+        k_eff = min(k, size)
+
+        indices = np.full((n, k), -1, dtype=np.int64)
+        best = np.zeros((n, k))
+        if k_eff == 0:
+            return indices, best
+
+        if k_eff == 1:
+            part = np.argmax(scores, axis=1)[:, None]  # first index wins ties, like np.argmax
+        else:
+            # Stable sort rather than argpartition so tied rows keep index order, as with
+            # k=1; auto mode moves large KBs to the inverted index anyway
+            part = np.argsort(-scores, axis=1, kind="stable")[:, :k_eff]
+        part_scores = np.take_along_axis(scores, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind="stable")
+        indices[:, :k_eff] = np.take_along_axis(part, order, axis=1)
+        best[:, :k_eff] = np.take_along_axis(part_scores, order, axis=1)
+        indices[best <= 0] = -1  # rows sharing no term with the query are not matches
+        return indices, best
+
+
+class InvertedIndex:
+    """Term -> postings index that only scores rows sharing a term with the query.
+
+    With recall=1.0 results are identical to ExactIndex. Lower recall probes only the
+    heaviest query terms covering that share of the query's squared weight, then
+    re-scores the best `k * RERANK_DEPTH` partial matches exactly, trading recall for
+    fewer postings on large vocabularies.
+    """
+
+    name = "inverted"
+
+    def __init__(self, matrix, recall: float = MATCHER_RECALL, normalize: bool = True):
+        self.normalize = normalize
+        normalized = as_rows(matrix, normalize)
+        self._row_indptr = normalized.indptr
+        self._row_terms = normalized.indices
+        self._row_weights = normalized.data
+        postings = normalized.tocsc()
+        postings.sort_indices()
+        self._indptr = postings.indptr
+        self._rows = postings.indices
+        self._weights = postings.data
+        self._size = normalized.shape[0]
+        self.recall = recall
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _probe_terms(self, terms: np.ndarray, weights: np.ndarray, recall: float) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(-weights, kind="stable")
+        terms, weights = terms[order], weights[order]
+        if recall < 1.0:
+            mass = np.cumsum(weights ** 2)
+            keep = int(np.searchsorted(mass, recall * mass[-1])) + 1
+            terms, weights = terms[:keep], weights[:keep]
+        return terms, weights
+
+    def _rescore(self, candidates: np.ndarray, terms: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Exact dot products of candidate rows with the full query"""
+        order = np.argsort(terms)
+        terms, weights = terms[order], weights[order]
+        positions, lengths = gather_ranges(self._row_indptr, candidates)
+        row_terms = self._row_terms[positions]
+        slots = np.minimum(np.searchsorted(terms, row_terms), len(terms) - 1)
+        matched = np.where(terms[slots] == row_terms, weights[slots], 0.0)
+        owners = np.repeat(np.arange(len(candidates)), lengths)
+        return np.bincount(owners, weights=self._row_weights[positions] * matched, minlength=len(candidates))
+
+    def search(self, queries, k: int = 1, recall: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (indices, scores) of shape (n_queries, k); missing slots are -1 / 0"""
+        recall = self.recall if recall is None else recall
+        queries = as_rows(queries, self.normalize)
+        n = queries.shape[0]
+        indices = np.full((n, k), -1, dtype=np.int64)
+        best = np.zeros((n, k))
+
+        for i in range(n):
+            start, end = queries.indptr[i], queries.indptr[i + 1]
+            if start == end:
+                continue
+            query_terms, query_weights = queries.indices[start:end], queries.data[start:end]
+            terms, weights = self._probe_terms(query_terms, query_weights, recall)
+
+            positions, lengths = gather_ranges(self._indptr, terms)
+            if not len(positions):
+                continue
+            contributions = self._weights[positions] * np.repeat(weights, lengths)
+
+            # Group-by candidate row and sum the per-term contributions
+            candidates, inverse = np.unique(self._rows[positions], return_inverse=True)
+            scores = np.bincount(inverse, weights=contributions)
+            if recall < 1.0:
+                # Partial sums only shortlist candidates; re-score the shortlist on the full query
+                depth = k * RERANK_DEPTH
+                shortlist = top_k(scores, depth) if depth < len(scores) else np.arange(len(scores))
+                candidates = candidates[shortlist]
+                scores = self._rescore(candidates, query_terms, query_weights)
+
+            winners = top_k(scores, k)
+            indices[i, :len(winners)] = candidates[winners]
+            best[i, :len(winners)] = scores[winners]
+
+        return indices, best
+
+
+def calibrate(indices: np.ndarray, scores: np.ndarray, threshold: float,
+              temperature: float = MATCHER_TEMPERATURE) -> np.ndarray:
+    """Turn top-k similarity rows into probabilities.
+
+    Softmax over each row's results plus a "no match" option scored at `threshold`,
+    so a lone weak match gets a low probability rather than 1.0.
+    """
+    logits = np.where(indices >= 0, scores / temperature, -np.inf)
+    null = np.full((logits.shape[0], 1), threshold / temperature)
+    logits = np.hstack([logits, null])
+    logits -= logits.max(axis=1, keepdims=True)
+    weights = np.exp(logits)
+    return (weights / weights.sum(axis=1, keepdims=True))[:, :-1]
+
+
+def build_index(matrix, mode: str = MATCHER_INDEX, recall: float = MATCHER_RECALL, normalize: bool = True):
+    """Create the configured index; `auto` switches to the inverted index for large KBs"""
+    if mode == "auto":
+        mode = "inverted" if matrix.shape[0] >= INVERTED_MIN_ROWS else "exact"
+    logger.info(f"Using {mode} symptom index over {matrix.shape[0]} rows")
+    if mode == "exact":
+        return ExactIndex(matrix, normalize)
+    if mode == "inverted":
+        return InvertedIndex(matrix, recall, normalize)
+    raise ValueError(f"Unknown matcher index: {mode}")
+
+
+class CoverageIndex:
+    """Scores each row by how much of a query its terms cover.
+
+    The score is sqrt(sum of the L2-normalised query's squared weights over terms the
+    row contains): 1.0 when every query term belongs to the row, however many other
+    terms the row has, so a one-symptom query fully matches each disease listing it.
+    """
+
+    def __init__(self, matrix, mode: str = MATCHER_INDEX, recall: float = MATCHER_RECALL):
+        membership = sparse.csr_matrix(matrix, dtype=np.float64, copy=True)
+        membership.eliminate_zeros()
+        membership.data[:] = 1.0
+        self._index = build_index(membership, mode, recall, normalize=False)
+        self.name = f"coverage/{self._index.name}"
+
+    @property
+    def size(self) -> int:
+        return self._index.size
+
+    def search(self, queries, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (indices, scores) of shape (n_queries, k); missing slots are -1 / 0"""
+        squared = l2_normalize(queries)
+        squared.data **= 2
+        indices, scores = self._index.search(squared, k)
+        return indices, np.sqrt(np.clip(scores, 0.0, 1.0))
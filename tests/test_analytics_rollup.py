@@ -0,0 +1,89 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from analytics_rollup import accuracy_summary, create_rollup_schema, interaction_summary, update_rollups
+from interaction_logger import InteractionRecord
+from storage import Database
+
+START = datetime(2026, 10, 1, 8, 30)
+
+
+def raw_schema(conn):
+    conn.execute('''
+        CREATE TABLE user_interactions (
+            user_id TEXT, query TEXT, response TEXT, confidence REAL, timestamp DATETIME, language TEXT, source TEXT
+        )
+    ''')
+
+
+def random_records(rng, count):
+    return [
+        InteractionRecord(
+            user_id=f"user{rng.randrange(12)}", query="q", response="r", confidence=round(rng.random(), 3),
+            timestamp=START + timedelta(minutes=rng.randrange(3 * 24 * 60)),
+            language=rng.choice(["en", "hi"]), source=rng.choice(["web", "whatsapp"])
+        ) for _ in range(count)
+    ]
+
+
+def insert_raw(conn, records):
+    conn.executemany('INSERT INTO user_interactions VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        (r.user_id, r.query, r.response, r.confidence, r.timestamp, r.language, r.source) for r in records
+    ])
+
+
+def raw_summary(conn, since):
+    rows = conn.execute('''
+        SELECT COUNT(*), AVG(confidence), COUNT(DISTINCT user_id), language, source,
+               AVG(confidence > 0.8) * 100, AVG(confidence > 0.6) * 100
+        FROM user_interactions WHERE timestamp >= ? GROUP BY language, source
+    ''', (since,)).fetchall()
+    return {(row[3], row[4]): tuple(row[:3]) + tuple(row[5:]) for row in rows}
+
+
+def test_rollups_match_raw_rows(tmp_path):
+    rng = random.Random(7)
+    db = Database(str(tmp_path / "rollup.db"), readers=1)
+    db.write_sync(raw_schema)
+
+    # Rows that predate the rollups are backfilled when the schema is created
+    existing = random_records(rng, 150)
+    db.write_sync(lambda conn: insert_raw(conn, existing))
+    db.write_sync(create_rollup_schema)
+
+    # Later batches are folded in alongside their raw rows
+    for _ in range(4):
+        batch = random_records(rng, 60)
+        db.write_sync(lambda conn: (insert_raw(conn, batch), update_rollups(conn, batch)))
+
+    # Whole days, since distinct users are kept per day
+    since = START.replace(hour=0, minute=0) + timedelta(days=1)
+    expected = db.read_sync(lambda conn: raw_summary(conn, since))
+    summary = db.read_sync(lambda conn: interaction_summary(conn, since))
+    accuracy = {(row["language"], row["source"]): row for row in db.read_sync(lambda conn: accuracy_summary(conn, since))}
+
+    assert len(summary) == len(expected) == 4
+    for row in summary:
+        count, avg, users, high, medium = expected[(row["language"], row["source"])]
+        assert row["total_interactions"] == count
+        assert row["avg_confidence"] == pytest.approx(avg)
+        assert row["unique_users"] == users
+        bucket = accuracy[(row["language"], row["source"])]
+        assert bucket["high_confidence_percentage"] == round(high, 1)
+        assert bucket["medium_confidence_percentage"] == round(medium, 1)
+    db.close()
+
+
+def test_backfill_only_runs_on_first_creation(tmp_path):
+    db = Database(str(tmp_path / "rollup.db"), readers=1)
+    db.write_sync(raw_schema)
+    records = random_records(random.Random(1), 10)
+    db.write_sync(lambda conn: insert_raw(conn, records))
+    db.write_sync(create_rollup_schema)
+    db.write_sync(create_rollup_schema)
+
+    total = db.read_sync(lambda conn: conn.execute('SELECT SUM(interactions) FROM interaction_rollup_hourly').fetchone()[0])
+    assert total == 10
+    db.close()
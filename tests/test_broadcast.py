@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+from broadcast import BroadcastEngine, claim_broadcast, create_broadcast_schema, subscribe
+from storage import Database
+
+RATES = {"whatsapp": 1000, "sms": 1000}
+
+
+def setup_db(tmp_path, subscribers=20):
+    db = Database(str(tmp_path / "broadcast.db"), readers=1)
+    db.open()
+
+    def setup(conn):
+        create_broadcast_schema(conn)
+        conn.execute('CREATE TABLE health_alerts (id INTEGER PRIMARY KEY, message TEXT, sent_count INTEGER DEFAULT 0)')
+        conn.execute("INSERT INTO health_alerts (id, message) VALUES (1, 'Boil drinking water')")
+        for n in range(subscribers):
+            subscribe(conn, f"+9100000{n:05d}", "whatsapp" if n % 2 else "sms", "pune", "english")
+
+    db.write_sync(setup)
+    return db
+
+
+def test_claim_is_exclusive_until_the_lease_expires(tmp_path):
+    db = setup_db(tmp_path)
+    db.write_sync(lambda conn: conn.execute(
+        "INSERT INTO broadcasts (alert_id, location, status) VALUES (1, 'pune', 'pending')"
+    ))
+    assert db.write_sync(lambda conn: claim_broadcast(conn, 1, "a", 60))
+    assert db.write_sync(lambda conn: claim_broadcast(conn, 1, "a", 60))  # renewal
+    assert not db.write_sync(lambda conn: claim_broadcast(conn, 1, "b", 60))
+
+    db.write_sync(lambda conn: conn.execute('UPDATE broadcasts SET lease_until = ?', (time.time() - 1,)))
+    assert db.write_sync(lambda conn: claim_broadcast(conn, 1, "b", 60))  # a stopped renewing
+    assert not db.write_sync(lambda conn: claim_broadcast(conn, 1, "a", 60))
+    db.close()
+
+
+def test_workers_sharing_a_database_send_each_alert_once(tmp_path):
+    db = setup_db(tmp_path)
+    sent = []
+
+    async def send(channel, phone, body):
+        await asyncio.sleep(0.001)
+        sent.append(phone)
+
+    engines = [BroadcastEngine(db, send, chunk_size=4, concurrency=2, rates=RATES) for _ in range(2)]
+
+    async def scenario():
+        for engine in engines:
+            await engine.start()
+        await engines[0].submit(1, "Pune")
+        await engines[1].submit(1, "Pune")  # both workers try to send the same alert
+        for _ in range(200):
+            if sum(engine.completed for engine in engines):
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        for engine in engines:
+            await engine.stop()
+
+    asyncio.run(scenario())
+    assert len(sent) == 20 and len(set(sent)) == 20
+    assert sorted(engine.completed for engine in engines) == [0, 1]
+    row = db.read_sync(lambda conn: conn.execute('SELECT status, owner FROM broadcasts').fetchone())
+    assert tuple(row) == ("done", None)
+    assert db.read_sync(lambda conn: conn.execute('SELECT sent_count FROM health_alerts').fetchone()[0]) == 20
+    db.close()
+
+
+def test_stopped_worker_releases_its_alert(tmp_path):
+    db = setup_db(tmp_path, subscribers=4)
+
+    async def scenario():
+        blocked = asyncio.Event()
+
+        async def stuck(channel, phone, body):
+            await blocked.wait()
+
+        first = BroadcastEngine(db, stuck, rates=RATES)
+        await first.start()
+        await first.submit(1, "pune")
+        await asyncio.sleep(0.05)
+        await first.stop()
+
+        sent = []
+
+        async def send(channel, phone, body):
+            sent.append(phone)
+
+        second = BroadcastEngine(db, send, rates=RATES)
+        await second.start()  # picks the released alert up without waiting out the lease
+        for _ in range(200):
+            if second.completed:
+                break
+            await asyncio.sleep(0.01)
+        await second.stop()
+        return sent
+
+    assert len(asyncio.run(scenario())) == 4
+    db.close()
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import healthcare_chatbot_sih as chatbot
+from interaction_logger import InteractionLogger, InteractionRecord
+from interaction_store import InteractionIds, InteractionStore, LastInteractionIndex
+from storage import Database
+
+
+class JSONRequest:
+    def __init__(self, data):
+        self.data = data
+
+    async def json(self):
+        return self.data
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    """The app's feedback globals on a scratch database"""
+    db = Database(str(tmp_path / "feedback.db"), readers=1)
+    store = InteractionStore()
+
+    def schema(conn):
+        conn.execute('CREATE TABLE table_row_counts (table_name TEXT PRIMARY KEY, row_count INTEGER NOT NULL)')
+        store.create_schema(conn)
+
+    db.write_sync(schema)
+    monkeypatch.setattr(chatbot, "db", db)
+    monkeypatch.setattr(chatbot, "interaction_store", store)
+    monkeypatch.setattr(chatbot, "last_interactions", LastInteractionIndex())
+    monkeypatch.setattr(chatbot, "interaction_logger", InteractionLogger(db, store.insert))
+    yield db, store
+    db.close()
+
+
+def served(db, store, ids, when):
+    record = InteractionRecord("s1", "fever", "Rest", 0.9, when, "english", "knowledge_base", interaction_id=ids.next())
+    db.write_sync(lambda conn: store.insert(conn, [record]))
+    return record.interaction_id
+
+
+def ratings(db):
+    return db.read_sync(lambda conn: [tuple(row) for row in conn.execute('SELECT id, feedback FROM user_interactions')])
+
+
+def test_feedback_rates_the_newest_reply_from_any_worker(worker):
+    db, store = worker
+    mine = served(db, store, InteractionIds(node=1), when=datetime.now() - timedelta(minutes=1))
+    chatbot.last_interactions.set("s1", mine)
+    # The session's next turn went to another worker
+    theirs = served(db, store, InteractionIds(node=2), when=datetime.now())
+    assert theirs > mine
+
+    reply = asyncio.run(chatbot.submit_feedback(JSONRequest({"session_id": "s1", "rating": 5})))
+    assert reply["interaction_id"] == str(theirs)
+    assert sorted(ratings(db)) == sorted([(mine, 0), (theirs, 5)])
+
+
+def test_feedback_honours_an_explicit_interaction(worker):
+    db, store = worker
+    ids = InteractionIds(node=1)
+    first = served(db, store, ids, when=datetime.now())
+    served(db, store, ids, when=datetime.now())
+
+    reply = asyncio.run(chatbot.submit_feedback(JSONRequest({"session_id": "s1", "rating": 2, "interaction_id": first})))
+    assert reply["status"] == "success"
+    assert (first, 2) in ratings(db)
+
+    reply = asyncio.run(chatbot.submit_feedback(JSONRequest({"session_id": "nobody", "rating": 2})))
+    assert reply["status"] == "error"
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import fitted_matcher
+from fitted_matcher import fingerprint, fit_matcher, load_matcher, load_or_fit, save_matcher
+
+SYMPTOMS = {
+    "malaria": {"english": {"symptoms": ["high fever with chills", "sweating and headache"]},
+                "hindi": {"symptoms": ["तेज बुखार"]}},
+    "dengue": {"english": {"symptoms": ["fever with joint pain", "skin rash"]}},
+    "cholera": {"english": {"symptoms": ["watery diarrhea", "vomiting and dehydration"]}},
+}
+QUERIES = ["I have fever and chills", "joint pain and a rash", "तेज बुखार है", "nothing relevant"]
+
+
+def test_vectorizer_reproduces_scikit_learn():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    phrases = [symptom for lang_data in SYMPTOMS.values() for data in lang_data.values() for symptom in data["symptoms"]]
+    expected = TfidfVectorizer(stop_words="english", ngram_range=(1, 2)).fit(phrases)
+    matcher = fit_matcher(SYMPTOMS)
+    assert matcher.vectorizer.vocabulary_ == expected.vocabulary_
+    np.testing.assert_allclose(matcher.vectorizer.transform(QUERIES).toarray(), expected.transform(QUERIES).toarray())
+
+
+def test_saved_artifact_round_trips(tmp_path):
+    path = str(tmp_path / "matcher.npz")
+    fitted = fit_matcher(SYMPTOMS)
+    save_matcher(fitted, path)
+    loaded = load_matcher(path)
+
+    assert loaded.fingerprint == fitted.fingerprint == fingerprint(SYMPTOMS)
+    assert loaded.diseases == ["malaria", "dengue", "cholera"]
+    assert loaded.vectorizer.vocabulary_ == fitted.vectorizer.vocabulary_
+    assert loaded.vectorizer.stop_words == fitted.vectorizer.stop_words
+    assert (loaded.disease_matrix != fitted.disease_matrix).nnz == 0
+    np.testing.assert_array_equal(loaded.vectorizer.transform(QUERIES).toarray(),
+                                  fitted.vectorizer.transform(QUERIES).toarray())
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    calls = []
+
+    def counting_fit(symptoms_db):
+        calls.append(symptoms_db)
+        return fit_matcher(symptoms_db)
+
+    monkeypatch.setattr(fitted_matcher, "fit_matcher", counting_fit)
+    return calls
+
+
+def test_matching_artifact_is_loaded_without_fitting(tmp_path, fits):
+    path = str(tmp_path / "matcher.npz")
+    save_matcher(fit_matcher(SYMPTOMS), path)
+    assert load_or_fit(SYMPTOMS, path).fingerprint == fingerprint(SYMPTOMS)
+    assert fits == []
+
+
+def test_stale_or_broken_artifact_is_refitted(tmp_path, fits):
+    path = str(tmp_path / "matcher.npz")
+    save_matcher(fit_matcher(SYMPTOMS), path)
+
+    changed = {**SYMPTOMS, "typhoid": {"english": {"symptoms": ["prolonged fever"]}}}
+    assert fingerprint(changed) != fingerprint(SYMPTOMS)
+    matcher = load_or_fit(changed, path)
+    assert matcher.diseases[-1] == "typhoid" and len(fits) == 1
+
+    with open(path, "wb") as f:
+        f.write(b"not an npz file")
+    assert load_or_fit(SYMPTOMS, path).fingerprint == fingerprint(SYMPTOMS)
+    assert load_or_fit(SYMPTOMS, str(tmp_path / "missing.npz")).diseases == ["malaria", "dengue", "cholera"]
+    assert len(fits) == 3
+
+
+def test_fingerprint_covers_every_symptom_phrase():
+    reworded = {**SYMPTOMS, "cholera": {"english": {"symptoms": ["watery diarrhoea", "vomiting and dehydration"]}}}
+    assert fingerprint(reworded) != fingerprint(SYMPTOMS)
+    assert fingerprint(dict(SYMPTOMS)) == fingerprint(SYMPTOMS)
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from healthcare_chatbot_sih import resolve_follow_up
+from session_store import SessionState, SessionStore, create_session_schema
+from storage import Database
+
+
+def awaiting_location():
+    return SessionState("s1", last_intent="vaccination", awaiting="location")
+
+
+@pytest.mark.parametrize("text, location", [
+    ("Delhi", "delhi"), ("mumbai city", "mumbai"), ("tamil nadu", "tamil nadu"), ("110001", "110001"),
+    ("lucknow", "lucknow"), ("Gorakhpur district", "gorakhpur"), ("लखनऊ", "लखनऊ")  # not in any place table
+])
+def test_place_names_answer_the_location_question(text, location):
+    intent, parameters = resolve_follow_up(awaiting_location(), text, "", {})
+    assert intent == "vaccination.query"
+    assert parameters["location"] == location
+
+
+@pytest.mark.parametrize("text", ["fever headache nausea", "thanks", "hello", "bukhar hai", "dengue", "ok",
+                                  "i want to know about the covid vaccine please", "room 42"])
+def test_other_short_messages_are_not_locations(text):
+    intent, parameters = resolve_follow_up(awaiting_location(), text, "", {})
+    assert intent != "vaccination.query"
+    assert "location" not in parameters
+
+
+def test_location_question_is_open_for_one_turn():
+    session = awaiting_location()
+    resolve_follow_up(session, "thanks", "", {})
+    intent, _ = resolve_follow_up(session, "delhi", "", {})
+    assert intent == ""
+
+
+def test_workers_share_session_state(tmp_path):
+    db = Database(str(tmp_path / "sessions.db"), readers=1)
+    db.write_sync(create_session_schema)
+    first, second = SessionStore(db), SessionStore(db)  # one per worker process
+
+    async def scenario():
+        session = await first.get("s1")
+        await first.update(session, last_intent="vaccination", awaiting="location")
+
+        # The follow-up lands on the other worker
+        follow_up = await second.get("s1")
+        assert (follow_up.last_intent, follow_up.awaiting) == ("vaccination", "location")
+        await second.update(follow_up, last_location="delhi", awaiting=None)
+
+        # Concurrent turns merge field by field instead of the last writer replacing the row
+        stale = await first.get("s1")
+        assert (stale.last_location, first.refreshed) == ("delhi", 1)
+        await first.update(stale, last_disease="dengue")
+        await second.update(follow_up, last_intent="prevention")
+        return await first.get("s1")
+
+    state = asyncio.run(scenario())
+    db.close()
+    assert (state.last_intent, state.last_disease, state.last_location, state.awaiting) == (
+        "prevention", "dengue", "delhi", None)
+    assert state.turns == 4
+
+
+def test_cache_is_bounded_and_expired_sessions_start_fresh(tmp_path):
+    db = Database(str(tmp_path / "sessions.db"), readers=1)
+    db.write_sync(create_session_schema)
+    store = SessionStore(db, max_cached=2, cold_ttl=60)
+
+    async def scenario():
+        for session_id in ("a", "b", "c"):
+            await store.update(await store.get(session_id), last_intent="symptoms")
+        assert store.stats()["cached_sessions"] == 2
+        assert (await store.get("a")).last_intent == "symptoms"  # evicted from the cache, read from SQLite
+
+        db.write_sync(lambda conn: conn.execute("UPDATE conversation_sessions SET updated_at = 0 WHERE session_id = 'b'"))
+        assert (await store.get("b")).last_intent is None
+        await store.sweep()
+        assert store.expired == 1
+
+    asyncio.run(scenario())
+    db.close()
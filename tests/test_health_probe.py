@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from health_probe import HealthProbe
+
+
+async def healthy():
+    return {"version": "1"}
+
+
+async def hung():
+    await asyncio.sleep(10)
+
+
+async def broken():
+    raise ConnectionError("refused")
+
+
+def test_snapshot_before_the_first_round():
+    probe = HealthProbe()
+    probe.register("database", healthy)
+    assert probe.snapshot["status"] == "starting"
+    assert not probe.ready
+
+
+def test_checks_run_concurrently_and_time_out():
+    probe = HealthProbe(timeout=0.1)
+    probe.register("database", healthy)
+    probe.register("translator", hung, critical=False)
+    probe.register("disease_api", hung, critical=False)
+
+    started = time.perf_counter()
+    asyncio.run(probe.probe_once())
+    assert time.perf_counter() - started < 0.5  # two 0.1s timeouts side by side
+
+    snapshot = probe.snapshot
+    assert snapshot["status"] == "degraded"
+    assert snapshot["dependencies"]["database"]["status"] == "operational"
+    assert snapshot["dependencies"]["database"]["version"] == "1"
+    translator = snapshot["dependencies"]["translator"]
+    assert (translator["status"], translator["error"]) == ("error", "timed out after 0.1s")
+    assert probe.ready  # only optional checks failed
+
+
+def test_failing_critical_check_makes_it_unhealthy():
+    probe = HealthProbe()
+    probe.register("database", broken)
+    probe.register("translator", healthy, critical=False)
+    asyncio.run(probe.probe_once())
+
+    assert probe.snapshot["status"] == "unhealthy"
+    assert probe.snapshot["dependencies"]["database"]["error"] == "refused"
+    assert not probe.ready
+
+
+def test_background_rounds_refresh_the_snapshot():
+    probe = HealthProbe(interval=0.02)
+    calls = []
+
+    async def counted():
+        calls.append(1)
+
+    probe.register("database", counted)
+
+    async def scenario():
+        probe.start()
+        await asyncio.sleep(0.1)
+        await probe.stop()
+
+    asyncio.run(scenario())
+    assert probe.rounds == len(calls) >= 3
+    assert probe.snapshot["status"] == "healthy"
+    assert probe.stats()["checks"] == {"database": "critical"}
@@ -0,0 +1,80 @@
+import asyncio
+
+from heavy_hitters import SpaceSaving, TopQueryTracker, create_top_queries_schema
+from storage import Database
+
+
+def open_db(tmp_path):
+    db = Database(str(tmp_path / "top.db"), readers=1)
+    db.write_sync(create_top_queries_schema)
+    return db
+
+
+def test_space_saving_keeps_heavy_hitters():
+    summary = SpaceSaving(capacity=3)
+    for item in ["fever"] * 5 + ["a", "b", "c", "d"] + ["dengue"] * 3:
+        summary.offer(item)
+    assert summary.counts["fever"] == 5
+    # dengue inherited an evicted count: it is overestimated by at most its error
+    assert summary.counts["dengue"] - summary.errors["dengue"] <= 3 <= summary.counts["dengue"]
+    assert len(summary.counts) == 3 and summary.total == 12
+
+
+def test_workers_merge_into_one_ranking(tmp_path):
+    db = open_db(tmp_path)
+    workers = [TopQueryTracker(db, capacity=10), TopQueryTracker(db, capacity=10)]
+
+    async def scenario():
+        for query in ["fever"] * 3 + ["dengue"]:
+            workers[0].offer(query)
+        for query in ["dengue"] * 3 + ["cough"]:
+            workers[1].offer(query)
+        # Unflushed counts only show in their own worker
+        assert (await workers[1].top(1))["items"] == [("dengue", 3)]
+        for worker in workers:
+            await worker.flush()
+        return [await worker.top(3) for worker in workers]
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert first["items"] == [("dengue", 4), ("fever", 3), ("cough", 1)]
+    assert first["total"] == 8
+    assert workers[0].stats()["pending_offers"] == 0
+    db.close()
+
+
+def test_flush_trims_buckets_to_capacity(tmp_path):
+    db = open_db(tmp_path)
+    workers = [TopQueryTracker(db, capacity=2), TopQueryTracker(db, capacity=2)]
+
+    async def scenario():
+        for query in ["fever", "fever", "rash"]:
+            workers[0].offer(query)
+        for query in ["cough", "cough", "cough", "fever"]:
+            workers[1].offer(query)
+        for worker in workers:
+            await worker.flush()
+        return await workers[0].top(5)
+
+    top = asyncio.run(scenario())
+    assert sorted(top["items"]) == [("cough", 3), ("fever", 3)]
+    rows = db.read_sync(lambda conn: conn.execute('SELECT COUNT(*) FROM top_query_counts').fetchone()[0])
+    assert rows == 2
+    db.close()
+
+
+def test_failed_flush_keeps_counts(tmp_path):
+    db = open_db(tmp_path)
+    tracker = TopQueryTracker(db, capacity=10)
+    db.write_sync(lambda conn: conn.execute('DROP TABLE top_query_totals'))
+
+    async def scenario():
+        tracker.offer("fever")
+        await tracker.flush()
+        tracker.offer("fever")
+        db.write_sync(create_top_queries_schema)
+        await tracker.flush()
+        return await tracker.top(1)
+
+    assert asyncio.run(scenario())["items"] == [("fever", 2)]
+    db.close()
@@ -0,0 +1,27 @@
+import pytest
+
+from hinglish import HinglishLexicon
+
+
+@pytest.fixture(scope="module")
+def lexicon():
+    return HinglishLexicon()
+
+
+@pytest.mark.parametrize("text", ["tap water is dirty", "dane on the team", "great dane has fever"])
+def test_english_words_are_left_alone(lexicon, text):
+    match = lexicon.match(text)
+    assert match.text == text
+    assert not match.symptoms
+
+
+@pytest.mark.parametrize("text, symptoms", [
+    ("mujhe taap hai", ("fever",)),
+    ("taap aur sir dard", ("fever", "headache")),
+    ("daane hai", ("rash",)),
+    ("laal daane", ("rash",)),
+    ("bukhar", ("fever",)),
+    ("sir mein dard", ("headache",)),
+])
+def test_romanised_terms_in_hindi_context(lexicon, text, symptoms):
+    assert lexicon.match(text).symptoms == symptoms
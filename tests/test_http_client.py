@@ -0,0 +1,76 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import http_client
+from http_client import SharedHTTPClient
+from stub_server import serve
+
+
+def peer_stub(delay=0):
+    """Answers with nothing; records the client port of each request"""
+    peers = []
+
+    async def handler(request):
+        peers.append(request.transport.get_extra_info("peername")[1])
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    return app, peers
+
+
+def test_requests_reuse_pooled_connections():
+    app, peers = peer_stub()
+    http = SharedHTTPClient()
+
+    async def scenario():
+        await http.start()
+        session = http.session
+        await http.start()  # idempotent
+        assert http.session is session
+        async with serve(app) as base_url:
+            for _ in range(3):
+                async with http.session.get(base_url) as response:
+                    assert (await response.json()) == {"ok": True}
+        assert http.stats()["open"]
+        await http.close()
+        assert not http.stats()["open"]
+
+    asyncio.run(scenario())
+    assert len(peers) == 3 and len(set(peers)) == 1  # one keep-alive connection
+
+
+def test_hung_upstream_hits_the_read_timeout(monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_READ_TIMEOUT", 0.1)
+    app, _ = peer_stub(delay=1)
+    http = SharedHTTPClient()
+
+    async def scenario():
+        async with serve(app) as base_url:
+            try:
+                with pytest.raises(asyncio.TimeoutError):
+                    async with http.session.get(base_url) as response:
+                        await response.read()
+            finally:
+                await http.close()
+
+    asyncio.run(scenario())
+
+
+def test_session_is_recreated_after_close():
+    http = SharedHTTPClient()
+
+    async def scenario():
+        first = http.session
+        await http.close()
+        assert first.closed
+        second = http.session
+        assert second is not first and isinstance(second, aiohttp.ClientSession)
+        await http.close()
+
+    asyncio.run(scenario())
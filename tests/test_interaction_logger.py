@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime
+
+from interaction_logger import InteractionLogger, InteractionRecord
+from storage import Database
+
+
+def open_db(tmp_path):
+    db = Database(str(tmp_path / "log.db"), readers=1)
+    db.write_sync(lambda conn: conn.execute('CREATE TABLE log (id INTEGER, query TEXT, feedback INTEGER)'))
+    return db
+
+
+def recording_writer(batches):
+    def write(conn, batch):
+        batches.append(len(batch))
+        conn.executemany('INSERT INTO log (id, query, feedback) VALUES (?, ?, ?)',
+                         [(record.interaction_id, record.query, record.feedback) for record in batch])
+    return write
+
+
+def record(n):
+    return InteractionRecord(f"user{n}", f"query {n}", "reply", 0.9, datetime.now(), "en", "test", interaction_id=n)
+
+
+def logged_rows(db):
+    return db.read_sync(lambda conn: conn.execute('SELECT id, feedback FROM log ORDER BY id').fetchall())
+
+
+def test_records_are_written_in_batches(tmp_path):
+    db = open_db(tmp_path)
+    batches = []
+    log = InteractionLogger(db, recording_writer(batches), batch_size=10, flush_interval=5)
+
+    async def scenario():
+        log.start()
+        for n in range(25):
+            assert log.log(record(n))
+        await asyncio.sleep(0.1)  # two full batches go out without waiting for the window
+        written = log.written
+        await log.stop()
+        return written
+
+    assert asyncio.run(scenario()) == 20
+    assert batches == [10, 10, 5]
+    assert len(logged_rows(db)) == 25
+    assert log.stats()["avg_batch_size"] == round(25 / 3, 2)
+    db.close()
+
+
+def test_partial_batch_flushes_after_the_window(tmp_path):
+    db = open_db(tmp_path)
+    batches = []
+    log = InteractionLogger(db, recording_writer(batches), batch_size=100, flush_interval=0.05)
+
+    async def scenario():
+        log.start()
+        for n in range(3):
+            log.log(record(n))
+        await asyncio.sleep(0.2)
+        written = log.written
+        await log.stop()
+        return written
+
+    assert asyncio.run(scenario()) == 3
+    assert batches == [3]
+    db.close()
+
+
+def test_full_queue_drops_and_queued_records_can_be_patched(tmp_path):
+    db = open_db(tmp_path)
+    log = InteractionLogger(db, recording_writer([]), max_queue=2)
+
+    async def scenario():
+        # Not started: records wait in the queue until stop() writes them
+        assert log.log(record(1)) and log.log(record(2))
+        assert not log.log(record(3))
+        log.pending(2).feedback = 5
+        await log.stop()
+        assert log.pending(2) is None
+        assert not log.log(record(4))
+
+    asyncio.run(scenario())
+    assert [tuple(row) for row in logged_rows(db)] == [(1, 0), (2, 5)]
+    assert (log.written, log.dropped) == (2, 2)
+    db.close()
+
+
+def test_failed_batch_is_counted(tmp_path):
+    db = open_db(tmp_path)
+
+    def failing_writer(conn, batch):
+        raise RuntimeError("disk full")
+
+    log = InteractionLogger(db, failing_writer, batch_size=10, flush_interval=0.01)
+
+    async def scenario():
+        log.start()
+        log.log(record(1))
+        await log.stop()
+
+    asyncio.run(scenario())
+    assert (log.written, log.failed, log.batches) == (0, 1, 0)
+    db.close()
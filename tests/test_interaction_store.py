@@ -0,0 +1,194 @@
+import asyncio
+import os
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from interaction_logger import InteractionRecord
+from interaction_store import (ID_NODE_BITS, ID_SEQUENCE_BITS, InteractionIds, InteractionStore, LastInteractionIndex,
+                               RetentionJob, id_timestamp, read_archive)
+from storage import Database, create_lease_schema
+
+
+def create_counters(conn):
+    conn.execute('CREATE TABLE IF NOT EXISTS table_row_counts (table_name TEXT PRIMARY KEY, row_count INTEGER NOT NULL)')
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    create_counters(conn)
+    yield conn
+    conn.close()
+
+
+def record(ids, response="Drink clean water", user="u1", when=None):
+    return InteractionRecord(user, "typhoid prevention", response, 0.9, when or datetime.now(), "english",
+                             "knowledge_base", interaction_id=ids.next())
+
+
+def test_processes_claim_distinct_nodes(conn, monkeypatch):
+    first = InteractionIds()
+    first.claim(conn)
+    assert first.claim(conn) == first.node  # same process keeps its node
+
+    monkeypatch.setattr(os, "getpid", lambda: 999999)
+    second = InteractionIds()
+    second.claim(conn)
+    assert second.node != first.node
+
+    # A claim left by a process that is gone is freed for the next claimant
+    conn.execute('UPDATE interaction_id_nodes SET pid = 2147483000 WHERE node = ?', (second.node,))
+    monkeypatch.setattr(os, "getpid", lambda: 999998)
+    third = InteractionIds()
+    third.claim(conn)
+    assert third.node != first.node
+    assert conn.execute('SELECT COUNT(*) FROM interaction_id_nodes WHERE pid = 2147483000').fetchone()[0] == 0
+
+
+def test_ids_require_a_claimed_node():
+    with pytest.raises(RuntimeError):
+        InteractionIds().next()
+
+
+def test_feedback_reaches_migrated_legacy_rows(conn):
+    conn.execute('''
+        CREATE TABLE user_interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, query TEXT, response TEXT, confidence REAL,
+            timestamp DATETIME, language TEXT, source TEXT, feedback INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT INTO user_interactions (user_id, query, response, confidence, timestamp) "
+                 "VALUES ('u1', 'fever', 'Malaria info', 0.8, '2025-03-14 10:00:00.123456')")
+    store = InteractionStore()
+    store.create_schema(conn)
+
+    interaction_id = store.latest_interaction(conn, "u1")
+    assert id_timestamp(interaction_id).strftime("%Y%m") == "202503"
+    assert store.record_feedback(conn, interaction_id, 5)
+    assert conn.execute('SELECT feedback FROM user_interactions WHERE id = ?', (interaction_id,)).fetchone()[0] == 5
+    assert not store.record_feedback(conn, 12345, 5)
+
+
+def test_rolled_back_reply_texts_are_inserted_again(conn):
+    ids = InteractionIds(node=1)
+    store = InteractionStore()
+    store.create_schema(conn)
+    conn.commit()
+
+    with pytest.raises(RuntimeError):
+        with conn:
+            store.insert(conn, [record(ids)])
+            raise RuntimeError("rollups failed")
+    with conn:
+        store.insert(conn, [record(ids)])
+    with conn:
+        store.insert(conn, [record(ids)])
+
+    responses = [row[0] for row in conn.execute('SELECT response FROM user_interactions')]
+    assert responses == ["Drink clean water", "Drink clean water"]
+
+
+def test_retention_archives_on_a_reader_and_drops_on_the_writer(tmp_path):
+    db = Database(str(tmp_path / "interactions.db"), readers=1)
+    store = InteractionStore(retention_months=1, archive_dir=str(tmp_path / "archive"))
+    ids = InteractionIds(node=1)
+
+    def setup(conn):
+        create_counters(conn)
+        create_lease_schema(conn)
+        store.create_schema(conn)
+        old = record(ids, when=datetime(2024, 1, 5))
+        old.interaction_id = None  # rows without an ID go to the partition of their timestamp
+        store.insert(conn, [old, record(ids)])
+
+    db.write_sync(setup)
+    job = RetentionJob(db, store)
+    paths = asyncio.run(job.run_once())
+    db.close()
+
+    assert [os.path.basename(path) for path in paths] == ["user_interactions_202401.json.gz"]
+    assert "user_interactions_202401" not in store.partitions
+    assert [row["response"] for row in read_archive(paths[0])] == ["Drink clean water"]
+
+
+def test_workers_see_each_others_partitions_and_share_retention(tmp_path):
+    db = Database(str(tmp_path / "interactions.db"), readers=1)
+    first = InteractionStore(retention_months=1, archive_dir=str(tmp_path / "archive"))
+    second = InteractionStore(retention_months=1, archive_dir=str(tmp_path / "archive"))
+    ids = InteractionIds(node=1)
+
+    def setup(conn):
+        create_counters(conn)
+        create_lease_schema(conn)
+        first.create_schema(conn)
+        second.create_schema(conn)
+
+    db.write_sync(setup)
+
+    # A month partition created by the first worker, after the second cached its set
+    old = record(ids, when=datetime(2024, 1, 5))
+    old.interaction_id = None
+    db.write_sync(lambda conn: first.insert(conn, [old]))
+    db.write_sync(lambda conn: second.insert(conn, [record(ids, response="Rest")]))
+    view = db.read_sync(lambda conn: conn.execute('SELECT COUNT(*) FROM user_interactions').fetchone()[0])
+    assert view == 2  # the second worker's view rebuild kept the first worker's partition
+
+    old_id = db.read_sync(lambda conn: conn.execute(
+        'SELECT id FROM user_interactions_202401').fetchone()[0])
+    assert db.write_sync(lambda conn: second.record_feedback(conn, old_id, 4))
+
+    jobs = [RetentionJob(db, first), RetentionJob(db, second)]
+    jobs[1]._token = "other-worker"
+
+    async def scenario():
+        archived = await jobs[0].run_once()
+        assert await jobs[1].run_once() == []  # the first worker holds the lease
+        await jobs[0].stop()
+        return archived
+
+    paths = asyncio.run(scenario())
+    assert [os.path.basename(path) for path in paths] == ["user_interactions_202401.json.gz"]
+    assert jobs[1].skipped == 1
+    assert asyncio.run(jobs[1].run_once()) == []  # lease released; nothing left to archive
+    assert jobs[1].runs == 1
+    db.close()
+
+
+def id_at(when, node=1, sequence=0):
+    return (int(when.timestamp() * 1000) << (ID_NODE_BITS + ID_SEQUENCE_BITS)) | (node << ID_SEQUENCE_BITS) | sequence
+
+
+def test_last_interaction_index_is_bounded():
+    index = LastInteractionIndex(max_entries=2)
+    index.set("s1", 1)
+    index.set("s2", 2)
+    index.set("s1", 3)  # s1 is now most recent
+    index.set("s3", 4)  # evicts s2
+    assert (index.get("s1"), index.get("s2"), index.get("s3")) == (3, None, 4)
+    assert index.stats() == {"sessions": 2, "capacity": 2, "hits": 2, "misses": 1}
+
+
+def test_feedback_by_id_updates_one_row_in_its_partition(conn):
+    store = InteractionStore()
+    store.create_schema(conn)
+    older, newer = datetime(2026, 8, 20, 9), datetime(2026, 10, 5, 9)
+    records = [
+        InteractionRecord("u1", "fever", "Rest", 0.9, older, "english", "knowledge_base", interaction_id=id_at(older)),
+        InteractionRecord("u1", "cough", "Steam", 0.9, newer, "english", "knowledge_base", interaction_id=id_at(newer)),
+        InteractionRecord("u2", "rash", "Cream", 0.9, newer, "english", "knowledge_base", interaction_id=id_at(newer, sequence=1)),
+    ]
+    store.insert(conn, records)
+    assert store.partitions == ["user_interactions_202608", "user_interactions_202610"]
+    assert store.latest_interaction(conn, "u1") == id_at(newer)
+
+    assert store.record_feedback(conn, id_at(older), 4, "u1", "helpful")
+    rated = conn.execute('SELECT id, feedback FROM user_interactions WHERE feedback != 0').fetchall()
+    assert rated == [(id_at(older), 4)]
+    assert conn.execute('SELECT interaction_id, rating, comment FROM feedback_comments').fetchall() == \
+        [(id_at(older), 4, "helpful")]
+
+    # Unknown IDs are reported and leave no orphan comment
+    assert not store.record_feedback(conn, id_at(datetime(2026, 9, 1)), 1, "u1", "lost")
+    assert conn.execute('SELECT COUNT(*) FROM feedback_comments').fetchone()[0] == 1
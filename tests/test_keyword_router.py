@@ -0,0 +1,25 @@
+import pytest
+
+from keyword_router import KeywordRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return KeywordRouter()
+
+
+@pytest.mark.parametrize("text", ["book a ticket", "tickets for the show", "bachelor party"])
+def test_romanised_keywords_do_not_match_inside_english_words(router, text):
+    assert router.route(text).route is None
+
+
+@pytest.mark.parametrize("text, route, disease", [
+    ("tike kahan lagenge", "vaccination", None),
+    ("teeka lagwana hai", "vaccination", None),
+    ("vaccination centre", "vaccination", None),  # English stems still match word prefixes
+    ("malariya ke lakshan", "symptoms", "malaria"),
+    ("corona vaccine", "vaccination", "covid"),
+])
+def test_routes(router, text, route, disease):
+    match = router.route(text)
+    assert (match.route, match.disease) == (route, disease)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from healthcare_chatbot_sih import HealthKnowledgeBase
+from symptom_index import CoverageIndex
+
+
+@pytest.fixture(scope="module")
+def kb():
+    return HealthKnowledgeBase()
+
+
+@pytest.mark.parametrize("query, disease, confidence", [
+    ("fever", "malaria", 0.333),  # a three-way tie in the top 3; ties keep knowledge base order
+    ("pain", "dengue", 0.5),      # dengue and typhoid tie
+    ("I have fever and chills", "malaria", 0.961),
+    ("fever headache nausea", "malaria", 0.861),
+    ("rash joint pain", "dengue", 0.996),
+    ("dry cough loss of taste", "covid", 0.996),
+    ("stomach pain diarrhea", "typhoid", 0.996),
+])
+def test_canonical_queries(kb, query, disease, confidence):
+    response = kb.find_best_match(query)
+    assert response.topic == ("symptoms", disease)
+    assert response.confidence == pytest.approx(confidence, abs=0.01)
+    assert response.ranking[0][0] == disease
+
+
+def test_confidence_is_coverage_weighted_by_probability(kb):
+    response = kb.find_best_match("fever")
+    _, coverage, probability = response.ranking[0]
+    assert coverage == pytest.approx(1.0)
+    assert response.confidence == pytest.approx(coverage * probability)
+    assert response.confidence < 0.5
+
+
+def test_partial_match_scores_below_full_match(kb):
+    ranking = dict((d, (c, p)) for d, c, p in kb.rank_diseases("I have fever and chills"))
+    assert 0.3 < ranking["covid"][0] < 0.8  # covers "fever" only
+    assert ranking["malaria"][1] > 0.9
+
+
+def test_unrelated_query_falls_back_to_default(kb):
+    response = kb.find_best_match("hello")
+    assert response.source == "default"
+    assert response.ranking is None
+
+
+def test_coverage_index_matches_inverted_and_exact():
+    profiles = sparse.random(200, 50, density=0.1, random_state=1, format="csr")
+    queries = sparse.random(20, 50, density=0.1, random_state=2, format="csr")
+    exact = CoverageIndex(profiles, mode="exact")
+    inverted = CoverageIndex(profiles, mode="inverted")
+    exact_idx, exact_scores = exact.search(queries, k=3)
+    inverted_idx, inverted_scores = inverted.search(queries, k=3)
+    np.testing.assert_allclose(exact_scores, inverted_scores)
+    np.testing.assert_array_equal(exact_idx, inverted_idx)
+    assert exact_scores.max() <= 1.0
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from micro_batch import MicroBatcher
+
+
+def slow_double(items):
+    time.sleep(0.05)
+    return [item * 2 for item in items]
+
+
+def test_concurrent_submits_share_a_batch():
+    async def run():
+        batcher = MicroBatcher(slow_double, window_ms=5)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results == [i * 2 for i in range(10)]
+    assert batcher.batches == 1 and batcher.max_seen == 10
+
+
+def test_stop_finishes_queued_and_in_flight_batches():
+    async def run():
+        batcher = MicroBatcher(slow_double, window_ms=1000)  # only stop() would dispatch this soon
+        futures = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        await batcher.stop()
+        assert batcher.stats()["in_flight"] == 0
+        return await asyncio.gather(*futures)
+
+    assert asyncio.run(run()) == [0, 2, 4]
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+import outbound
+from outbound import TokenBucket, TwilioSendError, TwilioSender
+from stub_server import serve
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(outbound, "SEND_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(outbound, "SEND_BACKOFF_CAP", 0.05)
+
+
+def twilio_stub(responses):
+    """Stub Messages endpoint answering with `responses` in turn; records each request"""
+    requests = []
+
+    async def messages(request):
+        requests.append(await request.post())
+        status, headers, delay = responses[min(len(requests), len(responses)) - 1]
+        if delay:
+            await asyncio.sleep(delay)
+        if status < 300:
+            return web.json_response({"sid": f"SM{len(requests)}"}, status=status)
+        return web.json_response({"message": "error"}, status=status, headers=headers)
+
+    app = web.Application()
+    app.router.add_post("/2010-04-01/Accounts/AC123/Messages.json", messages)
+    return app, requests
+
+
+async def send_through(app, **sender_options):
+    async with serve(app) as base_url:
+        sender = TwilioSender("AC123", "token", base_url=base_url, **sender_options)
+        try:
+            return sender, await sender.send("whatsapp:+10000000000", "whatsapp:+919999999999", "hello")
+        finally:
+            await sender.close()
+
+
+def test_retries_throttled_send_after_retry_after():
+    app, requests = twilio_stub([(429, {"Retry-After": "0.3"}, 0), (201, {}, 0)])
+    started = time.monotonic()
+    sender, message = asyncio.run(send_through(app))
+    assert message["sid"] == "SM2"
+    assert len(requests) == 2
+    assert time.monotonic() - started >= 0.3
+    assert (sender.throttled, sender.retries, sender.sent, sender.failed) == (1, 1, 1, 0)
+
+
+def test_caps_retry_after(monkeypatch):
+    monkeypatch.setattr(outbound, "SEND_RETRY_AFTER_CAP", 0.1)
+    app, requests = twilio_stub([(429, {"Retry-After": "3600"}, 0), (201, {}, 0)])
+    started = time.monotonic()
+    asyncio.run(send_through(app))
+    assert len(requests) == 2
+    assert time.monotonic() - started < 2
+
+
+def test_retries_server_errors_then_gives_up():
+    app, requests = twilio_stub([(503, {}, 0), (500, {}, 0), (201, {}, 0)])
+    sender, message = asyncio.run(send_through(app))
+    assert message["sid"] == "SM3"
+    assert sender.retries == 2
+
+    app, requests = twilio_stub([(503, {}, 0)])
+    with pytest.raises(TwilioSendError) as error:
+        asyncio.run(send_through(app, max_retries=2))
+    assert error.value.status == 503
+    assert len(requests) == 3
+
+
+def test_does_not_retry_client_errors():
+    app, requests = twilio_stub([(400, {}, 0), (201, {}, 0)])
+    with pytest.raises(TwilioSendError) as error:
+        asyncio.run(send_through(app))
+    assert error.value.status == 400
+    assert len(requests) == 1
+
+
+def test_does_not_retry_timeout_after_request_was_sent():
+    # Twilio may have accepted the message before the response timed out
+    app, requests = twilio_stub([(201, {}, 1.0)])
+    with pytest.raises(TwilioSendError, match="not retried"):
+        asyncio.run(send_through(app, timeout=0.2))
+    assert len(requests) == 1
+
+
+def test_retries_connection_failures():
+    # Nothing listens on the discard port, so the request never reaches Twilio
+    sender = TwilioSender("AC123", "token", base_url="http://127.0.0.1:9", max_retries=2)
+
+    async def run():
+        try:
+            await sender.send("+10000000000", "+919999999999", "hello")
+        finally:
+            await sender.close()
+
+    with pytest.raises(TwilioSendError):
+        asyncio.run(run())
+    assert sender.retries == 2
+
+
+def test_token_bucket_paces_acquires():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.monotonic()
+        for _ in range(11):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # One token up front, then ten more at 20/s
+    assert 0.45 <= asyncio.run(run()) < 1.0
+
+
+def test_sender_paces_sends_per_sender_number(monkeypatch):
+    monkeypatch.setattr(outbound, "SMS_RATE_PER_SEC", 5)  # bursts of 5, then 5/s
+    app, requests = twilio_stub([(201, {}, 0)])
+
+    async def run():
+        async with serve(app) as base_url:
+            sender = TwilioSender("AC123", "token", base_url=base_url)
+            started = time.monotonic()
+            await asyncio.gather(*(sender.send("+10000000000", f"+9199999999{i:02d}", "hi") for i in range(11)))
+            elapsed = time.monotonic() - started
+            await sender.close()
+            return elapsed
+
+    assert asyncio.run(run()) >= 1.1
+    assert len(requests) == 11
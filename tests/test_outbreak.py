@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from outbreak import (Detector, EWMADetector, OutbreakEngine, OutbreakMonitor, SeriesStore, claim_alert,
+                      create_outbreak_schema)
+from storage import Database
+
+
+def spiking_store():
+    store = SeriesStore(capacity=28)
+    for day in range(27):
+        store.ingest("pune", 800000 + day, 100 + day % 3)
+    store.ingest("pune", 800027, 1000)
+    return store
+
+
+def test_detector_requires_score():
+    with pytest.raises(TypeError):
+        Detector()
+
+    class Incomplete(Detector):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_workers_raise_each_outbreak_once(tmp_path):
+    db = Database(str(tmp_path / "outbreak.db"), readers=1)
+    db.open()
+    db.write_sync(create_outbreak_schema)
+    raised = []
+
+    async def on_alert(alert):
+        raised.append(alert)
+
+    # Each worker process has its own series and engine but shares the database
+    monitors = [OutbreakMonitor(OutbreakEngine(spiking_store(), [EWMADetector()]), None, on_alert, path=None, db=db)
+                for _ in range(2)]
+
+    async def scenario():
+        for monitor in monitors:
+            await monitor.run_once()
+
+    asyncio.run(scenario())
+    assert [(alert.region, alert.period) for alert in raised] == [("pune", 800027)]
+    assert monitors[1].claimed_elsewhere == 1
+
+    # A restarted worker has no in-memory cooldown; the table still holds it
+    restarted = OutbreakMonitor(OutbreakEngine(spiking_store(), [EWMADetector()]), None, on_alert, path=None, db=db)
+    asyncio.run(restarted.run_once())
+    assert len(raised) == 1
+    db.close()
+
+
+def test_claim_respects_cooldown_across_days(tmp_path):
+    db = Database(str(tmp_path / "outbreak.db"), readers=1)
+    db.open()
+    db.write_sync(create_outbreak_schema)
+    alert = OutbreakEngine(spiking_store(), [EWMADetector()]).detect(now=0)[0]
+
+    assert db.write_sync(lambda conn: claim_alert(conn, alert, 3600, now=1000))
+    alert.period += 1
+    assert not db.write_sync(lambda conn: claim_alert(conn, alert, 3600, now=2000))  # next day, still cooling down
+    assert db.write_sync(lambda conn: claim_alert(conn, alert, 3600, now=5000))
+    assert not db.write_sync(lambda conn: claim_alert(conn, alert, 0, now=9000))  # same region and day
+    db.close()
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from query_cache import QueryCache, normalize_query
+
+
+def test_keys_normalise_the_query():
+    assert normalize_query("  What are  the symptoms of Dengue?? ") == "what are the symptoms of dengue"
+    assert normalize_query("बुखार के लक्षण।") == "बुखार के लक्षण"
+    assert QueryCache.make_key("Fever!", "symptoms", {"b": 1, "a": 2}, "en") == \
+        QueryCache.make_key("fever", "symptoms", {"a": 2, "b": 1}, "en")
+    assert QueryCache.make_key("fever", "symptoms", {}, "en") != QueryCache.make_key("fever", "symptoms", {}, "hi")
+
+
+def test_hit_miss_and_lru_eviction():
+    cache = QueryCache(max_entries=2, ttl=60)
+    assert cache.get("fever") is None
+    cache.set("fever", "reply 1")
+    cache.set("cough", "reply 2")
+    assert cache.get("fever") == "reply 1"   # fever is now most recent
+    cache.set("rash", "reply 3")             # evicts cough
+    assert cache.get("cough") is None
+    assert cache.get("rash") == "reply 3"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (2, 2, 1, 2)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_entries_expire_after_ttl():
+    cache = QueryCache(ttl=0.05)
+    cache.set("fever", "reply")
+    assert cache.get("fever") == "reply"
+    time.sleep(0.1)
+    assert cache.get("fever") is None
+    assert (cache.expired, cache.stats()["entries"]) == (1, 0)
+
+
+def test_invalidation_drops_entries_built_before_it():
+    cache = QueryCache(ttl=60)
+    cache.set("fever", "old reply")
+    cache.invalidate("catalog")
+    assert cache.get("fever") is None
+    assert cache.stale == 1
+
+    cache.set("fever", "new reply")
+    assert cache.get("fever") == "new reply"
+    cache.invalidate("all")
+    assert cache.get("fever") is None
+    assert cache.stats()["generations"] == {"knowledge_base": 1, "catalog": 2}
+
+    with pytest.raises(ValueError):
+        cache.invalidate("translations")
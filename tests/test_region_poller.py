@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from http_client import SharedHTTPClient
+from region_poller import RegionPoller
+from stub_server import serve
+
+
+def disease_stub(values, etag=True, statuses=(200,), delay=0):
+    """Stub disease.sh: each region answers todayCases from `values` in turn (or the
+    next error in `statuses`), with an ETag per value and 304 when the client already
+    holds it; records each request"""
+    requests = []
+    active = [0, 0]  # current, max concurrent requests
+
+    async def country(request):
+        region = request.match_info["region"]
+        requests.append((region, dict(request.headers)))
+        active[0] += 1
+        active[1] = max(active[1], active[0])
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            status = statuses[min(len(requests), len(statuses)) - 1]
+            if status != 200:
+                return web.json_response({"message": "error"}, status=status)
+            served = sum(1 for name, headers in requests[:-1] if name == region and "If-None-Match" not in headers)
+            value = values[min(served, len(values) - 1)]
+            tag = f'"{region}-{value}"'
+            if etag and request.headers.get("If-None-Match") == tag:
+                return web.Response(status=304)
+            return web.json_response({"todayCases": value}, headers={"ETag": tag} if etag else {})
+        finally:
+            active[0] -= 1
+
+    app = web.Application()
+    app.router.add_get("/countries/{region}", country)
+    return app, requests, active
+
+
+async def received(region, data):
+    return data["todayCases"]
+
+
+async def poll_region(app, times, regions=("india",), **options):
+    """Poll the first region `times` times in a row; returns the poller and its region state"""
+    http = SharedHTTPClient()
+    async with serve(app) as base_url:
+        poller = RegionPoller(http, {name: f"countries/{name}" for name in regions}, received,
+                              base_url=base_url, jitter=0, **options)
+        state = poller._states[regions[0]]
+        try:
+            for _ in range(times):
+                await poller._poll(state)
+        finally:
+            await http.close()
+    return poller, state
+
+
+def test_revalidates_with_etag_and_backs_off_on_not_modified():
+    app, requests, _ = disease_stub([100])
+    poller, state = asyncio.run(poll_region(app, 3, base_interval=100, max_interval=200))
+
+    assert "If-None-Match" not in requests[0][1]
+    assert requests[1][1]["If-None-Match"] == '"india-100"'
+    assert (poller.polls, poller.not_modified, state.not_modified) == (3, 2, 2)
+    assert state.value == 100
+    assert state.interval == 200  # 100 -> 150 -> capped at max_interval
+
+
+def test_interval_adapts_to_change():
+    def intervals(values):
+        app, _, _ = disease_stub(values, etag=False)
+        return asyncio.run(poll_region(app, len(values), base_interval=100, min_interval=30, max_interval=1000))[1]
+
+    assert intervals([100, 200, 400, 800]).interval == 30     # sharp rises halve it down to min_interval
+    assert intervals([100, 101, 102]).interval == 225         # stable values grow it by 1.5x per poll
+    assert intervals([100, 200, 215]).interval == 100         # moderate change resets it to base_interval
+
+
+def test_failing_endpoint_backs_off_without_losing_its_interval():
+    app, requests, _ = disease_stub([100], statuses=(503,))
+    started = time.monotonic()
+    poller, state = asyncio.run(poll_region(app, 3, base_interval=100, max_interval=1000))
+
+    assert (poller.errors, state.failures, len(requests)) == (3, 3, 3)
+    assert state.interval == 100
+    assert 800 <= state.next_due - started <= 801  # 100 * 2**3
+
+    # The first success clears the backoff and returns to the learned interval
+    app, _, _ = disease_stub([100], statuses=(503, 503, 200))
+    started = time.monotonic()
+    poller, state = asyncio.run(poll_region(app, 3, base_interval=100, max_interval=1000))
+    assert (poller.errors, state.failures, state.value) == (2, 0, 100)
+    assert 100 <= state.next_due - started <= 101
+
+
+def test_concurrent_polls_are_bounded():
+    regions = [f"region{n}" for n in range(12)]
+    app, requests, active = disease_stub([100], delay=0.05)
+
+    async def scenario():
+        http = SharedHTTPClient()
+        async with serve(app) as base_url:
+            poller = RegionPoller(http, {name: f"countries/{name}" for name in regions}, received,
+                                  base_url=base_url, concurrency=3, startup_spread=0, base_interval=3600)
+            poller.start()
+            for _ in range(200):
+                if poller.polls == len(regions):
+                    break
+                await asyncio.sleep(0.01)
+            await poller.stop()
+            await http.close()
+            return poller
+
+    poller = asyncio.run(scenario())
+    assert sorted(region for region, _ in requests) == sorted(regions)
+    assert poller.stats()["max_concurrent_seen"] == 3
+    assert active[1] == 3
+    assert poller.stats()["in_flight"] == 0
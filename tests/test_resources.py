@@ -0,0 +1,103 @@
+import asyncio
+import gc
+import os
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from resources import ResourceContainer
+
+
+def test_lifespan_builds_resources_and_drains_tasks_on_shutdown():
+    resources = ResourceContainer()
+    builds = []
+
+    def build_matcher():
+        builds.append(threading.current_thread() is threading.main_thread())
+        return {"fitted": True}
+
+    matcher = resources.register("matcher", build_matcher)
+    translator = resources.register("translator", lambda: "translator", eager=False)
+    unwound = []
+
+    async def poll_forever():
+        try:
+            await asyncio.Event().wait()
+        finally:
+            unwound.append(True)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await resources.warm()
+        resources.spawn(poll_forever(), name="poller")
+        try:
+            yield
+        finally:
+            await resources.drain()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/match")
+    def match(fitted=Depends(matcher)):
+        return fitted
+
+    with TestClient(app) as client:
+        assert builds == [False]  # built off the event loop's thread, before the first request
+        assert not translator.built
+        assert client.get("/match").json() == {"fitted": True}
+        stats = resources.stats()
+        assert stats["background_tasks"] == 1
+        assert stats["resources"]["matcher"]["built"]
+
+    assert unwound == [True]
+    assert resources.stats()["background_tasks"] == 0
+    assert builds == [False]  # injected, never rebuilt
+
+
+def test_drain_stops_waiting_after_its_timeout():
+    resources = ResourceContainer()
+
+    async def slow_to_unwind():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.2)  # e.g. a final flush
+
+    async def scenario():
+        task = resources.spawn(slow_to_unwind(), name="flusher")
+        await asyncio.sleep(0)
+        await resources.drain(timeout=0.05)
+        still_running = not task.done()
+        await task
+        return still_running
+
+    assert asyncio.run(scenario())
+
+
+def test_forked_workers_inherit_only_fork_safe_resources(monkeypatch):
+    resources = ResourceContainer()
+    counts = {"catalog": 0, "pool": 0}
+
+    def factory(name):
+        def build():
+            counts[name] += 1
+            return f"{name}-{counts[name]}"
+        return build
+
+    catalog = resources.register("catalog", factory("catalog"), fork_safe=True)
+    pool = resources.register("pool", factory("pool"))
+    try:
+        resources.preload()
+        assert resources.frozen and gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+    assert catalog.built and not pool.built
+    pool()
+
+    master = os.getpid()
+    monkeypatch.setattr(os, "getpid", lambda: master + 1)  # now in a forked worker
+    assert catalog() == "catalog-1" and catalog.stats()["inherited"]
+    assert pool() == "pool-2"
+    assert counts == {"catalog": 1, "pool": 2}
@@ -0,0 +1,22 @@
+from response_catalog import compile_catalog
+from script_analysis import in_language_script
+
+BILINGUAL = "🦟 MALARIA SYMPTOMS (मलेरिया के लक्षण):\n• High fever with chills / तेज़ बुखार ठंड के साथ"
+HINDI = "कृपया बीमारी का नाम बताएं"
+
+
+def test_bilingual_text_is_not_treated_as_hindi():
+    assert not in_language_script(BILINGUAL, "hi")
+    assert in_language_script(HINDI, "hi")
+    assert not in_language_script("fever and chills", "hi")
+
+
+def test_catalog_only_passes_through_hindi_text():
+    sources = {("symptoms", "malaria"): BILINGUAL, ("symptoms", ""): HINDI}
+    catalog = compile_catalog(sources, ("en", "hi"))
+    assert catalog.get("symptoms", "malaria", "en") == BILINGUAL
+    assert catalog.get("symptoms", "malaria", "hi") is None  # left to translation
+    assert catalog.get("symptoms", "", "hi") == HINDI
+
+    translated = compile_catalog(sources, ("en", "hi"), {"hi": {("symptoms", "malaria"): "मलेरिया के लक्षण"}})
+    assert translated.get("symptoms", "malaria", "hi") == "मलेरिया के लक्षण"
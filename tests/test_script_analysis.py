@@ -0,0 +1,43 @@
+import pytest
+
+from script_analysis import analyze, contains_script, detect_language, in_language_script
+
+
+def test_mixed_script_text_is_counted_per_script():
+    profile = analyze("मुझे fever है")  # vowel signs count as Devanagari
+    assert dict(profile.counts) == {"devanagari": 6, "latin": 5}
+    assert profile.dominant == "devanagari"
+    assert profile.ratios() == {"devanagari": 0.5455, "latin": 0.4545}
+    assert contains_script("मुझे fever है", "latin")
+
+
+def test_digits_spaces_and_punctuation_are_ignored():
+    assert analyze("Fever / बुखार!").ratio("devanagari") == 0.5
+    profile = analyze("104.5 ?! 🙂")
+    assert (profile.total, profile.dominant, profile.ratio("latin")) == (0, None, 0.0)
+
+
+@pytest.mark.parametrize("text, language", [
+    ("मुझे fever है", "hi"),
+    ("I have ज्वर fever", "en"),           # 4 of 14 letters Devanagari, under the threshold
+    ("காய்ச்சல் बुखार", "ta"),              # two Indic scripts: the larger share wins
+    ("জ্বর হয়েছে", "bn"),
+    ("fever and cough", "en"),
+    ("", "en"),
+])
+def test_detect_language(text, language):
+    assert detect_language(text) == language
+
+
+def test_bilingual_text_still_needs_translating():
+    assert in_language_script("बुखार है, आराम करें", "hi")
+    assert not in_language_script("Fever / बुखार", "hi")
+    assert not in_language_script("fever", "en")  # Latin is never treated as already translated
+    assert not in_language_script("बुखार", "xx")
+
+
+def test_profiles_are_memoised_and_read_only():
+    profile = analyze("बुखार fever")
+    assert analyze("बुखार fever") is profile
+    with pytest.raises(TypeError):
+        profile.counts["latin"] = 0
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from stats_cache import StatsCache
+
+
+def make_cache(tmp_path, **kwargs):
+    fetched = []
+
+    async def fetch(location):
+        fetched.append(location)
+        return {"location": location}
+
+    cache = StatsCache(fetch, snapshot_path=str(tmp_path / "snapshot.json"), **kwargs)
+    return cache, fetched
+
+
+def test_entries_are_bounded_lru(tmp_path):
+    cache, fetched = make_cache(tmp_path, max_entries=2, save_delay=60)
+
+    async def scenario():
+        await cache.get("delhi")
+        await cache.get("pune")
+        await cache.get("delhi")  # delhi is now most recently used
+        await cache.get("agra")   # evicts pune
+        await cache.get("delhi")
+        await cache.get("pune")
+        await cache.stop()
+
+    asyncio.run(scenario())
+    assert fetched == ["delhi", "pune", "agra", "pune"]
+    assert cache.stats()["entries"] == 2
+    assert cache.evictions == 2
+
+
+def test_snapshot_writes_are_debounced(tmp_path):
+    cache, _ = make_cache(tmp_path, save_delay=0.05)
+
+    async def scenario():
+        for location in ("delhi", "pune", "agra"):
+            await cache.get(location)
+        assert cache.saves == 0  # nothing written on the request path
+        await asyncio.sleep(0.2)
+        assert cache.saves == 1
+        await cache.stop()
+
+    asyncio.run(scenario())
+    assert cache.saves == 1  # stop() has nothing new to write
+    with open(tmp_path / "snapshot.json", encoding="utf-8") as f:
+        assert set(json.load(f)["entries"]) == {"delhi", "pune", "agra"}
+
+    restored, fetched = make_cache(tmp_path, max_entries=2)
+    restored.load()
+    assert list(restored._entries) == ["pune", "agra"]  # oldest dropped past the cap
+
+
+def test_stop_saves_pending_entries(tmp_path):
+    cache, _ = make_cache(tmp_path, save_delay=60)
+
+    async def scenario():
+        await cache.get("delhi")
+        await cache.stop()
+
+    asyncio.run(scenario())
+    assert cache.saves == 1
+    assert (tmp_path / "snapshot.json").exists()
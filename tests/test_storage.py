@@ -0,0 +1,107 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from storage import Database, claim_lease, create_lease_schema, release_lease
+
+
+def open_db(tmp_path, readers=2):
+    db = Database(str(tmp_path / "pool.db"), readers=readers)
+    db.write_sync(lambda conn: conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'))
+    return db
+
+
+def test_writes_commit_on_the_writer_and_roll_back_on_error(tmp_path):
+    db = open_db(tmp_path)
+
+    def insert(conn):
+        conn.execute("INSERT INTO items (name) VALUES ('fever')")
+        return threading.current_thread().name
+
+    assert db.write_sync(insert).startswith("db-writer")
+
+    def insert_then_fail(conn):
+        conn.execute("INSERT INTO items (name) VALUES ('cough')")
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        db.write_sync(insert_then_fail)
+    names = db.read_sync(lambda conn: [row["name"] for row in conn.execute('SELECT name FROM items')])
+    assert names == ["fever"]
+    db.close()
+
+
+def test_readers_are_read_only(tmp_path):
+    db = open_db(tmp_path)
+    with pytest.raises(sqlite3.OperationalError):
+        db.read_sync(lambda conn: conn.execute("INSERT INTO items (name) VALUES ('rash')"))
+    db.close()
+
+
+def test_async_reads_run_concurrently_off_the_loop(tmp_path):
+    db = open_db(tmp_path, readers=3)
+
+    def slow_read(conn):
+        time.sleep(0.2)
+        return threading.current_thread().name, id(conn)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        results = await asyncio.gather(*(db.run_read(slow_read) for _ in range(3)))
+        elapsed = time.perf_counter() - started
+        ticking.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(scenario())
+    assert elapsed < 0.5  # three 0.2s reads on three readers, not one after another
+    assert len({conn for _, conn in results}) == 3
+    assert all(name.startswith("db-reader") for name, _ in results)
+    assert ticks >= 10  # the event loop kept running meanwhile
+    db.close()
+
+
+def test_async_helpers_and_reopen(tmp_path):
+    db = open_db(tmp_path)
+
+    async def scenario():
+        first = await db.execute('INSERT INTO items (name) VALUES (?)', ("fever",))
+        await db.executemany('INSERT INTO items (name) VALUES (?)', [("cough",), ("rash",)])
+        return first, await db.fetchone('SELECT COUNT(*) FROM items'), await db.fetchall('SELECT name FROM items ORDER BY id')
+
+    first, count, rows = asyncio.run(scenario())
+    assert first == 1 and count[0] == 3
+    assert [row["name"] for row in rows] == ["fever", "cough", "rash"]
+
+    db.close()
+    assert not db.is_open
+    assert db.read_sync(lambda conn: conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]) == 3  # reopens
+    assert db.is_open
+    db.close()
+
+
+def test_lease_has_one_owner_until_released_or_expired(tmp_path):
+    db = open_db(tmp_path)
+    db.write_sync(create_lease_schema)
+
+    assert db.write_sync(lambda conn: claim_lease(conn, "retention", "worker-a", 60))
+    assert not db.write_sync(lambda conn: claim_lease(conn, "retention", "worker-b", 60))
+    assert db.write_sync(lambda conn: claim_lease(conn, "retention", "worker-a", 60))  # renewal
+
+    db.write_sync(lambda conn: release_lease(conn, "retention", "worker-b"))  # not b's to release
+    assert not db.write_sync(lambda conn: claim_lease(conn, "retention", "worker-b", 60))
+    db.write_sync(lambda conn: release_lease(conn, "retention", "worker-a"))
+    assert db.write_sync(lambda conn: claim_lease(conn, "retention", "worker-b", -1))  # already expired
+    assert db.write_sync(lambda conn: claim_lease(conn, "retention", "worker-a", 60))
+    db.close()
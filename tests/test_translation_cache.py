@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from storage import Database
+from translation_cache import TranslationCache, create_translation_schema
+
+
+def open_db(tmp_path):
+    db = Database(str(tmp_path / "translate.db"), readers=1)
+    db.write_sync(create_translation_schema)
+    return db
+
+
+class FakeTranslator:
+    """Blocking translator, like googletrans 3.x; records every upstream call"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, text, target_lang):
+        with self._lock:
+            self.calls.append((text, target_lang))
+        time.sleep(self.delay)
+        if text == "fail":
+            raise RuntimeError("upstream down")
+        return f"{target_lang}:{text}"
+
+
+def test_concurrent_misses_share_one_upstream_call(tmp_path):
+    db = open_db(tmp_path)
+    upstream = FakeTranslator(delay=0.1)
+    cache = TranslationCache(db, upstream)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.translate("fever", "hi") for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["hi:fever"] * 5
+    assert upstream.calls == [("fever", "hi")]
+    assert (cache.upstream_calls, cache.coalesced) == (1, 4)
+    assert cache.stats()["inflight"] == 0
+    cache.close()
+    db.close()
+
+
+def test_failure_reaches_every_waiter_and_is_retried(tmp_path):
+    db = open_db(tmp_path)
+    upstream = FakeTranslator(delay=0.05)
+    cache = TranslationCache(db, upstream)
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.translate("fail", "hi") for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await cache.translate("fail", "hi")
+
+    asyncio.run(scenario())
+    assert len(upstream.calls) == 2  # nothing cached after a failure
+    cache.close()
+    db.close()
+
+
+def test_lru_evicts_oldest_and_sqlite_tier_refills_it(tmp_path):
+    db = open_db(tmp_path)
+    upstream = FakeTranslator()
+    cache = TranslationCache(db, upstream, max_entries=2)
+
+    async def scenario():
+        await cache.translate("fever", "hi")
+        await cache.translate("cough", "hi")
+        await cache.translate("fever", "hi")      # memory hit, now most recent
+        await cache.translate("rash", "hi")       # evicts cough
+        assert cache.stats()["memory_entries"] == 2
+        assert await cache.translate("cough", "hi") == "hi:cough"  # from SQLite
+
+    asyncio.run(scenario())
+    assert (cache.memory_hits, cache.disk_hits, cache.upstream_calls) == (1, 1, 3)
+    assert len(upstream.calls) == 3
+    cache.close()
+
+    # Another process (or a restart) finds every translation in the shared tier
+    restarted = TranslationCache(db, upstream)
+    assert asyncio.run(restarted.translate("rash", "hi")) == "hi:rash"
+    assert asyncio.run(restarted.translate("rash", "ta")) == "ta:rash"  # keyed by target language too
+    assert (restarted.disk_hits, restarted.upstream_calls) == (1, 1)
+    restarted.close()
+    db.close()
+
+
+def test_async_translator_results_are_awaited(tmp_path):
+    db = open_db(tmp_path)
+
+    class Translated:
+        def __init__(self, text):
+            self.text = text
+
+    async def translate(text, target_lang):
+        return Translated(text.upper())
+
+    cache = TranslationCache(db, translate)
+    assert asyncio.run(cache.warm(["fever", "cough", "fever"], "hi")) == 2
+    assert asyncio.run(cache.translate("cough", "hi")) == "COUGH"
+    assert cache.upstream_calls == 2
+    cache.close()
+    db.close()
@@ -0,0 +1,158 @@
+"""Content-hash keyed translation cache: in-memory LRU over a SQLite tier"""
+import asyncio
+import hashlib
+import inspect
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List
+
+from storage import Database
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", 2048))
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", 4))
+
+
+def create_translation_schema(conn):
+    """Create the persistent translation tier"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS translation_cache (
+            key TEXT PRIMARY KEY,
+            target_lang TEXT,
+            translated TEXT,
+            created DATETIME
+        )
+    ''')
+
+
+class TranslationCache:
+    """Caches machine translations keyed by sha256(target_lang, text).
+
+    Lookups go memory LRU -> SQLite -> upstream translator. Upstream calls run on a
+    thread pool (awaiting the result if the client is async), and concurrent misses
+    for the same key share one in-flight future so only one upstream call is made.
+    """
+
+    def __init__(self, db: Database, translate_fn: Callable[[str, str], Any],
+                 max_entries: int = TRANSLATION_CACHE_SIZE, workers: int = TRANSLATION_WORKERS):
+        self.db = db
+        self.translate_fn = translate_fn
+        self.max_entries = max_entries
+        self.workers = workers
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @staticmethod
+    def key(text: str, target_lang: str) -> str:
+        return hashlib.sha256(f"{target_lang}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, translated: str):
+        self._memory[key] = translated
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def translate(self, text: str, target_lang: str) -> str:
+        """Return the cached translation, fetching it upstream at most once per key"""
+        key = self.key(text, target_lang)
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            translated = await self._load(key, text, target_lang)
+            self._remember(key, translated)
+            future.set_result(translated)
+            return translated
+        except Exception as e:
+            self.errors += 1
+            future.set_exception(e)
+            # Mark retrieved so waiter-less failures don't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            # A cancelled leader must not leave followers waiting forever
+            if not future.done():
+                future.cancel()
+            del self._inflight[key]
+
+    async def _load(self, key: str, text: str, target_lang: str) -> str:
+        row = await self.db.fetchone('SELECT translated FROM translation_cache WHERE key = ?', (key,))
+        if row is not None:
+            self.disk_hits += 1
+            return row[0]
+
+        translated = await self._call_upstream(text, target_lang)
+        try:
+            await self.db.execute('''
+                INSERT OR REPLACE INTO translation_cache (key, target_lang, translated, created)
+                VALUES (?, ?, ?, ?)
+            ''', (key, target_lang, translated, datetime.now()))
+        except Exception as e:
+            logger.error(f"Translation cache write error: {e}")
+        return translated
+
+    async def _call_upstream(self, text: str, target_lang: str) -> str:
+        self.upstream_calls += 1
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, self.translate_fn, text, target_lang)
+        # Async clients (googletrans 4.x) hand back a coroutine; await it on the loop
+        if inspect.isawaitable(result):
+            result = await result
+        return getattr(result, "text", result)
+
+    async def warm(self, texts: Iterable[str], target_lang: str) -> int:
+        """Pre-translate a batch of texts, at most `workers` upstream calls at a time"""
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def one(text: str) -> bool:
+            async with semaphore:
+                try:
+                    await self.translate(text, target_lang)
+                    return True
+                except Exception as e:
+                    logger.warning(f"Pre-translation failed: {e}")
+                    return False
+
+        results: List[bool] = await asyncio.gather(*(one(text) for text in set(texts)))
+        return sum(results)
+
+    def clear_memory(self):
+        self._memory.clear()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_capacity": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "errors": self.errors
+        }